@@ -0,0 +1,61 @@
+import os
+import sys
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data.store import get_storage
+from src.data.ingest.crypto_backfill import CryptoBackfill, ccxt_async
+from src.data.ingest.live_crypto import select_symbols
+
+# Setup Logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler("backfill_crypto.log"),
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger(__name__)
+
+async def backfill():
+    """
+    Incremental backfill of crypto_1m: each symbol resumes after its last stored
+    bar and is paginated up to now. CRYPTO_BACKFILL_SYMBOLS takes the same spec
+    as the live streamer (BTC/USDT,... or */USDT).
+    """
+    load_dotenv()
+
+    store = get_storage()
+
+    exchange_id = os.getenv("CRYPTO_BACKFILL_EXCHANGE", "binance")
+    exchange = getattr(ccxt_async, exchange_id)({"enableRateLimit": False})
+    try:
+        markets = await exchange.load_markets()
+        spec = [s.strip() for s in os.getenv("CRYPTO_BACKFILL_SYMBOLS", "BTC/USDT,ETH/USDT").split(",") if s.strip()]
+        symbols = select_symbols(markets, spec)
+
+        end_date = datetime.now(timezone.utc)
+        logger.info(f"Starting crypto backfill for {len(symbols)} symbols up to {end_date}")
+        start_time = time.time()
+        runner = CryptoBackfill(store, exchange, exchange_id=exchange_id,
+                                concurrency=int(os.getenv("CRYPTO_BACKFILL_CONCURRENCY", 8)))
+        written = await runner.run(symbols, end=end_date)
+        elapsed = time.time() - start_time
+        logger.info(f"Backfill Complete: {sum(written.values())} rows across {len(written)} symbols "
+                    f"in {elapsed/60:.1f} minutes ({runner.requests} requests).")
+    finally:
+        await exchange.close()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(backfill())
+    except KeyboardInterrupt:
+        logger.info("Backfill interrupted; rerun to resume from the last stored bar.")
+    except Exception as e:
+        logger.error(f"Backfill aborted: {e}")
+        sys.exit(1)
@@ -1,37 +1,36 @@
 
 import os
 import sys
-import pandas as pd
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.data.store import StorageEngine
+from src.data.store import get_storage
 
 def check_status(symbol="GBPJPY"):
-    store = StorageEngine()
-    store.connect()
+    store = get_storage()
     lib = store.get_library('forex_1m')
     
     if not lib.has_symbol(symbol):
         print(f"Symbol {symbol} NOT found in library.")
         return
 
-    # specific read
-    try:
-        # Read metadata or tail?
-        # ArcticDB efficient read
-        df = lib.read(symbol).data
-        if df.empty:
-            print(f"Symbol {symbol} found but EMPTY.")
-        else:
-            print(f"Symbol {symbol}: {len(df)} rows.")
-            print(f"Start: {df.index.min()}")
-            print(f"End:   {df.index.max()}")
-            
-            # Check 2025
-            count_2025 = len(df[df.index.year == 2025])
-            print(f"Rows in 2025: {count_2025}")
-            
-    except Exception as e:
-        print(f"Error reading {symbol}: {e}")
+    # Served from the stats index; the frame itself is not read
+    record = store.symbol_stats('forex_1m', [symbol], reindex_stale=True).get(symbol)
+    if record is None:
+        print(f"Symbol {symbol} is not indexed yet; indexing it now...")
+        store.rebuild_stats('forex_1m', [symbol])
+        record = store.symbol_stats('forex_1m', [symbol]).get(symbol)
+
+    if not record or not record["rows"]:
+        print(f"Symbol {symbol} found but EMPTY.")
+    else:
+        print(f"Symbol {symbol}: {record['rows']} rows.")
+        print(f"Start: {record['start']}")
+        print(f"End:   {record['end']}")
+        print(f"Last write: {record['last_write']}")
+
+        # Check 2025
+        counts = store.daily_counts('forex_1m', symbol)
+        count_2025 = int(counts[counts.index.year == 2025].sum())
+        print(f"Rows in 2025: {count_2025}")
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
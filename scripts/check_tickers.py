@@ -7,7 +7,7 @@ from dotenv import load_dotenv
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from src.data.store import StorageEngine
+from src.data.store import get_storage
 from src.data.ingest.ctrader import CTraderClient
 
 # Configure Logging
@@ -19,8 +19,7 @@ def check_tickers():
     
     # 1. Check ArcticDB
     logger.info("Checking ArcticDB 'forex_1m' library...")
-    storage = StorageEngine()
-    storage.connect()
+    storage = get_storage()
     lib = storage.get_library('forex_1m')
     arctic_symbols = lib.list_symbols()
     logger.info(f"ArcticDB has {len(arctic_symbols)} symbols: {arctic_symbols}")
@@ -19,7 +19,7 @@ def dump_symbols():
     account_id = os.getenv("CTRADER_ACCOUNT_ID")
 
     client = CTraderClient(client_id, client_secret, access_token, account_id)
-    symbols = client.fetch_all_symbols()
+    symbols = client.fetch_all_symbols(refresh=True)
     
     # Sort by name
     symbols.sort(key=lambda x: x['name'])
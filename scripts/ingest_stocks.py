@@ -0,0 +1,43 @@
+import os
+import sys
+import logging
+import time
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data.store import get_storage
+from src.data.ingest.equity_bulk import EquityBulkIngestor
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def load_tickers() -> list:
+    """STOCKS_SYMBOLS_FILE (one ticker per line) wins over the comma-separated STOCKS_SYMBOLS."""
+    path = os.getenv("STOCKS_SYMBOLS_FILE")
+    if path:
+        with open(path) as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return [s.strip() for s in os.getenv("STOCKS_SYMBOLS", "AAPL,MSFT,GOOGL,AMZN,NVDA").split(",") if s.strip()]
+
+def ingest(full: bool = False):
+    """Incremental refresh of stocks_1d (pass --full to re-download and overwrite)."""
+    load_dotenv()
+    store = get_storage()
+
+    tickers = load_tickers()
+    runner = EquityBulkIngestor(store, batch_size=int(os.getenv("STOCKS_BATCH_SIZE", 100)),
+                                workers=int(os.getenv("STOCKS_WORKERS", 4)))
+    start_time = time.time()
+    written = runner.run(tickers, full=full)
+    updated = sum(1 for rows in written.values() if rows)
+    logger.info(f"Stocks ingest complete: {sum(written.values())} rows, {updated}/{len(tickers)} tickers updated "
+                f"in {time.time() - start_time:.1f}s ({runner.requests} downloads).")
+
+if __name__ == "__main__":
+    try:
+        ingest(full="--full" in sys.argv)
+    except KeyboardInterrupt:
+        logger.info("Stocks ingest interrupted; rerun to resume from the last stored bar.")
+    except Exception as e:
+        logger.error(f"Stocks ingest aborted: {e}")
+        sys.exit(1)
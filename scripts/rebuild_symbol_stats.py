@@ -0,0 +1,41 @@
+import os
+import sys
+import logging
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data.store import get_storage, STATS_LIBRARY
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def rebuild(libraries: list = None):
+    """
+    Builds the per-symbol stats index from the stored data (index-only reads).
+    Needed once for data written before the index existed; every write through
+    StorageEngine keeps it current afterwards.
+    Usage: rebuild_symbol_stats.py [LIBRARY ...] (default: every library)
+    """
+    store = get_storage()
+    libraries = libraries or [name for name in store.list_libraries() if name != STATS_LIBRARY]
+    failed = []
+    for name in libraries:
+        start_time = time.time()
+        try:
+            count = store.rebuild_stats(name)
+        except Exception as e:
+            logger.error(f"{name}: stats rebuild failed: {e}")
+            failed.append(name)
+            continue
+        logger.info(f"{name}: indexed {count} symbols in {time.time() - start_time:.1f}s")
+    if failed:
+        raise RuntimeError(f"stats rebuild failed for {', '.join(failed)}")
+
+if __name__ == "__main__":
+    try:
+        rebuild(sys.argv[1:] or None)
+    except KeyboardInterrupt:
+        logger.info("Stats rebuild interrupted; rerun to finish it.")
+    except Exception as e:
+        logger.error(f"Stats rebuild aborted: {e}")
+        sys.exit(1)
@@ -0,0 +1,87 @@
+import os
+import sys
+import logging
+import time
+import pandas as pd
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data.store import get_storage
+from src.data.ingest.payload_archive import PayloadArchive, replay_trendbars
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+COMPACT_STORAGE = os.getenv("FOREX_COMPACT_STORAGE", "0") == "1"
+
+def replay(symbols: list = None, library: str = "forex_1m", interval: str = "m1"):
+    """
+    Re-derives `library` from the raw trendbar archive (CTRADER_PAYLOAD_ARCHIVE)
+    instead of cTrader: every archived response is decoded again with the
+    current decoder. The archive only covers what was fetched while it was
+    enabled, so for a stored symbol only the replayed range is updated, and
+    stored bars the archive lacks (dropped responses) are kept.
+    Usage: replay_forex_archive.py [SYMBOL ...]
+    """
+    load_dotenv()
+    root = os.getenv("CTRADER_PAYLOAD_ARCHIVE")
+    if not root:
+        logger.error("CTRADER_PAYLOAD_ARCHIVE is not set.")
+        return
+    archive = PayloadArchive(root)
+    symbols = symbols or archive.symbols(interval)
+
+    store = get_storage()
+    start_time = time.time()
+    total = 0
+    failed = []
+    for symbol in symbols:
+        try:
+            rows = _replay_symbol(store, archive, symbol, library, interval)
+        except Exception as e:
+            logger.error(f"   !!! Failed to replay {symbol}: {e}")
+            failed.append(symbol)
+            continue
+        total += rows
+    logger.info(f"Replay complete: {total} rows across {len(symbols) - len(failed)} symbols "
+                f"in {time.time() - start_time:.1f}s.")
+    if failed:
+        logger.error(f"Replay failed for {len(failed)} symbols: {', '.join(failed)}")
+
+def _replay_symbol(store, archive: PayloadArchive, symbol: str, library: str, interval: str) -> int:
+    df = replay_trendbars(archive, symbol, interval)
+    if df.empty:
+        logger.warning(f"No archived bars for {symbol}")
+        return 0
+    dropped = archive.dropped_ranges(symbol, interval)
+    if dropped:
+        first, last = min(lo for lo, _ in dropped), max(hi for _, hi in dropped)
+        logger.warning(f"{symbol}: {len(dropped)} responses were dropped before archiving, between "
+                       f"{pd.Timestamp(first, unit='ms', tz='UTC')} and {pd.Timestamp(last, unit='ms', tz='UTC')}")
+    try:
+        stored_end = store.last_timestamp(library, symbol)
+    except ValueError:  # Library not created yet
+        stored_end = None
+    if stored_end is None:
+        digits = df.attrs.get("digits") if COMPACT_STORAGE else None
+        store.write_frame(library, symbol, df, digits=digits, mode="write")
+    else:
+        # Replayed bars win; stored bars inside the range that the archive lacks are kept.
+        # No digits: the update keeps whatever encoding (floats or int ticks) is stored.
+        stored = store.read_frame(library, symbol, date_range=(df.index[0], df.index[-1]))
+        kept = stored.loc[stored.index.difference(df.index)].reindex(columns=df.columns)
+        if not kept.empty:
+            logger.info(f"   {symbol}: keeping {len(kept)} stored bars missing from the archive")
+            df = pd.concat([df, kept]).sort_index()
+        store.write_frame(library, symbol, df, mode="update")
+    logger.info(f"   >>> Replayed {symbol}: {len(df)} rows ({df.index[0]} .. {df.index[-1]})")
+    return len(df)
+
+if __name__ == "__main__":
+    try:
+        replay(sys.argv[1:] or None)
+    except KeyboardInterrupt:
+        logger.info("Replay interrupted; rerun to replay the remaining symbols.")
+    except Exception as e:
+        logger.error(f"Replay aborted: {e}")
+        sys.exit(1)
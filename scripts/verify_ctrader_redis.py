@@ -5,13 +5,14 @@ import sys
 import os
 import asyncio
 import logging
-import redis
 import json
 
 # Adjust path to include src
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.data.ingest.live_forex import CTraderConnector
+from src.data.store import get_redis
+from src.utils.tick_codec import decode_entry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,7 +20,7 @@ logger = logging.getLogger(__name__)
 async def verify_redis_stream():
     """Client to listen to Redis Stream."""
     try:
-        r = redis.Redis(host='localhost', port=6379, decode_responses=True)
+        r = get_redis('localhost', 6379, decode_responses=False) # Raw: entries may be compact binary
         stream_key = "tick:EURUSD"
         last_id = "$"
         
@@ -32,7 +33,7 @@ async def verify_redis_stream():
             if streams:
                 for stream_name, entries in streams:
                     for entry_id, data in entries:
-                        logger.info(f"Received from Stream {stream_name} ID {entry_id}: {data}")
+                        logger.info(f"Received from Stream {stream_name} ID {entry_id}: {decode_entry(data)}")
                         last_id = entry_id
                         count += 1
             await asyncio.sleep(0.1)
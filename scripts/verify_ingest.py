@@ -10,7 +10,7 @@ from datetime import timezone
 # Adjust path to include src
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from src.data.store import StorageEngine
+from src.data.store import StorageEngine, get_storage
 from src.data.ingest.historical import HistoricalIngestor
 from src.utils.time import to_utc
 
@@ -21,8 +21,7 @@ def verify_ingest():
     # 1. Initialize
     logger.info("Initializing StorageEngine and HistoricalIngestor...")
     try:
-        store = StorageEngine()
-        store.connect()
+        store = get_storage()
         ingestor = HistoricalIngestor()
     except Exception as e:
         logger.error(f"Initialization failed: {e}")
@@ -67,7 +66,7 @@ def verify_ingest():
     # 5. Store data
     logger.info(f"Storing data to {lib_name} as {target_symbol}...")
     try:
-        lib.write(target_symbol, df)
+        store.write_frame(lib_name, target_symbol, df)
         logger.info(f"Successfully wrote {target_symbol} to {lib_name}.")
     except Exception as e:
         logger.error(f"Failed to write data: {e}")
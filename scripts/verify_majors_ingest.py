@@ -3,19 +3,20 @@ import sys
 import os
 import asyncio
 import logging
-import redis
 
 # Adjust path to include src
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.data.ingest.live_forex import CTraderConnector
+from src.data.store import get_redis
+from src.utils.tick_codec import decode_entry, symbol_from_key
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 async def verify_streams():
     try:
-        r = redis.Redis(host='localhost', port=6379, decode_responses=True)
+        r = get_redis('localhost', 6379, decode_responses=False) # Raw: entries may be compact binary
         majors = ["EURUSD", "GBPUSD", "USDJPY", "USDCHF", "AUDUSD", "USDCAD", "NZDUSD"]
         
         logger.info("Listening for Majors...")
@@ -32,11 +33,11 @@ async def verify_streams():
             if res:
                 for stream_name, entries in res:
                     # Update Last ID for this stream
-                     last_ids[stream_name] = entries[-1][0]
-                     sym = stream_name.replace("tick:", "")
+                     last_ids[stream_name.decode()] = entries[-1][0]
+                     sym = symbol_from_key(stream_name)
                      if sym in majors:
                          received_symbols.add(sym)
-                         logger.info(f"Received {sym}")
+                         logger.info(f"Received {sym}: {decode_entry(entries[-1][1])['bid']}")
             await asyncio.sleep(0.01)
             
         logger.info(f"Total Unique Majors Received: {len(received_symbols)}")
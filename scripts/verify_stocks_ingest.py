@@ -10,7 +10,7 @@ from datetime import timezone
 # Adjust path to include src
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from src.data.store import StorageEngine
+from src.data.store import StorageEngine, get_storage
 from src.data.ingest.historical import HistoricalIngestor
 
 logging.basicConfig(level=logging.INFO)
@@ -20,8 +20,7 @@ def verify_stocks_ingest():
     # 1. Initialize
     logger.info("Initializing StorageEngine and HistoricalIngestor...")
     try:
-        store = StorageEngine()
-        store.connect()
+        store = get_storage()
         ingestor = HistoricalIngestor()
     except Exception as e:
         logger.error(f"Initialization failed: {e}")
@@ -83,7 +82,7 @@ def verify_stocks_ingest():
     # 5. Store data
     logger.info(f"Storing data to {lib_name}...")
     try:
-        lib.write(symbol, df)
+        store.write_frame(lib_name, symbol, df)
         logger.info(f"Successfully wrote {symbol} to {lib_name}.")
     except Exception as e:
         logger.error(f"Failed to write data: {e}")
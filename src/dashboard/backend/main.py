@@ -2,14 +2,17 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import psutil
 import docker
-import redis
 import os
+import json
 import logging
 from datetime import datetime
 
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
+from src.utils.tick_codec import decode_entry, stream_key
+from src.data.store import get_redis, get_storage
+
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("dashboard-api")
@@ -34,7 +37,11 @@ except Exception as e:
 
 redis_host = os.getenv("REDIS_HOST", "localhost")
 redis_port = int(os.getenv("REDIS_PORT", 6379))
-redis_client = redis.Redis(host=redis_host, port=redis_port, decode_responses=True)
+redis_client = get_redis(redis_host, redis_port)
+# Tick streams may hold binary (compact) entries, so they are read undecoded
+redis_raw = get_redis(redis_host, redis_port, decode_responses=False)
+# Shared ArcticDB instance and library handles (opened on the first request that needs them)
+arctic_uri = os.getenv("ARCTIC_URI", "lmdb:///data/arctic_data")
 
 @app.get("/")
 def health_check():
@@ -85,12 +92,56 @@ def get_service_status():
             ingestor_status = "running"
     except Exception:
         pass
+
+    # Tick writer counters (queue depth, drops) published with the heartbeat
+    tick_writer = {}
+    try:
+        tick_writer = redis_client.hgetall("service:ingestor:stats")
+    except Exception:
+        pass
+
+    # Sharded ingestion: per-shard status published by the coordinator
+    shards = {}
+    try:
+        for shard, status in redis_client.hgetall("service:ingestor:shards").items():
+            shards[shard] = json.loads(status)
+            shards[shard]["heartbeat"] = redis_client.exists(f"service:ingestor:shard:{shard}:heartbeat") > 0
+            shards[shard]["tick_writer"] = redis_client.hgetall(f"service:ingestor:shard:{shard}:stats")
+    except Exception:
+        pass
     
     return {
         "redis": redis_status,
-        "ingestor": ingestor_status
+        "ingestor": ingestor_status,
+        "tick_writer": tick_writer,
+        "shards": shards
     }
 
+@app.get("/status/latency")
+def get_latency_status():
+    """
+    Latest tick latency snapshot from the ingestor: p50/p99/p999/max in
+    microseconds per stage (network, parse, callback, redis), overall and per
+    symbol, plus ticks per second, for the last heartbeat interval. Sharded
+    ingestion publishes one snapshot per shard; they are returned under
+    "shards" (percentiles cannot be merged from summaries).
+    """
+    result = {}
+    try:
+        snapshot = redis_client.get("service:ingestor:latency")
+        if snapshot:
+            result = json.loads(snapshot)
+        shards = {}
+        for shard in redis_client.hkeys("service:ingestor:shards"):
+            snapshot = redis_client.get(f"service:ingestor:shard:{shard}:latency")
+            if snapshot:
+                shards[shard] = json.loads(snapshot)
+        if shards:
+            result["shards"] = shards
+    except Exception as e:
+        logger.error(f"Latency snapshot read failed: {e}")
+    return result
+
 @app.get("/status/data")
 def get_data_status():
     """Returns ingestion metrics."""
@@ -108,25 +159,22 @@ def get_data_status():
     # 2. ArcticDB (Historical)
     arctic_stats = {}
     try:
-        import arcticdb
-        import pandas as pd
-        # Connection inside container
-        ac = arcticdb.Arctic("lmdb:///data/arctic_data")
-        lib = ac["forex_1m"]
-        symbols = lib.list_symbols()
+        store = get_storage(arctic_uri, redis_host, redis_port)
+        symbols = store.get_library("forex_1m").list_symbols()
         
         arctic_stats["symbol_count"] = len(symbols)
         arctic_stats["sample_dates"] = {}
         
-        # Sample top 3 majors
+        # Latest bar of each major from the stats index (no frame reads)
+        stats = store.symbol_stats("forex_1m", [sym for sym in majors if sym in symbols])
         for sym in majors:
             if sym in symbols:
-                # Read last row to get latest date
-                # ArcticDB head/tail is efficient
-                df = lib.read(sym).data
-                if not df.empty:
-                    last_ts = df.index[-1]
-                    arctic_stats["sample_dates"][sym] = str(last_ts)
+                record = stats.get(sym)
+                if record is None or record["stale"]:
+                    last_ts = store.last_timestamp("forex_1m", sym) # Not indexed (or stale) yet
+                    arctic_stats["sample_dates"][sym] = str(last_ts) if last_ts is not None else "Empty"
+                elif record["rows"]:
+                    arctic_stats["sample_dates"][sym] = str(record["end"])
                 else:
                     arctic_stats["sample_dates"][sym] = "Empty"
     except Exception as e:
@@ -138,6 +186,27 @@ def get_data_status():
         "arctic": arctic_stats
     }
 
+@app.get("/data/ticks/{symbol}")
+def get_latest_ticks(symbol: str, count: int = 20):
+    """Returns the latest live ticks of one symbol, newest first."""
+    try:
+        entries = redis_raw.xrevrange(stream_key(symbol), count=min(count, 1000))
+    except Exception as e:
+        logger.error(f"Redis tick read failed: {e}")
+        return {"symbol": symbol, "ticks": [], "error": str(e)}
+
+    ticks = []
+    for entry_id, fields in entries:
+        tick = decode_entry(fields)
+        ticks.append({
+            "id": entry_id.decode(),
+            "bid": tick["bid"],
+            "ask": tick["ask"],
+            "timestamp": tick["timestamp"].isoformat(),
+            "exchange_ts": tick["exchange_ts"].isoformat() if tick["exchange_ts"] else None,
+        })
+    return {"symbol": symbol, "ticks": ticks}
+
 # Serve Static Files (React App)
 # We assume the build is copied to /app/static
 if os.path.exists("/app/static"):
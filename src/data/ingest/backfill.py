@@ -0,0 +1,318 @@
+"""
+Incremental CTrader trendbar backfill into ArcticDB.
+
+Each symbol resumes from max(last stored bar, checkpoint) and only the missing
+tail is fetched and appended, so nightly catch-up does not re-download history.
+Windows of all symbols are fetched in parallel by the BackfillScheduler and
+sized adaptively per symbol; rows are appended as soon as they are contiguous.
+A full rewrite is staged and only published once every window has arrived, so
+an interrupted run leaves the previous version in place.
+"""
+import os
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+import pandas as pd
+
+from src.data.store import StorageEngine
+from src.data.ingest.ctrader import trendbar_period
+from src.data.ingest.scheduler import BackfillScheduler, WindowPlanner
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+# Fetched first when the scheduler orders work
+MAJORS = ["EURUSD", "GBPUSD", "USDJPY", "USDCHF", "AUDUSD", "USDCAD", "NZDUSD"]
+# Rows buffered per symbol before an append (keeps ArcticDB segments reasonably sized)
+FLUSH_ROWS = 50000
+# Rows buffered across all symbols; above this every symbol flushes what is contiguous
+MAX_BUFFERED_ROWS = 200000
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CHECKPOINT_PATH = os.path.join(_BASE_DIR, "backfill_checkpoints.json")
+
+class BackfillCheckpoint:
+    """
+    Per-symbol record of how far a backfill has fetched (including empty windows
+    such as weekends, which leave no trace in the stored data).
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("BACKFILL_CHECKPOINT_PATH", DEFAULT_CHECKPOINT_PATH)
+        self._lock = threading.Lock()
+        self._state = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                self._state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load backfill checkpoints {self.path}: {e}")
+
+    def get(self, key: str) -> Optional[datetime]:
+        entry = self._state.get(key)
+        return datetime.fromisoformat(entry["fetched_until"]) if entry else None
+
+    def set(self, key: str, fetched_until: datetime):
+        """Records progress and persists it atomically."""
+        with self._lock:
+            self._state[key] = {
+                "fetched_until": fetched_until.isoformat(),
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump(self._state, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.error(f"Failed to save backfill checkpoints {self.path}: {e}")
+
+class _SymbolStream:
+    """
+    Reorder buffer of one symbol. Windows finish out of order; their rows wait
+    here until everything before them has been fetched, then they are appended.
+    Memory is bounded by the windows in flight, not by the length of history.
+    """
+    def __init__(self, planner: WindowPlanner, last_written: Optional[pd.Timestamp], overwrite: bool):
+        self.planner = planner
+        self.start = planner.start
+        self.end = planner.end
+        self.lock = threading.Lock()
+        self.pending = []
+        self.pending_rows = 0
+        self.frontier = planner.start
+        self.failed_at = None
+        self.last_written = last_written
+        self.needs_write = last_written is None # Next store creates a new version
+        self.staged = overwrite # Rewrite: chunks are staged and published at the end
+        self.digits = None # Tick encoding of a fresh symbol or rewrite (compact mode)
+        self.received = 0
+        self.rows = 0
+
+class ForexBackfill:
+    """
+    Fetches only the missing tail of each symbol from CTrader and appends it.
+    """
+    def __init__(self, store: StorageEngine, client, library: str = "forex_1m", interval: str = "m1",
+                 start: datetime = DEFAULT_START, checkpoint: Optional[BackfillCheckpoint] = None,
+                 compact: bool = False):
+        self.store = store
+        self.client = client
+        self.library = library
+        self.interval = interval
+        _, self.bar, _ = trendbar_period(interval)
+        self.start = start
+        self.checkpoint = checkpoint or BackfillCheckpoint()
+        self.compact = compact
+        self._write_lock = threading.Lock()
+        self._buffer_lock = threading.Lock()
+        self._buffered = 0 # Rows held in all reorder buffers
+
+    def _key(self, symbol: str) -> str:
+        return f"{self.library}/{symbol}"
+
+    @staticmethod
+    def priority(symbol: str) -> int:
+        """Majors first, then everything else."""
+        return 0 if symbol in MAJORS else 1
+
+    def resume_point(self, symbol: str) -> datetime:
+        """Where fetching should restart: after the last stored bar or the checkpoint, whichever is later."""
+        return self._resume_point(symbol, self.store.last_timestamp(self.library, symbol))
+
+    def _resume_point(self, symbol: str, last: Optional[pd.Timestamp]) -> datetime:
+        resume = self.start
+        if last is not None:
+            resume = max(resume, (last + self.bar).to_pydatetime())
+        fetched_until = self.checkpoint.get(self._key(symbol))
+        if fetched_until is not None:
+            resume = max(resume, fetched_until)
+        return resume
+
+    def backfill_symbol(self, symbol: str, end: Optional[datetime] = None, full: bool = False) -> int:
+        """Fetches and stores the missing tail of one symbol. Returns rows written."""
+        return self.run([symbol], end=end, full=full).get(symbol, 0)
+
+    def run(self, symbols: list, end: Optional[datetime] = None, full: bool = False,
+            scheduler: Optional[BackfillScheduler] = None) -> dict:
+        """
+        Backfills all symbols through one scheduler, appending each symbol's rows
+        as soon as they are contiguous. Returns {symbol: rows_written}.
+        With `full`, history is refetched from `start` and staged; it replaces the
+        stored data as one new version only if every window succeeds.
+        """
+        end = end or datetime.now(timezone.utc)
+        scheduler = scheduler or BackfillScheduler(self.client)
+        streams = {}
+        written = {}
+
+        for symbol in sorted(symbols, key=self.priority):
+            try:
+                last = None if full else self.store.last_timestamp(self.library, symbol)
+                start = self.start if full else self._resume_point(symbol, last)
+            except Exception as e:
+                logger.error(f"Cannot determine resume point for {symbol}: {e}")
+                continue
+            if start >= end:
+                logger.info(f"{symbol} is up to date (resume point {start}).")
+                written[symbol] = 0
+                continue
+            if full:
+                self._discard_staged(symbol) # Leftovers of an interrupted rewrite must not be published
+            logger.info(f"Queueing {symbol} from {start} to {end}")
+            planner = scheduler.add_range(symbol, start, end, priority=self.priority(symbol),
+                                          interval=self.interval)
+            streams[symbol] = _SymbolStream(planner, last, overwrite=full)
+
+        def on_result(item, df):
+            stream = streams[item.symbol]
+            with stream.lock:
+                stream.received += 1
+                if df is None:
+                    # Nothing at or after a failed window is stored this run, so the
+                    # next run refetches from there instead of skipping over it.
+                    if stream.failed_at is None or item.start < stream.failed_at:
+                        logger.warning(f"   Window {item.start} failed for {item.symbol}; stopping here.")
+                        stream.failed_at = item.start
+                        scheduler.cancel(item.planner)
+                elif not df.empty:
+                    stream.pending.append(df)
+                    stream.pending_rows += len(df)
+                    self._buffer(len(df))
+                stream.frontier = max(stream.frontier, item.frontier)
+                # The scheduler has already planned any follow-ups of this item
+                final = item.planner.exhausted and stream.received == item.planner.issued
+                self._flush(item.symbol, stream, final)
+                if final and stream.staged:
+                    self._finish_rewrite(item.symbol, stream)
+                if final:
+                    if not stream.rows:
+                        logger.warning(f"   No new data found for {item.symbol}")
+                    written[item.symbol] = stream.rows
+
+        if streams:
+            scheduler.run(on_result)
+        return written
+
+    def _buffer(self, rows: int):
+        with self._buffer_lock:
+            self._buffered += rows
+
+    def _flush(self, symbol: str, stream: _SymbolStream, final: bool = False):
+        """
+        Appends buffered rows that lie before the fetch frontier, then advances the
+        checkpoint. Until `final`, small buffers are held back so ArcticDB does not
+        get one tiny segment per window, unless the buffers of all symbols together
+        exceed MAX_BUFFERED_ROWS. Caller holds `stream.lock`.
+        """
+        if not final and stream.pending_rows < FLUSH_ROWS and self._buffered < MAX_BUFFERED_ROWS:
+            return
+        limit = stream.end if final else stream.frontier
+        if stream.failed_at is not None:
+            limit = min(limit, stream.failed_at)
+
+        ready, keep = [], []
+        for df in stream.pending:
+            before = df.index < limit
+            if before.all():
+                ready.append(df)
+                continue
+            if before.any():
+                ready.append(df[before])
+            rest = df[~before]
+            if stream.failed_at is not None:
+                rest = rest[rest.index < stream.failed_at]
+            if not rest.empty:
+                keep.append(rest)
+        stream.pending = keep
+        held = sum(len(df) for df in keep)
+        self._buffer(held - stream.pending_rows)
+        stream.pending_rows = held
+
+        if ready:
+            df = pd.concat(ready)
+            df = df[~df.index.duplicated(keep='first')] # Dedup
+            df.sort_index(inplace=True)
+            if stream.last_written is not None:
+                df = df[df.index > stream.last_written] # Dedup against what this run stored
+            if not df.empty:
+                try:
+                    with self._write_lock:
+                        self._store(symbol, df, stream)
+                except Exception as e:
+                    logger.error(f"Failed to store {symbol}: {e}")
+                    stream.failed_at = df.index[0].to_pydatetime()
+                    self._buffer(-stream.pending_rows)
+                    stream.pending, stream.pending_rows = [], 0
+                    return
+
+        # A staged rewrite records its progress only once it is published
+        if limit > stream.start and not stream.staged:
+            self.checkpoint.set(self._key(symbol), limit)
+
+    def _store(self, symbol: str, df: pd.DataFrame, stream: _SymbolStream):
+        """Stages a rewrite, writes the first chunk of a fresh symbol, appends the rest."""
+        if self.compact and stream.digits is None and (stream.staged or stream.needs_write):
+            # Compact mode applies to fresh symbols and rewrites; appends inherit the stored encoding
+            stream.digits = self.client.symbol_digits(symbol)
+        if stream.staged:
+            logger.info(f"   >>> Staging {len(df)} rows of {symbol} (Last: {df.index[-1]})")
+            self.store.stage_frame(self.library, symbol, df, digits=stream.digits)
+        elif stream.needs_write:
+            logger.info(f"   >>> Writing {len(df)} rows to {symbol} (Last: {df.index[-1]})")
+            self.store.write_frame(self.library, symbol, df, digits=stream.digits, mode="write")
+            stream.needs_write = False
+        else:
+            # Live bars (BarStore) may already be stored past our tail
+            stored = self.store.last_timestamp(self.library, symbol)
+            if stored is not None and stored >= df.index[0]:
+                skipped = int((df.index <= stored).sum())
+                df = df[df.index > stored]
+                logger.info(f"   {symbol}: {skipped} rows already stored up to {stored}; skipping them")
+                if df.empty:
+                    stream.last_written = stored
+                    return
+            logger.info(f"   >>> Appending {len(df)} rows to {symbol} (Last: {df.index[-1]})")
+            self.store.write_frame(self.library, symbol, df, mode="append")
+        stream.last_written = df.index[-1]
+        stream.rows += len(df)
+
+    def _finish_rewrite(self, symbol: str, stream: _SymbolStream):
+        """
+        Publishes a staged rewrite if every window arrived, or discards it so the
+        previous version stays current. Bars appended meanwhile (live BarStore)
+        after the staged tail are carried over.
+        """
+        if stream.last_written is None:
+            return # Nothing was staged
+        if stream.failed_at is not None:
+            logger.warning(f"   Rewrite of {symbol} incomplete; keeping the stored version.")
+            self._discard_staged(symbol)
+            stream.rows = 0
+            return
+        try:
+            with self._write_lock:
+                if self.store.last_timestamp(self.library, symbol) is not None:
+                    tail = self.store.read_frame(self.library, symbol,
+                                                 date_range=(stream.last_written + self.bar, None))
+                    if not tail.empty:
+                        self.store.stage_frame(self.library, symbol, tail, digits=stream.digits)
+                self.store.finalize_staged(self.library, symbol, digits=stream.digits)
+        except Exception as e:
+            logger.error(f"Failed to publish the rewrite of {symbol}: {e}")
+            self._discard_staged(symbol)
+            stream.rows = 0
+            return
+        logger.info(f"   >>> Rewrote {symbol}: {stream.rows} rows")
+        self.checkpoint.set(self._key(symbol), stream.end)
+
+    def _discard_staged(self, symbol: str):
+        try:
+            self.store.delete_staged(self.library, symbol)
+        except Exception as e:
+            logger.error(f"Failed to discard staged rows of {symbol}: {e}")
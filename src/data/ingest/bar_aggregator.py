@@ -0,0 +1,260 @@
+"""
+Real-time 1-minute bars from live ticks.
+
+BarAggregator keeps one open bar per symbol (O(1) work per tick) and closes
+bars on minute boundaries: either when the first tick of a later minute
+arrives, or through a timer wheel for symbols that went quiet. LiveBarService
+publishes closed bars to `bar:1m:{symbol}` Redis streams and appends them to
+forex_1m, so bars are queryable seconds after the minute ends instead of after
+the next batch backfill.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import pandas as pd
+
+from src.data.store import StorageEngine
+from src.data.ingest.backfill import BackfillCheckpoint
+
+logger = logging.getLogger(__name__)
+
+BAR_SECONDS = 60
+CLOSE_GRACE = 2.0            # Seconds after a boundary before quiet bars are closed by the timer
+BAR_STREAM_MAXLEN = 10000    # Approximate cap on each bar:1m:{symbol} stream
+ARCTIC_FLUSH_SECONDS = 15.0  # Closed bars are appended to ArcticDB in batches this often
+MAX_GAP = timedelta(minutes=5)
+
+class BarAggregator:
+    """
+    Per-symbol OHLC + tick-count state fed from the spot callback.
+
+    Bars are keyed by the exchange timestamp when the tick carries one (as
+    trendbars are), else by receive time, and built from the bid like cTrader
+    trendbars. The first bar of each symbol (after start-up or `discard`) is
+    flagged partial: it started mid-minute. Ticks for a minute that has already been closed are counted
+    in `late` and dropped.
+    """
+    def __init__(self, bar_seconds: int = BAR_SECONDS, grace: float = CLOSE_GRACE):
+        self.bar_seconds = bar_seconds
+        self.grace = grace
+        self._bars = {}          # symbol -> [start, open, high, low, close, ticks, partial]
+        self._seen = set()       # Symbols streaming since their first (partial) bar
+        self._wheel = {}         # bar end (epoch s) -> symbols whose bar closes then
+        self._cursor = None      # Next wheel slot to expire
+        self._closed = deque()
+        self._lock = threading.Lock()
+        self.late = 0
+
+    def on_tick(self, symbol: str, bid: float, ask: Optional[float], ts: datetime,
+                exchange_ts_ms: Optional[int] = None):
+        if bid is None:
+            return
+        seconds = exchange_ts_ms / 1000 if exchange_ts_ms else ts.timestamp()
+        start = int(seconds // self.bar_seconds) * self.bar_seconds
+        with self._lock:
+            bar = self._bars.get(symbol)
+            if bar is not None and start == bar[0]:
+                if bid > bar[2]:
+                    bar[2] = bid
+                elif bid < bar[3]:
+                    bar[3] = bid
+                bar[4] = bid
+                bar[5] += 1
+                return
+            if bar is not None and start < bar[0]:
+                self.late += 1
+                return
+            if bar is not None:
+                self._close(symbol, bar)
+            # A quiet minute closes the bar but the symbol keeps streaming: only
+            # the first bar can have missed the start of its minute
+            partial = symbol not in self._seen
+            self._seen.add(symbol)
+            self._bars[symbol] = [start, bid, bid, bid, bid, 1, partial]
+            end = start + self.bar_seconds
+            self._wheel.setdefault(end, set()).add(symbol)
+            if self._cursor is None or end < self._cursor:
+                self._cursor = end
+
+    def on_ticks(self, ticks: list):
+        """Batched spot callback shape: [(symbol, bid, ask, ts, exchange_ts_ms), ...]."""
+        for tick in ticks:
+            self.on_tick(*tick)
+
+    def advance(self, now: Optional[float] = None):
+        """Closes every bar whose minute ended more than `grace` seconds ago."""
+        now = time.time() if now is None else now
+        with self._lock:
+            while self._cursor is not None and self._cursor + self.grace <= now:
+                for symbol in self._wheel.pop(self._cursor, ()):
+                    bar = self._bars.get(symbol)
+                    # Bars already closed by a newer tick are stale wheel entries
+                    if bar is not None and bar[0] + self.bar_seconds == self._cursor:
+                        self._close(symbol, bar)
+                        del self._bars[symbol]
+                self._cursor = min(self._wheel) if self._wheel else None
+
+    def discard(self, symbols):
+        """Drops the open bars of symbols that stopped streaming here (they would close incomplete)."""
+        with self._lock:
+            for symbol in symbols:
+                self._bars.pop(symbol, None)
+                self._seen.discard(symbol)
+
+    def drain(self) -> list:
+        """Returns and clears closed bars as (symbol, start, open, high, low, close, ticks, partial)."""
+        bars = []
+        while self._closed:
+            bars.append(self._closed.popleft())
+        return bars
+
+    def _close(self, symbol: str, bar: list):
+        self._closed.append((symbol, *bar))
+
+class BarStore:
+    """
+    Appends live bars to forex_1m in batches.
+
+    forex_1m is shared with the trendbar backfill, which resumes after the last
+    stored bar. Live bars are therefore only appended when they continue what is
+    already covered (stored bars or the backfill checkpoint): coverage must reach
+    the end of the symbol's first, partial live bar, and later bars may follow it
+    by at most `max_gap` (quiet minutes have no bar). Otherwise they are held back
+    so a backfill run can fill the hole first.
+    """
+    def __init__(self, store: StorageEngine, library: str = "forex_1m",
+                 checkpoint: Optional[BackfillCheckpoint] = None, max_gap: timedelta = MAX_GAP):
+        self.store = store
+        self.library = library
+        self.checkpoint = checkpoint or BackfillCheckpoint()
+        self.max_gap = max_gap
+        self.bar = timedelta(seconds=BAR_SECONDS)
+        self._pending = {}   # symbol -> [bar rows]
+        self._covered = {}   # symbol -> everything before this is stored
+        self._live_from = {} # symbol -> end of the first (partial) live bar
+        self._waiting = set()
+        self.appended = 0
+        self.held_back = 0
+
+    def add(self, bars: list):
+        for symbol, start, o, h, l, c, ticks, partial in bars:
+            if partial:
+                # Started mid-minute; only the backfill has the full bar
+                self._live_from[symbol] = datetime.fromtimestamp(start + BAR_SECONDS, timezone.utc)
+                continue
+            self._pending.setdefault(symbol, []).append((start, o, h, l, c, ticks))
+
+    def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        self.checkpoint.load() # The backfill runs in another process
+        for symbol, rows in pending.items():
+            try:
+                self._append(symbol, rows)
+            except Exception as e:
+                logger.error(f"Failed to append live bars for {symbol}: {e}")
+
+    def _coverage(self, symbol: str) -> Optional[datetime]:
+        covered = self._covered.get(symbol)
+        if covered is None:
+            last = self.store.last_timestamp(self.library, symbol)
+            covered = (last + self.bar).to_pydatetime() if last is not None else None
+        fetched_until = self.checkpoint.get(f"{self.library}/{symbol}")
+        if fetched_until is not None and (covered is None or fetched_until > covered):
+            covered = fetched_until
+        return covered
+
+    def _append(self, symbol: str, rows: list):
+        df = pd.DataFrame(rows, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s', utc=True)
+        df = df.set_index('timestamp').sort_index()
+
+        covered = self._coverage(symbol)
+        live_from = self._live_from.get(symbol)
+        if covered is None or (live_from and covered < live_from):
+            self._hold_back(symbol, df, covered)
+            return
+        df = df[df.index >= covered]
+        if df.empty:
+            return
+        if df.index[0].to_pydatetime() - covered > self.max_gap:
+            self._covered.pop(symbol, None)
+            self._hold_back(symbol, df, covered)
+            return
+
+        self._waiting.discard(symbol)
+        self.store.write_frame(self.library, symbol, df, mode="append")
+        self._covered[symbol] = df.index[-1].to_pydatetime() + self.bar
+        self.appended += len(df)
+
+    def _hold_back(self, symbol: str, df: pd.DataFrame, covered: Optional[datetime]):
+        self.held_back += len(df)
+        if symbol not in self._waiting:
+            self._waiting.add(symbol)
+            logger.warning(f"{self.library}/{symbol} is covered up to {covered}, live bars start at "
+                           f"{df.index[0]}; holding them back until a backfill closes the gap.")
+
+class LiveBarService:
+    """
+    Drives a BarAggregator from its own thread: expires the timer wheel once a
+    second, publishes closed bars to Redis and appends them to ArcticDB.
+    Nothing here runs on the reactor thread.
+    """
+    def __init__(self, aggregator: BarAggregator, redis_client=None, bar_store: Optional[BarStore] = None,
+                 key_prefix: str = "bar:1m:", flush_interval: float = ARCTIC_FLUSH_SECONDS):
+        self.aggregator = aggregator
+        self._redis = redis_client
+        self.bar_store = bar_store
+        self.key_prefix = key_prefix
+        self.flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.published = 0
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="live-bars", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while not self._stop.wait(1.0):
+            self.aggregator.advance()
+            bars = self.aggregator.drain()
+            if bars:
+                self._publish(bars)
+                if self.bar_store:
+                    self.bar_store.add(bars)
+            if self.bar_store and time.monotonic() - last_flush >= self.flush_interval:
+                self.bar_store.flush()
+                last_flush = time.monotonic()
+        if self.bar_store:
+            self.bar_store.flush()
+
+    def _publish(self, bars: list):
+        if not self._redis:
+            return
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for symbol, start, o, h, l, c, ticks, partial in bars:
+                entry = {
+                    "timestamp": datetime.fromtimestamp(start, timezone.utc).isoformat(),
+                    "open": str(o), "high": str(h), "low": str(l), "close": str(c),
+                    "volume": str(ticks), "partial": "1" if partial else "0",
+                }
+                pipe.xadd(f"{self.key_prefix}{symbol}", entry, maxlen=BAR_STREAM_MAXLEN, approximate=True)
+            pipe.execute()
+            self.published += len(bars)
+        except Exception as e:
+            logger.error(f"Failed to publish {len(bars)} live bars: {e}")
@@ -0,0 +1,184 @@
+"""
+Paginated crypto OHLCV backfill into ArcticDB (`crypto_1m`).
+
+Each symbol resumes after its last stored bar and walks forward with `since`
+cursors, one `fetch_ohlcv` page at a time, until it reaches the end date. Many
+symbols run concurrently on one asyncio loop (ccxt's async_support client);
+request starts are paced across all symbols by the exchange's `rateLimit`.
+Pages are buffered per symbol and written to ArcticDB in chunks off the event
+loop, so memory stays bounded by FLUSH_ROWS per symbol in flight.
+
+Any object with an async `fetch_ohlcv(symbol, timeframe, since, limit)` and a
+`rateLimit` (ms) can stand in for the exchange, e.g. a local stub in tests.
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timezone
+from typing import Optional
+import pandas as pd
+
+try:
+    import ccxt.async_support as ccxt_async
+except ImportError:
+    ccxt_async = None
+
+from src.data.store import StorageEngine
+from src.data.ingest.live_crypto import stream_symbol
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+PAGE_LIMIT = 1000           # Bars per fetch_ohlcv page (Binance maximum)
+CONCURRENCY = 8             # Symbols paginated at the same time
+FLUSH_ROWS = 50000          # Rows buffered per symbol before a write
+MAX_RETRIES = 5
+RETRY_BACKOFF = 1.0         # Seconds before the first retry of a failed page, doubling
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+def timeframe_ms(timeframe: str) -> int:
+    """'1m' -> 60000, '4h' -> 14400000, ..."""
+    return int(timeframe[:-1]) * _UNITS[timeframe[-1]] * 1000
+
+def _to_ms(ts) -> int:
+    return int(pd.Timestamp(ts).timestamp() * 1000)
+
+class _Pacer:
+    """Spaces request starts `interval` seconds apart across every task on the loop."""
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next = 0.0
+
+    async def wait(self):
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+class CryptoBackfill:
+    """
+    Incremental OHLCV backfill of many symbols into one ArcticDB library.
+    Stored symbols are the stream names used live ('BTC/USDT' -> 'BTCUSDT').
+    """
+    def __init__(self, store: StorageEngine, exchange=None, exchange_id: str = "binance",
+                 library: str = "crypto_1m", timeframe: str = "1m", start: datetime = DEFAULT_START,
+                 page_limit: int = PAGE_LIMIT, concurrency: int = CONCURRENCY, flush_rows: int = FLUSH_ROWS):
+        self.store = store
+        self.exchange = exchange
+        self.exchange_id = exchange_id
+        self.library = library
+        self.timeframe = timeframe
+        self.bar_ms = timeframe_ms(timeframe)
+        self.start = start
+        self.page_limit = page_limit
+        self.concurrency = concurrency
+        self.flush_rows = flush_rows
+        self.requests = 0
+
+    def resume_point(self, symbol: str) -> int:
+        """First bar (ms) still missing: one bar after the last stored one, or the default start."""
+        return self._resume_point(self._last_stored(stream_symbol(symbol)))
+
+    def _last_stored(self, name: str) -> Optional[pd.Timestamp]:
+        return self.store.last_timestamp(self.library, name) if self._has_library() else None
+
+    def _resume_point(self, last: Optional[pd.Timestamp]) -> int:
+        resume = _to_ms(self.start)
+        if last is not None:
+            resume = max(resume, _to_ms(last) + self.bar_ms)
+        return resume
+
+    def _has_library(self) -> bool:
+        try:
+            self.store.get_library(self.library)
+            return True
+        except ValueError:
+            return False
+
+    async def run(self, symbols: list, end: Optional[datetime] = None) -> dict:
+        """Backfills every symbol up to `end` (default: now). Returns {symbol: rows written}."""
+        owned = self.exchange is None
+        if owned:
+            if ccxt_async is None:
+                logger.error("ccxt library not installed")
+                return {}
+            # Requests are paced here, across all symbols
+            self.exchange = getattr(ccxt_async, self.exchange_id)({"enableRateLimit": False})
+        end_ms = _to_ms(end or datetime.now(timezone.utc))
+        pacer = _Pacer(getattr(self.exchange, "rateLimit", 0) / 1000)
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def one(symbol):
+            async with slots:
+                try:
+                    return await self.backfill_symbol(symbol, end_ms, pacer)
+                except Exception as e:
+                    logger.error(f"Backfill of {symbol} aborted: {e}")
+                    return 0
+
+        try:
+            written = await asyncio.gather(*(one(s) for s in symbols))
+        finally:
+            if owned:
+                await self.exchange.close()
+                self.exchange = None
+        return dict(zip(symbols, written))
+
+    async def backfill_symbol(self, symbol: str, end_ms: int, pacer: Optional[_Pacer] = None) -> int:
+        """Paginates one symbol from its resume point to `end_ms`, writing as it goes. Returns rows written."""
+        pacer = pacer or _Pacer(getattr(self.exchange, "rateLimit", 0) / 1000)
+        name = stream_symbol(symbol)
+        last_stored = await asyncio.to_thread(self._last_stored, name)
+        since = self._resume_point(last_stored)
+        fresh = last_stored is None
+        buffer, buffered, written = [], 0, 0
+
+        while since < end_ms:
+            page = await self._fetch_page(symbol, since, pacer)
+            if not page:
+                break
+            # Closed candles only: one still forming at end_ms would be stored for good
+            rows = [row for row in page if since <= row[0] and row[0] + self.bar_ms <= end_ms]
+            if rows:
+                buffer.append(rows)
+                buffered += len(rows)
+            last = page[-1][0]
+            if last < since:
+                break # No progress; the exchange ignored `since`
+            since = last + self.bar_ms
+            if buffered >= self.flush_rows:
+                written += await asyncio.to_thread(self._write, name, buffer, fresh and not written)
+                buffer, buffered = [], 0
+
+        if buffer:
+            written += await asyncio.to_thread(self._write, name, buffer, fresh and not written)
+        logger.info(f"{symbol}: {written} bars written to {self.library}/{name}")
+        return written
+
+    async def _fetch_page(self, symbol: str, since: int, pacer: _Pacer) -> list:
+        backoff = RETRY_BACKOFF
+        for attempt in range(MAX_RETRIES):
+            await pacer.wait()
+            self.requests += 1
+            try:
+                return await self.exchange.fetch_ohlcv(symbol, self.timeframe, since, self.page_limit)
+            except Exception as e:
+                if attempt == MAX_RETRIES - 1:
+                    raise
+                logger.warning(f"{symbol}: page at {since} failed ({e}); retry {attempt + 1}/{MAX_RETRIES - 1}")
+                await asyncio.sleep(backoff * (1 + random.random() / 2))
+                backoff *= 2
+        return []
+
+    def _write(self, name: str, pages: list, first: bool) -> int:
+        df = pd.DataFrame([row[:6] for page in pages for row in page],
+                          columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True)
+        df = df.drop_duplicates('timestamp').set_index('timestamp').sort_index()
+        # A fresh symbol starts a new version; everything after that is appended
+        mode = "write" if first else "append"
+        logger.info(f"   >>> {mode.title()} {len(df)} rows to {name} (Last: {df.index[-1]})")
+        self.store.write_frame(self.library, name, df, mode=mode)
+        return len(df)
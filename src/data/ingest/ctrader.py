@@ -1,10 +1,15 @@
 
 import logging
+import asyncio
+import itertools
 import threading
 import time
+from collections import deque
+import numpy as np
 import pandas as pd
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from twisted.internet import reactor
+from twisted.application.internet import ClientService
 from concurrent.futures import Future
 
 # Try importing the library; if missing, we fail gracefully or mock
@@ -15,13 +20,118 @@ from ctrader_open_api.messages.OpenApiMessages_pb2 import (
     ProtoOAApplicationAuthReq, ProtoOAAccountAuthReq, ProtoOAGetTrendbarsReq, ProtoOAGetTrendbarsRes,
     ProtoOAGetAccountListByAccessTokenReq, ProtoOAGetAccountListByAccessTokenRes,
     ProtoOASymbolsListReq, ProtoOASymbolsListRes,
-    ProtoOASubscribeSpotsReq, ProtoOASubscribeSpotsRes, ProtoOASpotEvent
+    ProtoOASubscribeSpotsReq, ProtoOASubscribeSpotsRes, ProtoOASpotEvent,
+    ProtoOAUnsubscribeSpotsReq,
+    ProtoOASymbolByIdReq, ProtoOASymbolByIdRes, ProtoOAErrorRes,
+    ProtoOAVersionReq, ProtoOAVersionRes,
+    ProtoOAAccountDisconnectEvent, ProtoOAAccountsTokenInvalidatedEvent
 )
 
+from src.data.ingest.symbol_catalog import SymbolCatalog, SYMBOL_MAP
+from src.data.ingest.payload_archive import get_payload_archive
+
 logger = logging.getLogger(__name__)
 
+REQUEST_TIMEOUT = 30  # Seconds to wait for a single tagged response
+MAX_IN_FLIGHT = 32    # Outstanding requests allowed on one session
+
+# interval -> (ProtoOATrendbarPeriod, bar duration, max fromTimestamp..toTimestamp span per request)
+TRENDBAR_PERIODS = {
+    'm1': (ProtoOATrendbarPeriod.M1, timedelta(minutes=1), timedelta(weeks=5)),
+    'm2': (ProtoOATrendbarPeriod.M2, timedelta(minutes=2), timedelta(weeks=5)),
+    'm3': (ProtoOATrendbarPeriod.M3, timedelta(minutes=3), timedelta(weeks=5)),
+    'm4': (ProtoOATrendbarPeriod.M4, timedelta(minutes=4), timedelta(weeks=5)),
+    'm5': (ProtoOATrendbarPeriod.M5, timedelta(minutes=5), timedelta(weeks=5)),
+    'm10': (ProtoOATrendbarPeriod.M10, timedelta(minutes=10), timedelta(weeks=35)),
+    'm15': (ProtoOATrendbarPeriod.M15, timedelta(minutes=15), timedelta(weeks=35)),
+    'm30': (ProtoOATrendbarPeriod.M30, timedelta(minutes=30), timedelta(weeks=35)),
+    'h1': (ProtoOATrendbarPeriod.H1, timedelta(hours=1), timedelta(weeks=35)),
+    'h4': (ProtoOATrendbarPeriod.H4, timedelta(hours=4), timedelta(days=366)),
+    'h12': (ProtoOATrendbarPeriod.H12, timedelta(hours=12), timedelta(days=366)),
+    'd1': (ProtoOATrendbarPeriod.D1, timedelta(days=1), timedelta(days=366)),
+    'w1': (ProtoOATrendbarPeriod.W1, timedelta(weeks=1), timedelta(days=5 * 366)),
+    'mn1': (ProtoOATrendbarPeriod.MN1, timedelta(days=31), timedelta(days=5 * 366)),
+}
+# Bars returned by one trendbar response; a response this large may be truncated
+TRENDBAR_CAP = 5000
+_PERIOD_NAMES = {period: name for name, (period, _, _) in TRENDBAR_PERIODS.items()}
+
+def trendbar_period(interval: str) -> tuple:
+    """Returns (ProtoOATrendbarPeriod, bar duration, max request span) for an interval like 'm1' or 'h4'."""
+    try:
+        return TRENDBAR_PERIODS[interval.lower()]
+    except KeyError:
+        raise ValueError(f"Unsupported trendbar interval: {interval}")
+
+class CTraderAPIError(Exception):
+    """A PROTO_OA_ERROR_RES returned for a request."""
+    def __init__(self, error_code: str, description: str = ""):
+        super().__init__(f"API Error: {error_code} {description}".strip())
+        self.error_code = error_code
+        self.description = description
+
+# Trendbar/spot prices arrive as integers in 1/100000 of a unit for every symbol.
+# The symbol's `digits` (from ProtoOASymbolByIdReq) give its real tick size.
+PRICE_DIVIDER = 100000.0
+
+def decode_trendbars(trendbars, divider: float = PRICE_DIVIDER, digits: int = None) -> pd.DataFrame:
+    """
+    Decodes a sequence of ProtoOATrendbar into an OHLCV frame with a UTC DatetimeIndex.
+
+    ProtoOATrendbar is delta encoded against the bar low:
+        low (absolute), deltaOpen, deltaClose, deltaHigh (from low),
+        volume, utcTimestampInMinutes.
+    Fields are copied once into preallocated int64 arrays; scaling and the
+    index are then whole-array operations, so no per-bar Python objects remain.
+    With `digits`, prices are rounded to the symbol's tick size.
+    """
+    n = len(trendbars)
+    if n == 0:
+        return pd.DataFrame()
+
+    low = np.empty(n, dtype=np.int64)
+    delta_open = np.empty(n, dtype=np.int64)
+    delta_close = np.empty(n, dtype=np.int64)
+    delta_high = np.empty(n, dtype=np.int64)
+    volume = np.empty(n, dtype=np.int64)
+    minutes = np.empty(n, dtype=np.int64)
+
+    for i, bar in enumerate(trendbars):
+        low[i] = bar.low
+        delta_open[i] = bar.deltaOpen
+        delta_close[i] = bar.deltaClose
+        delta_high[i] = bar.deltaHigh
+        volume[i] = bar.volume
+        minutes[i] = bar.utcTimestampInMinutes
+
+    index = pd.to_datetime(minutes, unit='m', utc=True).rename('timestamp')
+    df = pd.DataFrame({
+        'open': (low + delta_open) / divider,
+        'high': (low + delta_high) / divider,
+        'low': low / divider,
+        'close': (low + delta_close) / divider,
+        'volume': volume,
+    }, index=index)
+    if digits is not None:
+        df[['open', 'high', 'low', 'close']] = df[['open', 'high', 'low', 'close']].round(digits)
+    return df
+
+
+class SessionProtocol(TcpProtocol):
+    """
+    TcpProtocol with a per-connection send queue. The library keeps `_send_queue`
+    on the class, so with several sessions every socket would drain the same
+    queue and messages could leave on the wrong connection.
+    """
+    def connectionMade(self):
+        self._send_queue = deque()
+        self._send_task = None
+        super().connectionMade()
+
+
 class CTraderClient:
-    def __init__(self, client_id, client_secret, access_token, account_id):
+    def __init__(self, client_id, client_secret, access_token, account_id, max_in_flight: int = MAX_IN_FLIGHT,
+                 catalog: SymbolCatalog = None):
         self.client_id = client_id
         self.client_secret = client_secret
         self.access_token = access_token
@@ -35,22 +145,93 @@ class CTraderClient:
         self._reactor_thread = None
         self._client = None
         self._connected_future = Future()
-        self._pending_future = None
-        self._pending_context = None 
+        self._connect_lock = threading.Lock()
+        self._connecting = None # Future of the current/last connection attempt
+        self._authenticated = False
         self._spot_callback = None
+        self._spot_batch = False
+        self._spot_buffer = []
+        self._spot_meta = {}    # symbolId -> [name, digits, quote]; rebuilt lazily after catalog changes
+        self._spot_quotes = {}  # symbolId -> [last bid, last ask]
+        self.latency = None     # Optional LatencyRecorder for the spot path
+        self.archive = get_payload_archive() # Raw trendbar responses are kept here for replays
+
+        # Request correlation: every outbound request carries its own clientMsgId,
+        # responses are routed back through this map (clientMsgId -> (Future, context)).
+        # Only touched from the reactor thread.
+        self._inflight = {}
+        self._msg_ids = itertools.count(1)
+        self.max_in_flight = max_in_flight
+        self._inflight_slots = threading.BoundedSemaphore(max_in_flight)
+
+        # Symbol name <-> id comes from the on-disk catalog, so requests can resolve
+        # symbols before (and without) a SymbolsList round trip. If the catalog is
+        # empty, requests wait here until the first list arrives.
+        self._catalog = catalog or SymbolCatalog()
+        if catalog is None:
+            self._catalog.load()
+        self._symbol_waiters = []
+        self._symbols_pending = False
+        self._details_pending = set()
+
+        # payloadType -> handler; spot events are the hot path
+        self._handlers = {
+            ProtoOAPayloadType.PROTO_OA_SPOT_EVENT: self._on_spot_event,
+            ProtoOAPayloadType.PROTO_OA_GET_TRENDBARS_RES: self._on_trendbars,
+            ProtoOAPayloadType.PROTO_OA_SUBSCRIBE_SPOTS_RES: self._on_subscribe_res,
+            ProtoOAPayloadType.PROTO_OA_UNSUBSCRIBE_SPOTS_RES: self._on_subscribe_res,
+            ProtoOAPayloadType.PROTO_OA_SYMBOLS_LIST_RES: self._on_symbols_list,
+            ProtoOAPayloadType.PROTO_OA_SYMBOL_BY_ID_RES: self._on_symbol_details,
+            ProtoOAPayloadType.PROTO_OA_VERSION_RES: self._on_version_res,
+            ProtoOAPayloadType.PROTO_OA_APPLICATION_AUTH_RES: self._on_app_auth,
+            ProtoOAPayloadType.PROTO_OA_ACCOUNT_AUTH_RES: self._on_account_auth,
+            ProtoOAPayloadType.PROTO_OA_ERROR_RES: self._on_error,
+            ProtoOAPayloadType.PROTO_OA_ACCOUNT_DISCONNECT_EVENT: self._on_account_disconnect,
+            ProtoOAPayloadType.PROTO_OA_ACCOUNTS_TOKEN_INVALIDATED_EVENT: self._on_token_invalidated,
+        }
         
         self._start_reactor()
 
-    def set_spot_callback(self, callback):
-        """Sets a callback function(symbol_id, bid, ask) for live spots."""
+    def set_spot_callback(self, callback, batch: bool = False):
+        """
+        Sets the live spot callback, called on the reactor thread.
+        Without `batch` it is called as callback(symbol, bid, ask, ts, exchange_ts_ms) per tick;
+        with `batch` as callback([(symbol, bid, ask, ts, exchange_ts_ms), ...]) once per
+        reactor turn. `ts` is the receive time, `exchange_ts_ms` the server timestamp (or None).
+        """
         self._spot_callback = callback
+        self._spot_batch = batch
+
+    def set_payload_archive(self, archive):
+        """Archives every raw trendbar response to `archive` (a PayloadArchive); None turns it off."""
+        self.archive = archive
+
+    def set_latency_recorder(self, recorder):
+        """
+        Records per-tick latencies into `recorder` (src.utils.latency.LatencyRecorder):
+        network (server timestamp -> receive, subject to clock skew), parse and
+        callback (until the spot callback has returned), all measured from the
+        receive time that is also the tick's `ts`.
+        """
+        self.latency = recorder
 
-    def subscribe(self, symbols: list):
-        """Subscribes to live spots for the given list of symbols (names)."""
+    def subscribe(self, symbols: list) -> Future:
+        """
+        Subscribes to live spots for the given list of symbols (names).
+        Returns a Future resolved once the subscription is acknowledged.
+        """
         if not self._client:
             self.connect()
-        
-        reactor.callFromThread(self._send_subscribe_req, symbols)
+
+        future = Future()
+        reactor.callFromThread(self._send_subscribe_req, symbols, future)
+        return future
+
+    def unsubscribe(self, symbols: list) -> Future:
+        """Stops live spots for the given symbols. Returns a Future resolved on acknowledgement."""
+        future = Future()
+        reactor.callFromThread(self._send_subscribe_req, symbols, future, ProtoOAUnsubscribeSpotsReq)
+        return future
 
     def _start_reactor(self):
         """Starts the Twisted reactor in a separate thread if not running."""
@@ -65,29 +246,70 @@ class CTraderClient:
 
     def connect(self):
         """Connects and Authenticates. Blocks until success."""
-        if self._client: 
-            return # Already connected
-
-        logger.info("Connecting to CTrader...")
-        future = Future()
-        reactor.callFromThread(self._do_connect, future)
+        future = self.connect_async()
         try:
             future.result(timeout=10)
-            self._connected_future.set_result(True)
         except Exception as e:
             logger.error(f"Connection failed: {e}")
             raise
 
+    def connect_async(self) -> Future:
+        """
+        Starts connecting unless a session is up or an attempt is in progress.
+        A connection whose account was deauthorized is re-authenticated in place.
+        Returns a Future resolved once the account is authenticated.
+        """
+        with self._connect_lock:
+            current = self._connecting
+            if current is not None and not current.done():
+                return current # Connecting
+            if current is not None and current.exception() is None and self.is_connected:
+                return current # Connected and authenticated
+
+            future = Future()
+            future.add_done_callback(self._on_connect_done)
+            self._connecting = future
+            if self._client is not None:
+                logger.info("Re-authenticating CTrader account...")
+                reactor.callFromThread(self._do_reauth, future)
+            else:
+                logger.info("Connecting to CTrader...")
+                reactor.callFromThread(self._do_connect, future)
+            return future
+
+    def _on_connect_done(self, future: Future):
+        if future.exception() is None and not self._connected_future.done():
+            self._connected_future.set_result(True)
+
     def disconnect(self):
         if self._client:
             reactor.callFromThread(self._client.stopService)
 
+    @property
+    def is_connected(self) -> bool:
+        """True while the session is up and the account is authenticated."""
+        return self._client is not None and self._authenticated
+
+    @property
+    def in_flight(self) -> int:
+        """Tagged requests awaiting a response (a load measure for session pools)."""
+        return len(self._inflight)
+
+    def ping(self) -> Future:
+        """Sends a ProtoOAVersionReq as a liveness probe. The Future resolves with the server version."""
+        future = Future()
+        if not self.is_connected:
+            future.set_exception(ConnectionError("CTrader not connected"))
+            return future
+        reactor.callFromThread(self._send_request, ProtoOAVersionReq(), future, "PING")
+        return future
+
     def _do_connect(self, future: Future):
         try:
             import os
             host = os.getenv("CTRADER_HOST", "live.ctraderapi.com")
             port = int(os.getenv("CTRADER_PORT", 5035))
-            self._client = Client(host, port, TcpProtocol)
+            self._client = Client(host, port, SessionProtocol)
             client = self._client
             
             def on_connected(client):
@@ -106,44 +328,114 @@ class CTraderClient:
         except Exception as e:
             future.set_exception(e)
 
-    def _on_message(self, client, message):
-        # Auth Handling
-        if message.payloadType == ProtoOAPayloadType.PROTO_OA_APPLICATION_AUTH_RES:
-            req = ProtoOAAccountAuthReq()
-            req.ctidTraderAccountId = self.account_id
-            req.accessToken = self.access_token
-            client.send(req)
-            
-        elif message.payloadType == ProtoOAPayloadType.PROTO_OA_ACCOUNT_AUTH_RES:
-            logger.info("CTrader Auth Success.")
-            if hasattr(self, '_connect_future') and not self._connect_future.done():
-                self._connect_future.set_result(True)
-                
-    def _send_subscribe_req(self, symbols: list):
+    def _do_reauth(self, future: Future):
+        if self._client is None:
+            self._do_connect(future) # Dropped meanwhile
+            return
+        self._connect_future = future
+        self._on_app_auth(self._client, None) # Application auth survives; only the account is redone
+
+    def _drop_client(self):
+        """Tears down the current connection (e.g. after failed auth) so the next connect redials."""
+        client, self._client = self._client, None
+        self._authenticated = False
+        if client is not None and client.running:
+            ClientService.stopService(client)
+
+    def _send_request(self, req, future: Future, context=None):
+        """
+        Sends a request tagged with its own clientMsgId and registers its future.
+        The response (or error) is routed back by `_on_message`. Reactor thread only.
+        """
+        msg_id = str(next(self._msg_ids))
+        self._inflight[msg_id] = (future, context)
+        try:
+            deferred = self._client.send(req, clientMsgId=msg_id, responseTimeoutInSeconds=REQUEST_TIMEOUT)
+            deferred.addErrback(self._on_request_failure, msg_id)
+        except Exception as e:
+            logger.error(f"Send Failed: {e}")
+            self._fail_request(msg_id, e)
+
+    def _on_request_failure(self, failure, msg_id: str):
+        """Errback for the library deferred (timeouts, connection loss)."""
+        self._fail_request(msg_id, failure.value)
+        return None # Handled, do not propagate as unhandled Deferred error
+
+    def _pop_request(self, message):
+        """Returns (future, context) for a tagged response, or (None, None) if untracked."""
+        msg_id = message.clientMsgId if message.HasField('clientMsgId') else None
+        if msg_id is None:
+            return None, None
+        return self._inflight.pop(msg_id, (None, None))
+
+    def _fail_request(self, msg_id: str, exc: Exception):
+        future, context = self._inflight.pop(msg_id, (None, None))
+        if future and not future.done():
+            future.set_exception(exc)
+        if context == "SYMBOLS":
+            self._symbols_pending = False
+            self._fail_symbol_waiters(exc)
+        elif isinstance(context, tuple) and context[0] == "DETAILS":
+            self._details_pending.difference_update(context[1])
+
+    def _request_symbols(self, future, resume):
+        """
+        Queues `resume` until the symbol list is loaded. Only the first waiter
+        triggers the SymbolsList request; `future` (if any) fails with it.
+        """
+        self._symbol_waiters.append((future, resume))
+        if self._symbols_pending:
+            return # Already requested
+
+        logger.info("Symbol catalog empty. Requesting Symbol List first...")
+        self._refresh_symbols(Future())
+
+    def _refresh_symbols(self, future: Future):
+        """Sends a SymbolsList request; the response updates and persists the catalog."""
+        self._symbols_pending = True
+        req = ProtoOASymbolsListReq()
+        req.ctidTraderAccountId = self.account_id
+        req.includeArchivedSymbols = False
+        self._send_request(req, future, "SYMBOLS")
+
+    def _ensure_details(self, symbol_ids: list, future: Future = None):
+        """
+        Requests ProtoOASymbolByIdReq details (digits, pipPosition) for ids the
+        catalog does not know yet. Results are cached in the catalog and persisted.
+        """
+        # An explicit waiter re-requests ids already in flight rather than racing them
+        missing = [sid for sid in symbol_ids
+                   if 'digits' not in self._catalog.details(sid)
+                   and (future is not None or sid not in self._details_pending)]
+        if not missing:
+            if future and not future.done():
+                future.set_result({})
+            return
+        self._details_pending.update(missing)
+        req = ProtoOASymbolByIdReq()
+        req.ctidTraderAccountId = self.account_id
+        req.symbolId.extend(missing)
+        self._send_request(req, future or Future(), ("DETAILS", missing))
+
+    def _price_digits(self, symbol_id: int):
+        return self._catalog.details(symbol_id).get('digits')
+
+    def _fail_symbol_waiters(self, exc: Exception):
+        waiters, self._symbol_waiters = self._symbol_waiters, []
+        for future, _ in waiters:
+            if future and not future.done():
+                future.set_exception(exc)
+
+    def _send_subscribe_req(self, symbols: list, future: Future = None, request=ProtoOASubscribeSpotsReq):
+        future = future or Future()
         # Resolve all symbols to IDs
-        if not hasattr(self, '_symbol_cache'):
-            logger.info("Symbol cache missing. Requesting Symbol List first...")
-            self._pending_context = ("SUBSCRIBE", symbols)
-            req = ProtoOASymbolsListReq()
-            req.ctidTraderAccountId = self.account_id
-            req.includeArchivedSymbols = False
-            self._client.send(req)
+        if not len(self._catalog):
+            self._request_symbols(future, lambda: self._send_subscribe_req(symbols, future, request))
             return
 
         symbol_ids = []
-        # Mapping logic
-        SYMBOL_MAP = {
-            "WTIUSD": "XTIUSD",
-            "BCOUSD": "XBRUSD",
-            "ETXEUR": "STOXX50",
-            "UKXGBP": "UK100",
-            "NSXUSD": "USTEC",
-            "JPXJPY": "JP225",
-        }
-
         for sym in symbols:
-            ctrader_sym = SYMBOL_MAP.get(sym, sym)
-            sid = self._symbol_cache.get(ctrader_sym)
+            sid = self._catalog.resolve(sym)
             if sid:
                 symbol_ids.append(sid)
             else:
@@ -151,299 +443,488 @@ class CTraderClient:
         
         if not symbol_ids:
             logger.warning("No valid symbols to subscribe.")
+            future.set_result(False)
             return
 
-        logger.info(f"Subscribing to {len(symbol_ids)} symbols: {symbols}")
-        req = ProtoOASubscribeSpotsReq()
+        subscribe = request is ProtoOASubscribeSpotsReq
+        logger.info(f"{'Subscribing to' if subscribe else 'Unsubscribing from'} {len(symbol_ids)} symbols: {symbols}")
+        req = request()
         req.ctidTraderAccountId = self.account_id
         req.symbolId.extend(symbol_ids)
-        self._client.send(req)
+        self._send_request(req, future, ("SUBSCRIBE" if subscribe else "UNSUBSCRIBE", symbols))
 
     def _on_message(self, client, message):
-        # Auth Handling
-        if message.payloadType == ProtoOAPayloadType.PROTO_OA_APPLICATION_AUTH_RES:
-            req = ProtoOAAccountAuthReq()
-            req.ctidTraderAccountId = self.account_id
-            req.accessToken = self.access_token
-            client.send(req)
-            
-        elif message.payloadType == ProtoOAPayloadType.PROTO_OA_ACCOUNT_AUTH_RES:
-            logger.info("CTrader Auth Success.")
-            if hasattr(self, '_connect_future') and not self._connect_future.done():
-                self._connect_future.set_result(True)
-                
-        # Symbol List
-        elif message.payloadType == ProtoOAPayloadType.PROTO_OA_SYMBOLS_LIST_RES:
-            res = ProtoOASymbolsListRes()
+        handler = self._handlers.get(message.payloadType)
+        if handler is not None:
+            handler(client, message)
+
+    def _on_app_auth(self, client, message):
+        req = ProtoOAAccountAuthReq()
+        req.ctidTraderAccountId = self.account_id
+        req.accessToken = self.access_token
+        client.send(req)
+
+    def _on_account_auth(self, client, message):
+        logger.info("CTrader Auth Success.")
+        self._authenticated = True
+        if hasattr(self, '_connect_future') and not self._connect_future.done():
+            self._connect_future.set_result(True)
+        # Refresh the catalog in the background; requests keep using the cached ids meanwhile
+        if self._catalog.is_stale() and not self._symbols_pending:
+            self._refresh_symbols(Future())
+
+    def _on_symbols_list(self, client, message):
+        res = ProtoOASymbolsListRes()
+        res.ParseFromString(message.payload)
+        symbols = [{'id': s.symbolId, 'name': s.symbolName} for s in res.symbol]
+        self._catalog.update(symbols)
+        self._spot_meta = {}
+        self._symbols_pending = False
+        reactor.callInThread(self._catalog.save)
+
+        future, _ = self._pop_request(message)
+        if future and not future.done():
+            future.set_result(symbols)
+
+        # Release everything that was waiting on symbol resolution
+        waiters, self._symbol_waiters = self._symbol_waiters, []
+        for _, resume in waiters:
+            resume()
+
+    def _on_symbol_details(self, client, message):
+        res = ProtoOASymbolByIdRes()
+        res.ParseFromString(message.payload)
+        details = {}
+        for sym in res.symbol:
+            self._catalog.update_details(sym.symbolId, digits=sym.digits, pipPosition=sym.pipPosition)
+            details[sym.symbolId] = self._catalog.details(sym.symbolId)
+            self._spot_meta.pop(sym.symbolId, None)
+        reactor.callInThread(self._catalog.save)
+
+        future, context = self._pop_request(message)
+        if isinstance(context, tuple):
+            self._details_pending.difference_update(context[1])
+        if future and not future.done():
+            future.set_result(details)
+
+    def _on_subscribe_res(self, client, message):
+        future, _ = self._pop_request(message)
+        if future and not future.done():
+            future.set_result(True)
+
+    def _on_version_res(self, client, message):
+        future, _ = self._pop_request(message)
+        if future and not future.done():
+            res = ProtoOAVersionRes()
             res.ParseFromString(message.payload)
-            self._symbol_cache = {s.symbolName: s.symbolId for s in res.symbol}
-            
-            if self._pending_context == "SYMBOLS":
-                if self._pending_future: self._pending_future.set_result(self._symbol_cache)
-                self._pending_context = None
-            elif isinstance(self._pending_context, tuple):
-                ctx_type = self._pending_context[0]
-                if ctx_type == "SUBSCRIBE":
-                     self._send_subscribe_req(self._pending_context[1])
-                     self._pending_context = None
-                else:
-                    # History context: (sym, start, end)
-                    # Wait, legacy context was (sym, start, end) tuple size 3
-                    # My new tuple is size 2 for SUBSCRIBE.
-                    # Safety check
-                    if len(self._pending_context) == 3:
-                         sym, s, e = self._pending_context
-                         self._send_trendbar_req(sym, s, e)
-
-        # Helper method to find Symbol Name by ID for callbacks
-        def get_sym_name(sid):
-            if hasattr(self, '_symbol_cache'):
-                # Invert map efficiently? No, just iterate for now or fetch
-                for n, i in self._symbol_cache.items():
-                    if i == sid: return n
-            return str(sid)
-
-        # Spot Events (Live Ticks)
-        if message.payloadType == ProtoOAPayloadType.PROTO_OA_SPOT_EVENT:
-            event = ProtoOASpotEvent()
-            event.ParseFromString(message.payload)
-            
-            # Extract bid/ask/timestmap
-            # ProtoOASpotEvent has 'symbolId' and 'bid', 'ask' (deltas or absolute?)
-            # Usually absolute if 'bid' is set? Or delta?
-            # If `bid` is set, it's absolute price (scaled).
-            # If `trendbar` inside spot event? No.
-            
-            # Need to confirm Proto definition. usually:
-            # optional uint64 bid = 2;
-            # optional uint64 ask = 3;
-            # optional int64 symbolId = 1;
-            
-            if event.HasField('bid'):
-                bid = event.bid / 100000.0 # Assuming 5 digits
-                sym_name = get_sym_name(event.symbolId)
-                if self._spot_callback:
-                    self._spot_callback(sym_name, bid, None, datetime.now(timezone.utc))
-
-        # Trendbars
-        elif message.payloadType == ProtoOAPayloadType.PROTO_OA_GET_TRENDBARS_RES:
-            # logger.info("Received Trendbars.")
-            print(f"[DEBUG] Received Trendbars: {len(message.payload)} bytes")
-            res = ProtoOAGetTrendbarsRes()
+            future.set_result(res.version)
+
+    def _on_spot_event(self, client, message):
+        """
+        Live tick fast path: O(1) per event. Spot events only carry the side(s)
+        that changed, so the last bid/ask per symbol fill in the other one.
+        """
+        received = time.time()
+        event = ProtoOASpotEvent()
+        event.ParseFromString(message.payload)
+        has_bid, has_ask = event.HasField('bid'), event.HasField('ask')
+        if not (has_bid or has_ask):
+            return # Trendbar-only update
+
+        sid = event.symbolId
+        meta = self._spot_meta.get(sid)
+        if meta is None:
+            meta = self._spot_meta[sid] = self._make_spot_meta(sid)
+        name, digits, quote = meta
+        if has_bid:
+            quote[0] = round(event.bid / PRICE_DIVIDER, digits) if digits is not None else event.bid / PRICE_DIVIDER
+        if has_ask:
+            quote[1] = round(event.ask / PRICE_DIVIDER, digits) if digits is not None else event.ask / PRICE_DIVIDER
+
+        exchange_ts = event.timestamp if event.HasField('timestamp') else None
+        latency = self.latency
+        if latency is not None:
+            now = time.time()
+            latency.record(name, "parse", now - received)
+            if exchange_ts:
+                latency.record(name, "network", received - exchange_ts / 1000)
+
+        if self._spot_callback is None:
+            return
+        tick = (name, quote[0], quote[1], datetime.fromtimestamp(received, timezone.utc), exchange_ts)
+        if not self._spot_batch:
+            self._spot_callback(*tick)
+            if latency is not None:
+                latency.record(name, "callback", time.time() - received)
+            return
+        if not self._spot_buffer:
+            reactor.callLater(0, self._flush_spots) # Once per reactor turn
+        self._spot_buffer.append(tick)
+
+    def _make_spot_meta(self, symbol_id: int) -> list:
+        """[name, digits, [last bid, last ask]] for one symbol id, cached until the catalog changes."""
+        name = self._catalog.names_by_id.get(symbol_id, str(symbol_id))
+        # Keep the last quote across catalog refreshes
+        old = self._spot_quotes.setdefault(symbol_id, [None, None])
+        return [name, self._price_digits(symbol_id), old]
+
+    def _flush_spots(self):
+        ticks, self._spot_buffer = self._spot_buffer, []
+        if ticks and self._spot_callback is not None:
+            self._spot_callback(ticks)
+            if self.latency is not None:
+                now = time.time()
+                for tick in ticks:
+                    self.latency.record(tick[0], "callback", now - tick[3].timestamp())
+
+    def _on_trendbars(self, client, message):
+        future, context = self._pop_request(message)
+        if future is None or future.done():
+            return # Late answer for a request that already timed out
+        if self.archive is not None and isinstance(context, tuple):
+            # Archived before decoding: a response the parser rejects is the one a parser fix needs
+            symbol, start, end, period = context
+            symbol_id = self._catalog.resolve(symbol)
+            self.archive.append(symbol, _PERIOD_NAMES.get(period, str(period)), int(start.timestamp() * 1000),
+                                int(end.timestamp() * 1000), message.payload, symbol_id=symbol_id,
+                                digits=self._price_digits(symbol_id) if symbol_id is not None else None)
+        res = ProtoOAGetTrendbarsRes()
+        try:
             res.ParseFromString(message.payload)
             df = self._parse_trendbars(res)
-            if self._pending_future and not self._pending_future.done():
-                self._pending_future.set_result(df)
-            self._pending_context = None
-
-        # Errors
-        elif message.payloadType == ProtoOAPayloadType.PROTO_OA_ERROR_RES:
-            logger.error(f"CTrader Error: {message.payload}")
-            if hasattr(self, '_connect_future') and not self._connect_future.done():
-                 self._connect_future.set_exception(Exception(f"Auth Error: {message.payload}"))
-            
-            if self._pending_future and not self._pending_future.done():
-                 self._pending_future.set_exception(Exception(f"API Error: {message.payload}"))
+        except Exception as e:
+            future.set_exception(e)
+            return
+        future.set_result(df)
+
+    def _on_error(self, client, message):
+        res = ProtoOAErrorRes()
+        res.ParseFromString(message.payload)
+        logger.error(f"CTrader Error: {res.errorCode} {res.description}")
+        future, context = self._pop_request(message)
+        error = CTraderAPIError(res.errorCode, res.description)
+        if future is not None:
+            if not future.done():
+                future.set_exception(error)
+            if context == "SYMBOLS":
+                self._symbols_pending = False
+                self._fail_symbol_waiters(error)
+        elif hasattr(self, '_connect_future') and not self._connect_future.done():
+            # Auth failed on a live socket: drop it, or every later connect would reuse it
+            self._drop_client()
+            self._connect_future.set_exception(Exception(f"Auth Error: {res.errorCode} {res.description}"))
+
+    def _on_account_disconnect(self, client, message):
+        res = ProtoOAAccountDisconnectEvent()
+        res.ParseFromString(message.payload)
+        if res.ctidTraderAccountId == self.account_id:
+            logger.warning("CTrader account session closed by the server; marking it for re-auth.")
+            self._authenticated = False
+
+    def _on_token_invalidated(self, client, message):
+        res = ProtoOAAccountsTokenInvalidatedEvent()
+        res.ParseFromString(message.payload)
+        if self.account_id in res.ctidTraderAccountIds:
+            logger.warning(f"CTrader access token invalidated ({res.reason}); marking the session for re-auth.")
+            self._authenticated = False
 
     def _on_disconnected(self, client, reason):
         logger.info(f"Disconnected: {reason}")
+        # The ClientService would keep redialling on its own; reconnects go through connect()
+        if client.running:
+            ClientService.stopService(client)
+        if client is not self._client:
+            return # Already dropped (failed auth); a newer connection may be up
         self._client = None
+        self._authenticated = False
         if hasattr(self, '_connect_future') and not self._connect_future.done():
             self._connect_future.set_exception(Exception("Disconnected during connect"))
-        if self._pending_future and not self._pending_future.done():
-            self._pending_future.set_exception(Exception("Disconnected during request"))
+        # Every in-flight request dies with the session
+        for msg_id in list(self._inflight):
+            self._fail_request(msg_id, Exception("Disconnected during request"))
+        self._fail_symbol_waiters(Exception("Disconnected during request"))
 
     def fetch_history(self, symbol: str, start: datetime, end: datetime, interval='m1') -> pd.DataFrame:
-        if not self._client:
-            self.connect()
-
-        future = Future()
-        self._pending_future = future
-        self._pending_context = (symbol, start, end)
-        
-        reactor.callFromThread(self._send_trendbar_req, symbol, start, end)
-        
+        """Fetches one trendbar window and blocks until it arrives."""
         try:
-            return future.result(timeout=30)
+            future = self.submit_history(symbol, start, end, interval)
+            return future.result(timeout=REQUEST_TIMEOUT)
         except Exception as e:
             logger.error(f"Fetch failed: {e}")
-            self._pending_future = None
             return pd.DataFrame()
 
-    def _send_trendbar_req(self, symbol: str, start: datetime, end: datetime):
-        # 1. Map ArcticDB symbol to CTrader symbol
-        SYMBOL_MAP = {
-            "WTIUSD": "XTIUSD",
-            "BCOUSD": "XBRUSD",
-            "ETXEUR": "STOXX50",
-            "UKXGBP": "UK100",
-            "NSXUSD": "USTEC",
-            "JPXJPY": "JP225",
-            # UDXUSD seems missing on Demo, mapped to None to skip/fail
-        }
-        
-        # Use mapped name if exists, else original
+    def submit_history(self, symbol: str, start: datetime, end: datetime, interval='m1') -> Future:
+        """
+        Queues a trendbar request and returns immediately with a Future[DataFrame].
+        Up to `max_in_flight` requests share the session; beyond that this call
+        blocks until a slot frees up. Must not be called from the reactor thread.
+        """
+        period, _, _ = trendbar_period(interval)
+        if not self._client:
+            self.connect()
+
+        self._inflight_slots.acquire()
+        future = self._submit_trendbars(symbol, start, end, period)
+        future.add_done_callback(lambda _: self._inflight_slots.release())
+        return future
+
+    def _submit_trendbars(self, symbol: str, start: datetime, end: datetime, period: int) -> Future:
+        """Queues a trendbar request without taking an in-flight slot (callers pace themselves)."""
+        future = Future()
+        reactor.callFromThread(self._send_trendbar_req, future, symbol, start, end, period)
+        return future
+
+    def fetch_history_many(self, windows: list, interval='m1') -> list:
+        """
+        Fetches many (symbol, start, end) windows concurrently over one session.
+        Returns DataFrames in the same order; failed windows come back as None
+        (empty frames mean the window had no bars).
+        """
+        futures = [self.submit_history(sym, s, e, interval) for sym, s, e in windows]
+        results = []
+        for (sym, s, _), future in zip(windows, futures):
+            try:
+                results.append(future.result(timeout=REQUEST_TIMEOUT))
+            except Exception as e:
+                logger.error(f"Fetch failed for {sym} window {s}: {e}")
+                results.append(None)
+        return results
+
+    def _send_trendbar_req(self, future: Future, symbol: str, start: datetime, end: datetime,
+                           period: int = ProtoOATrendbarPeriod.M1):
+        if not self._client:
+            future.set_exception(ConnectionError("CTrader not connected"))
+            return
+
+        # 1. Map ArcticDB symbol to CTrader symbol (use mapped name if exists, else original)
         ctrader_symbol = SYMBOL_MAP.get(symbol, symbol)
-        
-        logger.info(f"Resolving symbol: {symbol} -> {ctrader_symbol}")
-
-        # Checking if we have a cache
-        if not hasattr(self, '_symbol_cache'):
-            logger.info("Symbol cache missing. Requesting Symbol List first...")
-            # We set the pending context so _on_message handles the callback
-            # But wait, fetch_history sets _pending_context = (sym, start, end).
-            # The _on_message handler for SYMBOLS_LIST uses that context to recall this method.
-            
-            req = ProtoOASymbolsListReq()
-            req.ctidTraderAccountId = self.account_id
-            req.includeArchivedSymbols = False
-            self._client.send(req)
+
+        # Checking if we have a catalog; if not, resume once the symbol list arrives
+        if not len(self._catalog):
+            self._request_symbols(future, lambda: self._send_trendbar_req(future, symbol, start, end, period))
             return
 
-        # If we have cache, proceed
-        symbol_id = self._symbol_cache.get(ctrader_symbol)
+        # If we have the catalog, proceed
+        symbol_id = self._catalog.resolve(symbol)
         
         if not symbol_id:
              logger.error(f"Symbol {ctrader_symbol} not found in CTrader Account.")
-             if self._pending_future: 
-                 logger.info("Setting Empty Result due to missing symbol.")
-                 self._pending_future.set_result(pd.DataFrame())
+             future.set_result(pd.DataFrame())
              return 
 
-        logger.info(f"Requests Trendbars for {ctrader_symbol} (ID: {symbol_id})")
+        # Details go out first on the same queue, so digits are known when the bars arrive
+        self._ensure_details([symbol_id])
+
+        logger.debug(f"Requesting Trendbars for {symbol} -> {ctrader_symbol} (ID: {symbol_id})")
         
         req = ProtoOAGetTrendbarsReq()
         req.ctidTraderAccountId = self.account_id
         req.fromTimestamp = int(start.timestamp() * 1000)
         req.toTimestamp = int(end.timestamp() * 1000)
-        req.period = ProtoOATrendbarPeriod.M1
+        req.period = period
         req.symbolId = symbol_id
 
-        try:
-             self._client.send(req)
-        except Exception as e:
-             logger.error(f"Send Failed: {e}")
-             if self._pending_future: self._pending_future.set_exception(e)
+        self._send_request(req, future, (symbol, start, end, period))
 
     def _parse_trendbars(self, res) -> pd.DataFrame:
-        data = []
-        # CTrader uses delta compression for close/high/low relative to open, etc?
-        # Checking protobuf def usually:
-        # timestamp, open, high, low, close, volume (often deltas or uint64)
-        # ProtoOATrendbar:
-        #  deltaHigh, deltaLow, deltaOpen, deltaClose (relative to ?)
-        # Actually usually:
-        #  open (absolute? no, usually delta from previous bar close?)
-        
-        # Let's handle the simplest case first: The library or protobuf inspection would confirm.
-        # Usually: low (absolute), deltaOpen, deltaClose, deltaHigh (from low)
-        # Wait, ProtoOATrendbar definition:
-        # optional int64 volume = 1;
-        # optional int32 period = 2;
-        # optional int64 low = 3; (Base price, usually absolute for the bar?)
-        # optional uint64 deltaOpen = 4;
-        # optional uint64 deltaClose = 5;
-        # optional uint64 deltaHigh = 6;
-        # optional uint32 utcTimestampInMinutes = 7;
-        
-        # Let's implement standard parsing
-        for bar in res.trendbar:
-            # Timestamp (minutes) -> Seconds
-            ts = bar.utcTimestampInMinutes * 60
-            dt = datetime.fromtimestamp(ts, timezone.utc)
-            
-            # Prices are often int64 (pips * 100000 or similar unit).
-            # We need to know the 'digits' or 'pipPosition' for the symbol to scale correctly.
-            # Assuming EURUSD (5 digits): divider = 100000
-            divider = 100000.0 
-            
-            low = bar.low / divider # absolute
-            open_ = (bar.low + bar.deltaOpen) / divider
-            close = (bar.low + bar.deltaClose) / divider
-            high = (bar.low + bar.deltaHigh) / divider
-            volume = bar.volume
-            
-            data.append({
-                'timestamp': dt,
-                'open': open_,
-                'high': high,
-                'low': low,
-                'close': close,
-                'volume': volume
-            })
-            
-        df = pd.DataFrame(data)
-        if not df.empty:
-            df.set_index('timestamp', inplace=True)
-        return df
+        return decode_trendbars(res.trendbar, digits=self._price_digits(res.symbolId))
 
-    def fetch_all_symbols(self) -> list:
+    def fetch_symbol_details(self, symbols: list) -> dict:
+        """
+        Returns {symbol: {'id', 'name', 'digits', 'pipPosition'}} for ArcticDB symbol names.
+        Cached details come from the catalog; missing ones are requested once.
         """
-        Fetches all available symbols from CTrader.
+        ids = {sym: self._catalog.resolve(sym) for sym in symbols}
+        missing = [sid for sid in ids.values() if sid and 'digits' not in self._catalog.details(sid)]
+        if missing:
+            try:
+                if not self._client:
+                    self.connect()
+                future = Future()
+                reactor.callFromThread(self._ensure_details, missing, future)
+                future.result(timeout=REQUEST_TIMEOUT)
+            except Exception as e:
+                logger.error(f"Failed fetching symbol details: {e}")
+        return {sym: self._catalog.details(sid) for sym, sid in ids.items() if sid}
+
+    def symbol_digits(self, symbol: str):
+        """Returns the number of price digits for a symbol (None if unknown)."""
+        return self.fetch_symbol_details([symbol]).get(symbol, {}).get('digits')
+
+    def fetch_all_symbols(self, refresh: bool = False) -> list:
         """
+        Returns all available symbols as [{'id', 'name'}].
+        Served from the symbol catalog unless it is empty or `refresh` is set,
+        in which case the list is requested over the existing session.
+        """
+        if not refresh and len(self._catalog):
+            return [{'id': s['id'], 'name': s['name']} for s in self._catalog.symbols()]
+
         if not self.account_id:
              logger.error("CTrader Account ID not provided.")
              return []
 
-        future = Future()
-        reactor.callFromThread(self._do_fetch_symbols, future)
-        
         try:
-            return future.result(timeout=30)
+            if not self._client:
+                self.connect()
+            future = Future()
+            reactor.callFromThread(self._refresh_symbols, future)
+            return future.result(timeout=REQUEST_TIMEOUT)
         except Exception as e:
             logger.error(f"Failed fetching symbols: {e}")
             return []
 
-    def _do_fetch_symbols(self, future: Future):
+    @property
+    def catalog(self) -> SymbolCatalog:
+        return self._catalog
+
+
+class AsyncCTraderClient:
+    """
+    asyncio front end for CTraderClient.
+
+    Requests still run on the reactor thread, but their Futures are chained onto
+    the running loop with `asyncio.wrap_future`, so an await costs no worker
+    thread and thousands of requests can be pending at once. In-flight requests
+    are bounded by an asyncio.Semaphore instead of the blocking slot pool.
+    Spot events are handed to the loop in per-reactor-turn batches with
+    `call_soon_threadsafe` and fanned out to every `spots()` iterator.
+    """
+    def __init__(self, client_id=None, client_secret=None, access_token=None, account_id=None,
+                 max_in_flight: int = MAX_IN_FLIGHT, client: CTraderClient = None):
+        self.client = client or CTraderClient(client_id, client_secret, access_token, account_id,
+                                              max_in_flight=max_in_flight)
+        self._loop = None
+        self._slots = None
+        self._spot_queues = set()
+        self._spot_callback = None
+        self._spot_batch = False
+        self.dropped_spots = 0
+        self.client.set_spot_callback(self._on_spots, batch=True)
+
+    def _bind_loop(self):
+        """Attaches to the running loop on first use (asyncio primitives are loop bound)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.client.max_in_flight)
+        return loop
+
+    @property
+    def catalog(self) -> SymbolCatalog:
+        return self.client.catalog
+
+    def set_spot_callback(self, callback, batch: bool = False):
+        """Sets a spot callback called on the reactor thread (see CTraderClient.set_spot_callback)."""
+        self._spot_callback = callback
+        self._spot_batch = batch
+
+    def set_latency_recorder(self, recorder):
+        """See CTraderClient.set_latency_recorder."""
+        self.client.set_latency_recorder(recorder)
+
+    async def connect(self, timeout: float = 10):
+        """Connects and authenticates without blocking the loop."""
+        self._bind_loop()
         try:
-            import os
-            host = os.getenv("CTRADER_HOST", "live.ctraderapi.com")
-            port = int(os.getenv("CTRADER_PORT", 5035))
-            client = Client(host, port, TcpProtocol)
-            
-            def on_connected(client):
-                # App Auth
-                req = ProtoOAApplicationAuthReq()
-                req.clientId = self.client_id
-                req.clientSecret = self.client_secret
-                client.send(req)
+            await asyncio.wait_for(asyncio.wrap_future(self.client.connect_async()), timeout)
+        except Exception as e:
+            logger.error(f"Connection failed: {e}")
+            raise
 
-            def on_message(client, message):
-                if message.payloadType == ProtoOAPayloadType.PROTO_OA_APPLICATION_AUTH_RES:
-                    req = ProtoOAAccountAuthReq()
-                    req.ctidTraderAccountId = self.account_id
-                    req.accessToken = self.access_token
-                    client.send(req)
-                    
-                elif message.payloadType == ProtoOAPayloadType.PROTO_OA_ACCOUNT_AUTH_RES:
-                    req = ProtoOASymbolsListReq()
-                    req.ctidTraderAccountId = self.account_id
-                    req.includeArchivedSymbols = False
-                    client.send(req)
-
-                elif message.payloadType == ProtoOAPayloadType.PROTO_OA_SYMBOLS_LIST_RES:
-                    res = ProtoOASymbolsListRes()
-                    res.ParseFromString(message.payload)
-                    symbols = []
-                    for sym in res.symbol:
-                        symbols.append({'id': sym.symbolId, 'name': sym.symbolName})
-                    future.set_result(symbols)
-                    client.stopService()
-
-                elif message.payloadType == ProtoOAPayloadType.PROTO_OA_ERROR_RES:
-                    logger.error(f"CTrader Error: {message.payload}")
-                    future.set_exception(Exception(f"API Error: {message.payload}"))
-                    client.stopService()
-
-            def on_disconnected(client, reason):
-                if not future.done():
-                    future.set_result([])
+    def disconnect(self):
+        self.client.disconnect()
 
-            client.setConnectedCallback(on_connected)
-            client.setMessageReceivedCallback(on_message)
-            client.setDisconnectedCallback(on_disconnected)
-            client.startService()
-            
+    async def subscribe(self, symbols: list, timeout: float = REQUEST_TIMEOUT) -> bool:
+        """Subscribes to live spots; returns once the subscription is acknowledged."""
+        await self.connect()
+        future = Future()
+        reactor.callFromThread(self.client._send_subscribe_req, symbols, future)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+
+    async def unsubscribe(self, symbols: list, timeout: float = REQUEST_TIMEOUT) -> bool:
+        """Stops live spots for the given symbols; returns once acknowledged."""
+        future = self.client.unsubscribe(symbols)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+
+    async def submit_history(self, symbol: str, start: datetime, end: datetime, interval='m1') -> pd.DataFrame:
+        """Fetches one trendbar window; errors are raised (see `fetch_history`)."""
+        period, _, _ = trendbar_period(interval)
+        await self.connect()
+        async with self._slots:
+            future = self.client._submit_trendbars(symbol, start, end, period)
+            return await asyncio.wait_for(asyncio.wrap_future(future), REQUEST_TIMEOUT)
+
+    async def fetch_history(self, symbol: str, start: datetime, end: datetime, interval='m1') -> pd.DataFrame:
+        """Fetches one trendbar window. Returns an empty frame on failure."""
+        try:
+            return await self.submit_history(symbol, start, end, interval)
         except Exception as e:
-            if not future.done():
-                future.set_exception(e)
+            logger.error(f"Fetch failed: {e}")
+            return pd.DataFrame()
+
+    async def fetch_history_many(self, windows: list, interval='m1') -> list:
+        """
+        Fetches many (symbol, start, end) windows concurrently. Returns DataFrames
+        in the same order; failed windows come back as None.
+        """
+        results = await asyncio.gather(*(self.submit_history(sym, s, e, interval) for sym, s, e in windows),
+                                       return_exceptions=True)
+        for (sym, s, _), res in zip(windows, results):
+            if isinstance(res, Exception):
+                logger.error(f"Fetch failed for {sym} window {s}: {res}")
+        return [None if isinstance(res, Exception) else res for res in results]
+
+    async def fetch_all_symbols(self, refresh: bool = False) -> list:
+        """Returns all available symbols as [{'id', 'name'}] (see CTraderClient.fetch_all_symbols)."""
+        if not refresh and len(self.catalog):
+            return [{'id': s['id'], 'name': s['name']} for s in self.catalog.symbols()]
+
+        if not self.client.account_id:
+            logger.error("CTrader Account ID not provided.")
+            return []
+
+        try:
+            await self.connect()
+            future = Future()
+            reactor.callFromThread(self.client._refresh_symbols, future)
+            return await asyncio.wait_for(asyncio.wrap_future(future), REQUEST_TIMEOUT)
+        except Exception as e:
+            logger.error(f"Failed fetching symbols: {e}")
+            return []
+
+    async def spots(self, maxsize: int = 10000):
+        """
+        Async iterator of (symbol, bid, ask, timestamp, exchange_ts_ms) spot events. Each iterator
+        has its own queue; if a consumer falls `maxsize` events behind, its oldest
+        events are dropped (counted in `dropped_spots`) rather than stalling others.
+        """
+        self._bind_loop()
+        queue = asyncio.Queue(maxsize)
+        self._spot_queues.add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._spot_queues.discard(queue)
+
+    def _on_spots(self, ticks: list):
+        """Reactor thread: runs the sync callback and hands the batch to the loop in one call."""
+        if self._spot_callback and self._spot_batch:
+            self._spot_callback(ticks)
+        elif self._spot_callback:
+            for tick in ticks:
+                self._spot_callback(*tick)
+        if self._spot_queues and self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._dispatch_spots, ticks)
+            except RuntimeError:
+                pass # Loop closed
+
+    def _dispatch_spots(self, ticks: list):
+        for queue in list(self._spot_queues):
+            for event in ticks:
+                if queue.full():
+                    queue.get_nowait()
+                    self.dropped_spots += 1
+                queue.put_nowait(event)
@@ -0,0 +1,151 @@
+"""
+Bulk daily equity ingestion into ArcticDB (`stocks_1d`).
+
+Tickers are grouped by the first date each one still needs (one day after its
+last stored bar, or the default start), chunked into multi-symbol downloads
+and fetched on a bounded thread pool. Each wide result is localized to UTC
+once, split into per-symbol frames (one row selection per symbol) and written
+with a single ArcticDB batch call: `write_batch` for new symbols,
+`append_batch` for symbols that already have data.
+
+The downloader is any callable `(tickers, start, end) -> DataFrame` returning
+yfinance's `group_by='ticker'` layout (columns: Ticker -> Price); tests pass a
+local stub.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from typing import Callable, Optional
+import pandas as pd
+
+try:
+    import yfinance as yf
+except ImportError:
+    yf = None
+
+from src.data.store import StorageEngine
+from src.utils.time import ensure_utc_index
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_START = "2000-01-01"
+BATCH_SIZE = 100            # Tickers per download request
+WORKERS = 4                 # Downloads in flight
+FIELDS = ["Close", "High", "Low", "Open", "Volume"]  # Column order of the single-ticker path
+
+def yahoo_download(tickers: list, start: str, end: Optional[str] = None) -> pd.DataFrame:
+    """One multi-ticker Yahoo Finance request; concurrency is left to the caller's pool."""
+    if not yf:
+        raise ImportError("yfinance library not installed")
+    return yf.download(tickers, start=start, end=end, group_by="ticker", auto_adjust=True,
+                       threads=False, progress=False)
+
+def split_frame(wide: pd.DataFrame, tickers: list) -> dict:
+    """
+    {ticker: frame} from a wide download, dropping days a ticker has no prices
+    for (multi-ticker results are aligned on the union of trading days).
+    Tickers missing from the result are left out.
+    """
+    if wide is None or wide.empty:
+        return {}
+    if not isinstance(wide.columns, pd.MultiIndex):
+        wide = pd.concat({tickers[0]: wide}, axis=1) if len(tickers) == 1 else wide
+    present = set(wide.columns.get_level_values(0))
+    frames = {}
+    for ticker in tickers:
+        if ticker not in present:
+            continue
+        frame = wide[ticker]
+        fields = [f for f in FIELDS if f in frame.columns]
+        prices = [f for f in fields if f != "Volume"]
+        valid = frame[prices].notna().any(axis=1).to_numpy()
+        if not valid.any():
+            continue
+        frame = frame.loc[valid, fields] if not valid.all() else frame[fields]
+        if "Volume" in frame.columns:
+            frame = frame.astype({"Volume": "int64"}) if not frame["Volume"].isna().any() \
+                else frame.fillna({"Volume": 0}).astype({"Volume": "int64"})
+        frame.columns.name = None
+        frames[ticker] = frame
+    return frames
+
+class EquityBulkIngestor:
+    """
+    Refreshes a universe of tickers in `library`. In incremental mode (the
+    default) only dates after each symbol's last stored bar are fetched and
+    appended; `full=True` re-downloads from `start` and overwrites.
+    """
+    def __init__(self, store: StorageEngine, downloader: Optional[Callable] = None, library: str = "stocks_1d",
+                 start: str = DEFAULT_START, batch_size: int = BATCH_SIZE, workers: int = WORKERS):
+        self.store = store
+        self.downloader = downloader or yahoo_download
+        self.library = library
+        self.start = pd.Timestamp(start, tz="UTC")
+        self.batch_size = batch_size
+        self.workers = workers
+        self.requests = 0
+
+    def plan(self, tickers: list, full: bool = False) -> list:
+        """[(start date, [tickers], {ticker: last stored bar})] download batches."""
+        last = {} if full else {t: ts for t, ts in self.store.last_timestamps(self.library, tickers).items()
+                                if ts is not None}
+        groups = {}
+        for ticker in dict.fromkeys(tickers):
+            stored = last.get(ticker)
+            start = max(self.start, (stored + timedelta(days=1)).normalize()) if stored is not None else self.start
+            groups.setdefault(start, []).append(ticker)
+        batches = []
+        for start, members in sorted(groups.items()):
+            for i in range(0, len(members), self.batch_size):
+                chunk = members[i:i + self.batch_size]
+                batches.append((start, chunk, {t: last[t] for t in chunk if t in last}))
+        return batches
+
+    def run(self, tickers: list, end: Optional[str] = None, full: bool = False) -> dict:
+        """Ingests every ticker up to `end` (exclusive, default: today). Returns {ticker: rows written}."""
+        # Today's bar is still forming during market hours, and appends never revisit it
+        end = end or pd.Timestamp.now(tz="UTC").strftime("%Y-%m-%d")
+        end_ts = pd.Timestamp(end, tz="UTC")
+        batches = [b for b in self.plan(tickers, full) if b[0] < end_ts]
+        written = dict.fromkeys(dict.fromkeys(tickers), 0)
+        logger.info(f"Ingesting {len(written)} tickers into {self.library} in {len(batches)} downloads")
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="equity-dl") as pool:
+            futures = {pool.submit(self._download, start, chunk, end): (chunk, last)
+                       for start, chunk, last in batches}
+            # Writes stay on this thread, one batch call per finished download
+            for future in as_completed(futures):
+                chunk, last = futures[future]
+                try:
+                    wide = future.result()
+                except Exception as e:
+                    logger.error(f"Download of {len(chunk)} tickers ({chunk[0]}...) failed: {e}")
+                    continue
+                try:
+                    written.update(self._write(split_frame(wide, chunk), last))
+                except Exception as e:
+                    logger.error(f"Batch write of {len(chunk)} tickers ({chunk[0]}...) failed: {e}")
+        return written
+
+    def _download(self, start: pd.Timestamp, tickers: list, end: Optional[str]) -> pd.DataFrame:
+        self.requests += 1
+        wide = self.downloader(tickers, start.strftime("%Y-%m-%d"), end)
+        # Localized once for the whole batch; the per-symbol frames share the index
+        return ensure_utc_index(wide) if wide is not None and not wide.empty else wide
+
+    def _write(self, frames: dict, last: dict) -> dict:
+        new, append = {}, {}
+        for ticker, frame in frames.items():
+            stored = last.get(ticker)
+            if stored is None:
+                new[ticker] = frame
+            else:
+                frame = frame[frame.index > stored]
+                if not frame.empty:
+                    append[ticker] = frame
+        errors = {}
+        errors.update(self.store.write_frames(self.library, new, mode="write"))
+        errors.update(self.store.write_frames(self.library, append, mode="append"))
+        for ticker, error in errors.items():
+            logger.error(f"{ticker}: write to {self.library} failed: {error}")
+        return {t: len(f) for batch in (new, append) for t, f in batch.items() if t not in errors}
@@ -6,6 +6,7 @@ import logging
 import pandas as pd
 from typing import Optional
 from src.utils.time import ensure_utc_index, now_utc
+from src.data.ingest.response_cache import ResponseCache
 
 # Conditional imports
 try:
@@ -25,8 +26,28 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+_DEFAULT_CACHE = object()
+
+def _utc_day(value) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return (ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")).normalize()
+
+def _cache_range(start_date, end_date, default_start: str, inclusive_end: bool = False) -> tuple:
+    """Day-aligned [start, end) UTC range of a request; an open end runs through today."""
+    one_day = pd.Timedelta(days=1)
+    if end_date is None:
+        end = _utc_day(now_utc()) + one_day
+    else:
+        end = _utc_day(end_date) + (one_day if inclusive_end else pd.Timedelta(0))
+    return _utc_day(start_date or default_start), end
+
 class HistoricalIngestor:
-    def __init__(self):
+    """
+    Remote source fetchers. Responses go through an on-disk ResponseCache
+    (configured by RESPONSE_CACHE_*; pass cache=None to always hit the network).
+    """
+    def __init__(self, cache=_DEFAULT_CACHE):
+        self.cache = ResponseCache.from_env() if cache is _DEFAULT_CACHE else cache
         self.binance = ccxt.binance() if ccxt else None
         # Initialize FRED client
         import os
@@ -44,14 +65,23 @@ class HistoricalIngestor:
             logger.error("yfinance library not installed")
             return pd.DataFrame()
             
+        if self.cache is not None:
+            start, end = _cache_range(start_date, end_date, "1970-01-01")
+            df = self.cache.get_range("yahoo", symbol, start, end,
+                                      lambda s, e: self._download_yahoo(symbol, s.strftime('%Y-%m-%d'),
+                                                                        e.strftime('%Y-%m-%d')))
+        else:
+            df = self._download_yahoo(symbol, start_date, end_date)
+        if df.empty:
+            logger.warning(f"No data found for {symbol}")
+        return df
+
+    def _download_yahoo(self, symbol: str, start_date: str, end_date: Optional[str]) -> pd.DataFrame:
         logger.info(f"Fetching {symbol} from Yahoo Finance...")
         df = yf.download(symbol, start=start_date, end=end_date)
         if df.empty:
-            logger.warning(f"No data found for {symbol}")
             return df
-            
-        df = ensure_utc_index(df)
-        return df
+        return ensure_utc_index(df)
 
     def fetch_fred(self, series_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DataFrame:
         """Fetches historical economic data from FRED."""
@@ -59,27 +89,43 @@ class HistoricalIngestor:
             logger.error("FRED client not initialized (check API key or dependency)")
             return pd.DataFrame()
 
-        logger.info(f"Fetching {series_id} from FRED...")
         try:
-            # get_series returns a Series with datetime index
-            series = self.fred.get_series(series_id, observation_start=start_date, observation_end=end_date)
-            if series.empty:
+            if self.cache is not None:
+                start, end = _cache_range(start_date, end_date, "1776-07-04", inclusive_end=True)
+                # observation_end is inclusive; the cache works in half-open ranges
+                df = self.cache.get_range("fred", series_id, start, end,
+                                          lambda s, e: self._download_fred(series_id, s, e - pd.Timedelta(days=1)))
+            else:
+                df = self._download_fred(series_id, start_date, end_date)
+            if df.empty:
                 logger.warning(f"No data found for {series_id}")
-                return pd.DataFrame()
-            
-            df = series.to_frame(name='value')
-            df.index.name = 'timestamp'
-            return ensure_utc_index(df)
+            return df
         except Exception as e:
             logger.error(f"Failed to fetch {series_id} from FRED: {e}")
             return pd.DataFrame()
 
+    def _download_fred(self, series_id: str, start_date, end_date) -> pd.DataFrame:
+        logger.info(f"Fetching {series_id} from FRED...")
+        # get_series returns a Series with datetime index
+        series = self.fred.get_series(series_id, observation_start=start_date, observation_end=end_date)
+        if series.empty:
+            return pd.DataFrame()
+        df = series.to_frame(name='value')
+        df.index.name = 'timestamp'
+        return ensure_utc_index(df)
+
     def fetch_crypto_snapshot(self, symbol: str, timeframe: str = '1d', limit: int = 100) -> pd.DataFrame:
         """Fetches historical crypto data from Binance."""
         if not self.binance:
             logger.error("ccxt library not installed")
             return pd.DataFrame()
             
+        if self.cache is not None:
+            return self.cache.get("binance", symbol, lambda: self._download_crypto(symbol, timeframe, limit),
+                                  timeframe=timeframe, limit=limit)
+        return self._download_crypto(symbol, timeframe, limit)
+
+    def _download_crypto(self, symbol: str, timeframe: str, limit: int) -> pd.DataFrame:
         logger.info(f"Fetching {symbol} from Binance...")
         ohlcv = self.binance.fetch_ohlcv(symbol, timeframe, limit=limit)
         df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
@@ -87,26 +133,25 @@ class HistoricalIngestor:
         df.set_index('timestamp', inplace=True)
         return ensure_utc_index(df)
 
-    def fetch_ctrader(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+    def fetch_ctrader(self, symbol: str, start_date: str, end_date: str, interval: str = 'm1') -> pd.DataFrame:
         """
         Fetches historical data from CTrader Open API.
+        Long ranges are split into adaptively sized windows and fetched in parallel
+        by the BackfillScheduler. `interval` is any trendbar period ('m1' ... 'd1', 'w1', 'mn1').
+        Sessions come from the shared pool, so repeated calls skip connect/auth.
         """
-        from src.data.ingest.ctrader import CTraderClient
+        from src.data.ingest.session_pool import get_session_pool
+        from src.data.ingest.scheduler import BackfillScheduler
 
-        import os
-        client_id = os.getenv("CTRADER_APP_CLIENT_ID") or os.getenv("CTRADER_CLIENT_ID")
-        client_secret = os.getenv("CTRADER_APP_CLIENT_SECRET") or os.getenv("CTRADER_CLIENT_SECRET")
-        access_token = os.getenv("CTRADER_ACCESS_TOKEN")
-        account_id = os.getenv("CTRADER_ACCOUNT_ID")
-        
-        # Instantiate client
-        client = CTraderClient(client_id, client_secret, access_token, account_id)
+        client = get_session_pool()
         
         # Parse dates
         start = pd.Timestamp(start_date).to_pydatetime()
         end = pd.Timestamp(end_date).to_pydatetime()
         
-        df = client.fetch_history(symbol, start, end)
+        df = BackfillScheduler(client).fetch_range(symbol, start, end, interval=interval)
+        if df.empty:
+            return df
         
         # Ensure UTC timezone
         df = ensure_utc_index(df)
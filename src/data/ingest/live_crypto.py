@@ -1,23 +1,78 @@
 """
 Live Crypto data ingestion via CCXT Pro (or standard CCXT polling).
+
+One CryptoStreamer per exchange runs an asyncio TaskGroup with one task per
+chunk of symbols, each driving a multi-symbol watcher (watch_tickers or
+watch_trades_for_symbols), so hundreds of pairs share one event loop and a
+handful of websocket subscriptions. Ticks go through a RedisTickWriter into
+the same `tick:{symbol}` streams as forex.
 """
+import os
 import logging
 import asyncio
+import random
+from datetime import datetime, timezone
+from typing import Optional
 
 try:
     import ccxt.pro as ccxtpro
+    from ccxt.base.errors import BadSymbol, NotSupported, AuthenticationError
 except ImportError:
     ccxtpro = None
 
+from .tick_writer import RedisTickWriter, DROP_OLDEST, DEFAULT_QUEUE_SIZE, DEFAULT_BATCH_SIZE
+
 logger = logging.getLogger(__name__)
 
+TICKERS = "tickers"          # Best bid/ask (falls back to last) per ticker update
+TRADES = "trades"            # Every public trade, price in the bid field
+DEFAULT_CHUNK = 100          # Symbols per watcher (exchanges cap streams per connection)
+MIN_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+def stream_symbol(symbol: str, exchange_id: Optional[str] = None) -> str:
+    """'BTC/USDT' -> 'BTCUSDT' ('BTC/USDT:USDT' swaps too); exchange-qualified when several are streamed."""
+    name = symbol.split(":", 1)[0].replace("/", "")
+    return f"{name}.{exchange_id}" if exchange_id else name
+
+def select_symbols(markets: dict, spec: list) -> list:
+    """
+    Resolves a symbol spec against loaded markets: explicit symbols ('BTC/USDT')
+    and quote wildcards ('*/USDT' = every active spot market quoted in USDT).
+    """
+    selected = []
+    for entry in spec:
+        if entry.startswith("*/"):
+            quote = entry[2:]
+            selected.extend(sorted(s for s, m in markets.items()
+                                   if m.get("spot") and m.get("active", True) and m.get("quote") == quote))
+        elif entry in markets:
+            selected.append(entry)
+        else:
+            logger.warning(f"Symbol {entry} not listed; skipping.")
+    return list(dict.fromkeys(selected))
+
 class CryptoStreamer:
     """
     Connects to Crypto exchanges for live ticks/bars.
+
+    `writer` receives every tick (ticks are dropped if it is None). Each
+    watcher reconnects on its own with exponential backoff and jitter; symbols
+    the exchange rejects are dropped from their chunk instead of stopping it.
     """
-    def __init__(self, exchange_id: str = 'binance'):
+    def __init__(self, exchange_id: str = 'binance', symbols: list = None, writer: RedisTickWriter = None,
+                 channel: str = TICKERS, chunk_size: int = DEFAULT_CHUNK, qualify: bool = False):
         self.exchange_id = exchange_id
         self.exchange = None
+        self.spec = symbols or ["BTC/USDT", "ETH/USDT"]
+        self.symbols = []
+        self.writer = writer
+        self.channel = channel
+        self.chunk_size = chunk_size
+        self.qualify = qualify
+        self._names = {}  # ccxt symbol -> stream symbol
+        self.ticks = 0
+        self.reconnects = 0
 
     async def start(self):
         """Starts the websocket stream."""
@@ -27,25 +82,160 @@ class CryptoStreamer:
 
         try:
             exchange_class = getattr(ccxtpro, self.exchange_id)
-            self.exchange = exchange_class()
+            self.exchange = exchange_class({"enableRateLimit": True})
             logger.info(f"Initialized {self.exchange_id} stream")
         except AttributeError:
             logger.error(f"Exchange {self.exchange_id} not found in ccxt.pro")
+            return
 
-    async def watch_ticker(self, symbol: str):
-        """Watches a specific ticker."""
-        if not self.exchange:
+        markets = await self._retry(self.exchange.load_markets, "load markets")
+        self.symbols = select_symbols(markets, self.spec)
+        qualifier = self.exchange_id if self.qualify else None
+        self._names = {s: stream_symbol(s, qualifier) for s in self.symbols}
+        logger.info(f"{self.exchange_id}: streaming {self.channel} for {len(self.symbols)} symbols")
+
+    async def run(self):
+        """Runs one watcher task per chunk of symbols until cancelled."""
+        if self.exchange is None:
+            await self.start()
+        if self.exchange is None or not self.symbols:
             return
 
+        multi = "watchTickers" if self.channel == TICKERS else "watchTradesForSymbols"
+        async with asyncio.TaskGroup() as group:
+            if self.exchange.has.get(multi):
+                for i in range(0, len(self.symbols), self.chunk_size):
+                    group.create_task(self._watch_chunk(self.symbols[i:i + self.chunk_size]))
+            else:
+                # No multi-symbol watcher on this exchange: one task per symbol, same loop
+                for symbol in self.symbols:
+                    group.create_task(self._watch_chunk([symbol]))
+
+    async def _retry(self, call, what: str):
+        backoff = MIN_BACKOFF
         while True:
             try:
-                ticker = await self.exchange.watch_ticker(symbol)
-                logger.debug(f"Tick {symbol}: {ticker['last']}")
-                # TODO: Push to Redis
+                return await call()
+            except AuthenticationError:
+                raise
+            except Exception as e:
+                logger.error(f"{self.exchange_id}: {what} failed: {e}; retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff * (1 + random.random() / 2))
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+    async def _watch_chunk(self, symbols: list):
+        symbols = list(symbols)
+        backoff = MIN_BACKOFF
+        while symbols:
+            try:
+                if self.channel == TICKERS:
+                    if len(symbols) > 1:
+                        self._emit_tickers(await self.exchange.watch_tickers(symbols))
+                    else:
+                        ticker = await self.exchange.watch_ticker(symbols[0])
+                        self._emit_tickers({ticker["symbol"]: ticker})
+                elif len(symbols) > 1:
+                    self._emit_trades(await self.exchange.watch_trades_for_symbols(symbols))
+                else:
+                    self._emit_trades(await self.exchange.watch_trades(symbols[0]))
+                backoff = MIN_BACKOFF
+            except asyncio.CancelledError:
+                raise
+            except (BadSymbol, NotSupported) as e:
+                bad = [s for s in symbols if s in str(e)] or symbols[:1]
+                logger.error(f"{self.exchange_id}: dropping {bad}: {e}")
+                symbols = [s for s in symbols if s not in bad]
             except Exception as e:
-                logger.error(f"Error in ticker stream: {e}")
-                break
-        
+                self.reconnects += 1
+                logger.error(f"{self.exchange_id}: {self.channel} watcher for {len(symbols)} symbols failed: {e}; "
+                             f"reconnecting in {backoff:.0f}s")
+                await asyncio.sleep(backoff * (1 + random.random() / 2))
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+    def _emit_tickers(self, tickers: dict):
+        if not self.writer:
+            return
+        now = datetime.now(timezone.utc)
+        for symbol, ticker in tickers.items():
+            bid, ask = ticker.get("bid"), ticker.get("ask")
+            if bid is None:
+                bid, ask = ticker.get("last"), None
+            if bid is None:
+                continue
+            self.writer.put(self._names.get(symbol) or stream_symbol(symbol), bid, ask, now, ticker.get("timestamp"))
+            self.ticks += 1
+
+    def _emit_trades(self, trades: list):
+        if not self.writer:
+            return
+        now = datetime.now(timezone.utc)
+        for trade in trades:
+            symbol = trade["symbol"]
+            self.writer.put(self._names.get(symbol) or stream_symbol(symbol), trade["price"], None, now,
+                            trade.get("timestamp"))
+            self.ticks += 1
+
+    async def watch_ticker(self, symbol: str):
+        """Watches a specific ticker."""
+        if not self.exchange:
+            return
+        self._names.setdefault(symbol, stream_symbol(symbol))
+        await self._watch_chunk([symbol])
+
     async def close(self):
         if self.exchange:
             await self.exchange.close()
+
+async def run_streamers(streamers: list, redis_client=None):
+    """Runs every exchange's streamer in one event loop, heartbeating to Redis."""
+    async def heartbeat():
+        while True:
+            if redis_client:
+                try:
+                    redis_client.set("service:crypto:heartbeat", datetime.now(timezone.utc).isoformat(), ex=30)
+                    redis_client.hset("service:crypto:stats", mapping={
+                        f"{s.exchange_id}:{k}": v for s in streamers
+                        for k, v in (("symbols", len(s.symbols)), ("ticks", s.ticks), ("reconnects", s.reconnects))
+                    })
+                except Exception as e:
+                    logger.error(f"Heartbeat failed: {e}")
+            await asyncio.sleep(5)
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(heartbeat())
+            for streamer in streamers:
+                group.create_task(streamer.run())
+    finally:
+        for streamer in streamers:
+            await streamer.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from dotenv import load_dotenv
+    load_dotenv()
+    from src.data.store import get_redis
+
+    client = get_redis()
+    # Legacy schema only: the compact codec stores prices in 1/100000 units,
+    # too coarse for sub-cent crypto pairs
+    writer = RedisTickWriter(
+        client,
+        policy=os.getenv("TICK_WRITER_POLICY", DROP_OLDEST),
+        maxsize=int(os.getenv("TICK_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)),
+        batch_size=int(os.getenv("TICK_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+        flush_interval=float(os.getenv("TICK_FLUSH_MS", 50)) / 1000,
+        maxlen=int(os.getenv("TICK_STREAM_MAXLEN", 0)),
+    )
+    exchanges = [e.strip() for e in os.getenv("CRYPTO_EXCHANGES", "binance").split(",") if e.strip()]
+    spec = [s.strip() for s in os.getenv("CRYPTO_SYMBOLS", "*/USDT").split(",") if s.strip()]
+    streamers = [CryptoStreamer(exchange_id, spec, writer, channel=os.getenv("CRYPTO_CHANNEL", TICKERS),
+                                qualify=len(exchanges) > 1) for exchange_id in exchanges]
+
+    writer.start()
+    try:
+        asyncio.run(run_streamers(streamers, client))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.stop()
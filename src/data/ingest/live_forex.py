@@ -3,85 +3,157 @@ Live Forex data ingestion via CTrader API (Real).
 """
 import logging
 import asyncio
+import json
 import os
 from datetime import datetime, timezone
-import redis
-from .ctrader import CTraderClient
+from .ctrader import AsyncCTraderClient
+from .tick_writer import RedisTickWriter, DROP_OLDEST, DEFAULT_QUEUE_SIZE, DEFAULT_BATCH_SIZE
+from .bar_aggregator import BarAggregator, BarStore, LiveBarService
+from .shards import SERVICE_KEY, ASSIGNMENT_KEY, shard_key
+from src.data.store import get_redis, get_storage
+from src.utils.latency import LatencyRecorder
 
 logger = logging.getLogger(__name__)
 
+MAJORS = ["EURUSD", "GBPUSD", "USDJPY", "USDCHF", "AUDUSD", "USDCAD", "NZDUSD", "USDZAR"]
+
 class CTraderConnector:
     """
-    Connects to CTrader Open API for live forex ticks using CTraderClient.
+    Connects to CTrader Open API for live forex ticks using AsyncCTraderClient.
+    As a `shard` worker (see src.data.ingest.shards) it follows its entry in the
+    assignment hash instead of a fixed symbol list and heartbeats under its own key.
     """
-    def __init__(self, client_id: str, client_secret: str, redis_host: str = "localhost", redis_port: int = 6379):
+    def __init__(self, client_id: str, client_secret: str, redis_host: str = "localhost", redis_port: int = 6379,
+                 shard: str = None):
         self.client_id = client_id
         self.client_secret = client_secret
+        self.shard = shard
+        self.service_key = SERVICE_KEY if shard is None else shard_key(shard)
+        self.subscribed = set()
         
         # Load tokens from env if not provided or valid
         self.access_token = os.getenv("CTRADER_ACCESS_TOKEN")
         self.account_id = os.getenv("CTRADER_ACCOUNT_ID")
         
-        self.client = CTraderClient(client_id, client_secret, self.access_token, self.account_id)
+        self.client = AsyncCTraderClient(client_id, client_secret, self.access_token, self.account_id)
+
+        # Per-symbol latency histograms (network/parse/callback/redis), snapshotted with the heartbeat
+        self.latency = None
+        if os.getenv("LATENCY_METRICS", "1") == "1":
+            self.latency = LatencyRecorder()
+            self.client.set_latency_recorder(self.latency)
         
         try:
-            self._redis = redis.Redis(host=redis_host, port=redis_port, decode_responses=True)
+            self._redis = get_redis(redis_host, redis_port)
             self._redis.ping()
             logger.info(f"Connected to Redis at {redis_host}:{redis_port}")
         except Exception as e:
             logger.error(f"Failed to connect to Redis: {e}")
             self._redis = None
 
+        # Ticks are queued on the reactor thread and written by a separate thread
+        self.writer = None
+        if self._redis:
+            self.writer = RedisTickWriter(
+                self._redis,
+                policy=os.getenv("TICK_WRITER_POLICY", DROP_OLDEST),
+                maxsize=int(os.getenv("TICK_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)),
+                batch_size=int(os.getenv("TICK_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+                flush_interval=float(os.getenv("TICK_FLUSH_MS", 50)) / 1000,
+                compact=os.getenv("TICK_STREAM_COMPACT", "0") == "1",
+                maxlen=int(os.getenv("TICK_STREAM_MAXLEN", 0)),
+                latency=self.latency,
+            )
+
+        # 1-minute bars built from the same ticks (Redis bar:1m:* streams + forex_1m)
+        self.bars = None
+        self.bar_service = None
+        if os.getenv("LIVE_BARS", "1") == "1":
+            self.bars = BarAggregator()
+            self.bar_service = LiveBarService(self.bars, self._redis, self._make_bar_store())
+
+    def _make_bar_store(self):
+        """ArcticDB sink for live bars; without ArcticDB, bars only go to Redis."""
+        store = get_storage()
+        if store._arctic is None:
+            logger.warning("ArcticDB unavailable; live bars are published to Redis only.")
+            return None
+        return BarStore(store)
+
     async def connect(self):
         """Establishes connection to CTrader."""
-        # The client runs its own thread, we just ensure it's connected
-        # But Client.connect() is blocking-ish or Future-based
-        # We can call it in executor
-        await asyncio.to_thread(self.client.connect)
+        # Awaits the reactor-side Future directly; no executor thread involved
+        await self.client.connect()
 
-    def _on_spot(self, symbol, bid, ask, ts):
-        """Callback from CTrader Thread."""
-        # Push to Redis
-        if self._redis:
-            try:
-                stream_key = f"tick:{symbol}"
-                entry = {
-                    "symbol": symbol,
-                    "price": str(bid),
-                    "timestamp": ts.isoformat()
-                }
-                self._redis.xadd(stream_key, entry)
-                # logger.debug(f"Pushed {symbol} {bid}")
-            except Exception as e:
-                logger.error(f"Redis write failed: {e}")
+    def _on_spots(self, ticks: list):
+        """Batched callback from the CTrader thread. Only queues; Redis is written by the writer thread."""
+        if self.writer:
+            self.writer.put_many(ticks)
+        if self.bars:
+            self.bars.on_ticks(ticks)
 
     async def start_ingestion(self, symbols: list = None):
         """Main loop."""
         # Set callback
-        self.client.set_spot_callback(self._on_spot)
+        self.client.set_spot_callback(self._on_spots, batch=True)
+        if self.writer:
+            self.writer.start()
+        if self.bar_service:
+            self.bar_service.start()
         
         await self.connect()
         
-        # Default to Majors if not specified
-        if not symbols:
-            symbols = ["EURUSD", "GBPUSD", "USDJPY", "USDCHF", "AUDUSD", "USDCAD", "NZDUSD", "USDZAR"]
-
-        logger.info(f"Subscribing to {symbols}...")
-        self.client.subscribe(symbols)
+        if self.shard is not None:
+            await self.sync_symbols()
+        else:
+            # Default to Majors if not specified
+            symbols = symbols or MAJORS
+            logger.info(f"Subscribing to {symbols}...")
+            await self.client.subscribe(symbols)
+            self.subscribed = set(symbols)
         
         # Keep alive loop with Heartbeat
         while True:
             if self._redis:
                 try:
                     # Set heartbeat with 30s expiry
-                    self._redis.set("service:ingestor:heartbeat", datetime.now(timezone.utc).isoformat(), ex=30)
+                    self._redis.set(f"{self.service_key}:heartbeat", datetime.now(timezone.utc).isoformat(), ex=30)
+                    if self.writer:
+                        self._redis.hset(f"{self.service_key}:stats", mapping=self.writer.stats())
+                    if self.latency:
+                        self._redis.set(f"{self.service_key}:latency", json.dumps(self.latency.snapshot()), ex=60)
                 except Exception as e:
                     logger.error(f"Heartbeat failed: {e}")
+                if self.shard is not None:
+                    await self.sync_symbols()
             await asyncio.sleep(5)
 
+    async def sync_symbols(self):
+        """Shard mode: subscribes/unsubscribes to match this shard's entry in the assignment hash."""
+        try:
+            assigned = self._redis.hget(ASSIGNMENT_KEY, self.shard)
+            wanted = set(json.loads(assigned)) if assigned else set()
+            added, removed = wanted - self.subscribed, self.subscribed - wanted
+            if removed:
+                await self.client.unsubscribe(sorted(removed))
+                if self.bars:
+                    self.bars.discard(removed)
+                self.subscribed -= removed
+            if added:
+                await self.client.subscribe(sorted(added))
+                self.subscribed |= added
+            if added or removed:
+                logger.info(f"Shard {self.shard}: +{len(added)} -{len(removed)} symbols, {len(self.subscribed)} total.")
+        except Exception as e:
+            logger.error(f"Shard {self.shard} symbol sync failed: {e}")
+
     def stop(self):
         if self.client:
             self.client.disconnect()
+        if self.writer:
+            self.writer.stop()
+        if self.bar_service:
+            self.bar_service.stop()
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
@@ -99,6 +171,11 @@ if __name__ == "__main__":
     if not cid or not csec:
         logger.error("Missing CTRADER_CLIENT_ID or CTRADER_CLIENT_SECRET")
         exit(1)
+
+    if int(os.getenv("INGEST_SHARDS", 1)) > 1:
+        from .shards import main
+        main()
+        exit(0)
         
     connector = CTraderConnector(cid, csec, redis_host=redis_host, redis_port=redis_port)
     
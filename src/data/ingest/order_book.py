@@ -0,0 +1,354 @@
+"""
+In-memory L2 order books for crypto feeds.
+
+Each side is a pair of parallel Python lists (prices ascending, sizes) capped
+at `max_levels`: a level update is one bisect (O(log n)) plus, for inserts and
+deletes, a memmove inside the list's existing buffer, so steady-state updates
+allocate nothing per delta and memory per book is bounded. Levels beyond the
+cap (furthest from the touch) are dropped.
+
+OrderBook supports exchange-style sync (snapshot, then deltas checked by
+sequence number, with buffering before the snapshot and a resync flag on
+gaps). ccxt.pro already runs that protocol internally and hands out its merged
+book, so OrderBookFeed diffs each ccxt update against the engine and applies
+only the changed levels as point updates, and publishes top-N snapshots plus derived metrics to Redis at a fixed
+cadence.
+"""
+import os
+import json
+import logging
+import asyncio
+import random
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+try:
+    import ccxt.pro as ccxtpro
+    from ccxt.base.errors import BadSymbol, NotSupported
+except ImportError:
+    ccxtpro = None
+
+from .live_crypto import select_symbols, stream_symbol, MIN_BACKOFF, MAX_BACKOFF
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_LEVELS = 500     # Levels kept per side
+DEFAULT_DEPTH = 10           # Levels published per side
+PUBLISH_INTERVAL = 0.25      # Seconds between Redis snapshots of changed books
+PENDING_UPDATES = 1000       # Deltas buffered while waiting for a snapshot
+METRICS_MAXLEN = 10000       # Approximate cap on each book:metrics:{symbol} stream
+
+class BookSide:
+    """One side of a book; prices ascending, so the best bid is the last level and the best ask the first."""
+    __slots__ = ("prices", "sizes", "is_bid", "max_levels")
+
+    def __init__(self, is_bid: bool, max_levels: int = DEFAULT_MAX_LEVELS):
+        self.prices = []
+        self.sizes = []
+        self.is_bid = is_bid
+        self.max_levels = max_levels
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def set(self, price: float, size: float):
+        """Sets one level; size 0 deletes it."""
+        prices, sizes = self.prices, self.sizes
+        i = bisect_left(prices, price)
+        if i < len(prices) and prices[i] == price:
+            if size:
+                sizes[i] = size
+            else:
+                del prices[i]
+                del sizes[i]
+            return
+        if not size:
+            return
+        prices.insert(i, price)
+        sizes.insert(i, size)
+        if len(prices) > self.max_levels:
+            # Drop the level furthest from the touch
+            if self.is_bid:
+                del prices[0]
+                del sizes[0]
+            else:
+                prices.pop()
+                sizes.pop()
+
+    def clear(self):
+        self.prices.clear()
+        self.sizes.clear()
+
+    def best(self) -> tuple:
+        if not self.prices:
+            return None, None
+        i = -1 if self.is_bid else 0
+        return self.prices[i], self.sizes[i]
+
+    def top(self, n: int) -> list:
+        """Best `n` levels as [price, size], best first."""
+        if self.is_bid:
+            k = len(self.prices)
+            return [[self.prices[i], self.sizes[i]] for i in range(k - 1, max(k - n, 0) - 1, -1)]
+        return [[self.prices[i], self.sizes[i]] for i in range(min(n, len(self.prices)))]
+
+    def volume(self, n: int) -> float:
+        """Total size of the best `n` levels."""
+        return sum(self.sizes[-n:]) if self.is_bid else sum(self.sizes[:n])
+
+    def reconcile(self, levels: list) -> int:
+        """
+        Makes this side's top levels equal `levels` ([[price, size], ...] best
+        first, as ccxt returns them) with point updates for only the levels
+        that differ: one merge walk finds the levels inside the covered range
+        that are missing from it and the new or resized ones; the former are
+        removed first, so the level cap never trims incoming levels. Returns
+        the number of levels changed.
+        """
+        if not levels:
+            changed = len(self.prices)
+            self.clear()
+            return changed
+        # Both lists are sorted: walk ours best-first alongside the incoming levels
+        prices, sizes, is_bid = self.prices, self.sizes, self.is_bid
+        n = len(prices)
+        i, step = (n - 1, -1) if is_bid else (0, 1)
+        stale, updates = [], []
+        for level in levels:
+            price = level[0]
+            while 0 <= i < n and ((prices[i] > price) if is_bid else (prices[i] < price)):
+                stale.append(prices[i])
+                i += step
+            if 0 <= i < n and prices[i] == price:
+                if sizes[i] != level[1]:
+                    updates.append(level)
+                i += step
+            else:
+                updates.append(level)
+        for price in stale:
+            self.set(price, 0)
+        for level in updates:
+            self.set(level[0], level[1])
+        return len(stale) + len(updates)
+
+class OrderBook:
+    """
+    L2 book for one symbol.
+
+    Raw feeds call `apply_snapshot` and `apply_update`. Updates that arrive
+    before the snapshot are buffered (up to PENDING_UPDATES) and replayed
+    after it; an update whose first sequence number skips past the book's
+    marks the book unsynced until the next snapshot.
+    """
+    def __init__(self, symbol: str, max_levels: int = DEFAULT_MAX_LEVELS):
+        self.symbol = symbol
+        self.bids = BookSide(True, max_levels)
+        self.asks = BookSide(False, max_levels)
+        self.nonce = None
+        self.synced = False
+        self.timestamp = None  # Exchange timestamp (ms) of the last update, if known
+        self.updates = 0
+        self.resyncs = 0
+        self._pending = deque(maxlen=PENDING_UPDATES)
+
+    def apply_snapshot(self, bids: list, asks: list, nonce: Optional[int] = None):
+        self.bids.clear()
+        self.asks.clear()
+        for price, size, *_ in bids:
+            self.bids.set(price, size)
+        for price, size, *_ in asks:
+            self.asks.set(price, size)
+        self.nonce = nonce
+        self.synced = True
+        pending, self._pending = list(self._pending), deque(maxlen=PENDING_UPDATES)
+        for update in pending:
+            if nonce is None or update[3] is None or update[3] > nonce:
+                self.apply_update(*update)
+
+    def apply_update(self, bids: list, asks: list, first_nonce: Optional[int] = None,
+                     last_nonce: Optional[int] = None) -> bool:
+        """Applies one delta message. Returns False if it was buffered or revealed a gap."""
+        if not self.synced:
+            self._pending.append((bids, asks, first_nonce, last_nonce))
+            return False
+        if last_nonce is not None and self.nonce is not None:
+            if last_nonce <= self.nonce:
+                return True # Already covered by the snapshot
+            if first_nonce is not None and first_nonce > self.nonce + 1:
+                logger.warning(f"{self.symbol}: sequence gap ({self.nonce} -> {first_nonce}); resyncing")
+                self.synced = False
+                self.resyncs += 1
+                self._pending.append((bids, asks, first_nonce, last_nonce))
+                return False
+        for price, size, *_ in bids:
+            self.bids.set(price, size)
+        for price, size, *_ in asks:
+            self.asks.set(price, size)
+        if last_nonce is not None:
+            self.nonce = last_nonce
+        self.updates += 1
+        return True
+
+    def reconcile(self, bids: list, asks: list, nonce: Optional[int] = None, timestamp: Optional[int] = None) -> int:
+        """
+        Brings the book in line with an already-synced book (ccxt.pro's),
+        setting only the levels that changed. Returns how many did.
+        """
+        changed = self.bids.reconcile(bids) + self.asks.reconcile(asks)
+        self.nonce = nonce
+        self.timestamp = timestamp
+        self.synced = True
+        self.updates += 1
+        return changed
+
+    def metrics(self, depth: int = DEFAULT_DEPTH) -> Optional[dict]:
+        """
+        Spread, mid, microprice (mid weighted by the opposite side's top size)
+        and imbalance ((bid - ask) / (bid + ask) volume over the top `depth` levels).
+        """
+        bid, bid_size = self.bids.best()
+        ask, ask_size = self.asks.best()
+        if bid is None or ask is None:
+            return None
+        bid_volume, ask_volume = self.bids.volume(depth), self.asks.volume(depth)
+        return {
+            "spread": ask - bid,
+            "mid": (bid + ask) / 2,
+            "microprice": (bid * ask_size + ask * bid_size) / (bid_size + ask_size),
+            "imbalance": (bid_volume - ask_volume) / (bid_volume + ask_volume),
+        }
+
+    def snapshot(self, depth: int = DEFAULT_DEPTH) -> dict:
+        return {
+            "symbol": self.symbol,
+            "timestamp": self.timestamp,
+            "nonce": self.nonce,
+            "bids": self.bids.top(depth),
+            "asks": self.asks.top(depth),
+            **(self.metrics(depth) or {}),
+        }
+
+class OrderBookFeed:
+    """
+    Watches order books on one exchange (one task per symbol chunk) and
+    publishes changed books every `publish_interval` seconds:
+    `book:{symbol}` holds the latest top-`depth` snapshot (JSON) and
+    `book:metrics:{symbol}` is a stream of spread/mid/microprice/imbalance.
+    """
+    def __init__(self, exchange_id: str = 'binance', symbols: list = None, redis_client=None,
+                 depth: int = DEFAULT_DEPTH, max_levels: int = DEFAULT_MAX_LEVELS,
+                 publish_interval: float = PUBLISH_INTERVAL, chunk_size: int = 50):
+        self.exchange_id = exchange_id
+        self.exchange = None
+        self.spec = symbols or ["BTC/USDT", "ETH/USDT"]
+        self._redis = redis_client
+        self.depth = depth
+        self.max_levels = max_levels
+        self.publish_interval = publish_interval
+        self.chunk_size = chunk_size
+        self.books = {}
+        self._dirty = set()
+        self.published = 0
+
+    async def start(self):
+        if not ccxtpro:
+            logger.error("ccxt.pro not available")
+            return
+        try:
+            self.exchange = getattr(ccxtpro, self.exchange_id)({"enableRateLimit": True})
+        except AttributeError:
+            logger.error(f"Exchange {self.exchange_id} not found in ccxt.pro")
+            return
+        markets = await self.exchange.load_markets()
+        for symbol in select_symbols(markets, self.spec):
+            self.books[symbol] = OrderBook(stream_symbol(symbol), self.max_levels)
+        logger.info(f"{self.exchange_id}: watching {len(self.books)} order books")
+
+    async def run(self):
+        if self.exchange is None:
+            await self.start()
+        if not self.books:
+            return
+        symbols = list(self.books)
+        multi = self.exchange.has.get("watchOrderBookForSymbols")
+        size = self.chunk_size if multi else 1
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self._publish_loop())
+                for i in range(0, len(symbols), size):
+                    group.create_task(self._watch(symbols[i:i + size]))
+        finally:
+            await self.exchange.close()
+
+    async def _watch(self, symbols: list):
+        backoff = MIN_BACKOFF
+        # Depth requested from ccxt matches what the engine keeps
+        limit = min(self.max_levels, 1000)
+        while symbols:
+            try:
+                if len(symbols) > 1:
+                    ob = await self.exchange.watch_order_book_for_symbols(symbols, limit)
+                else:
+                    ob = await self.exchange.watch_order_book(symbols[0], limit)
+                if self.books[ob["symbol"]].reconcile(ob["bids"], ob["asks"], ob.get("nonce"), ob.get("timestamp")):
+                    self._dirty.add(ob["symbol"])
+                backoff = MIN_BACKOFF
+            except asyncio.CancelledError:
+                raise
+            except (BadSymbol, NotSupported) as e:
+                bad = [s for s in symbols if s in str(e)] or symbols[:1]
+                logger.error(f"{self.exchange_id}: dropping order books {bad}: {e}")
+                symbols = [s for s in symbols if s not in bad]
+            except Exception as e:
+                logger.error(f"{self.exchange_id}: order book watcher for {len(symbols)} symbols failed: {e}; "
+                             f"reconnecting in {backoff:.0f}s")
+                await asyncio.sleep(backoff * (1 + random.random() / 2))
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+    async def _publish_loop(self):
+        while True:
+            await asyncio.sleep(self.publish_interval)
+            if not self._dirty or not self._redis:
+                continue
+            dirty, self._dirty = self._dirty, set()
+            snapshots = [self.books[s].snapshot(self.depth) for s in dirty]
+            try:
+                # The Redis client is blocking; keep the round trip off the event loop
+                await asyncio.to_thread(self._publish, snapshots)
+                self.published += len(snapshots)
+            except Exception as e:
+                logger.error(f"Order book publish failed: {e}")
+
+    def _publish(self, snapshots: list):
+        pipe = self._redis.pipeline(transaction=False)
+        now = datetime.now(timezone.utc).isoformat()
+        for snap in snapshots:
+            symbol = snap["symbol"]
+            pipe.set(f"book:{symbol}", json.dumps(snap), ex=60)
+            if "mid" in snap:
+                pipe.xadd(f"book:metrics:{symbol}",
+                          {"timestamp": now, **{k: str(snap[k]) for k in ("spread", "mid", "microprice", "imbalance")}},
+                          maxlen=METRICS_MAXLEN, approximate=True)
+        pipe.execute()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from dotenv import load_dotenv
+    load_dotenv()
+    from src.data.store import get_redis
+
+    client = get_redis()
+    feed = OrderBookFeed(
+        os.getenv("BOOK_EXCHANGE", "binance"),
+        [s.strip() for s in os.getenv("BOOK_SYMBOLS", "BTC/USDT,ETH/USDT").split(",") if s.strip()],
+        client,
+        depth=int(os.getenv("BOOK_DEPTH", DEFAULT_DEPTH)),
+        max_levels=int(os.getenv("BOOK_MAX_LEVELS", DEFAULT_MAX_LEVELS)),
+        publish_interval=float(os.getenv("BOOK_PUBLISH_MS", 250)) / 1000,
+    )
+    try:
+        asyncio.run(feed.run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,243 @@
+"""
+Archive of raw cTrader trendbar responses, for backfills that can be replayed
+without the API.
+
+Every ProtoOAGetTrendbarsRes payload is appended, together with its request
+parameters, to a gzip-compressed segment file under
+`{root}/{interval}/{symbol}/`. Segments rotate at `segment_bytes` of raw data;
+each process writes its own segments, so several backfill processes can share
+one archive. Records are length-prefixed:
+
+    <u32 meta length> <meta JSON> <u32 payload length> <payload bytes>
+
+with meta = {symbol, symbol_id, interval, from, to (ms), fetched (ms), digits}.
+Appends are queued and written by a background thread, off the reactor. A
+response dropped because the queue was full is logged and its range recorded
+in `{root}/{interval}/{symbol}/dropped.jsonl`, so a replay knows what is missing.
+
+`replay_trendbars` reads a symbol's segments back in order and feeds each
+payload through the trendbar decoder again, so `forex_1m` can be re-derived
+after a parser change at disk speed and with no API quota.
+"""
+import os
+import atexit
+import json
+import gzip
+import zlib
+import queue
+import struct
+import logging
+import threading
+import time
+from typing import Callable, Iterator, Optional
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_BYTES = 64 * 1024 * 1024  # Raw bytes per segment before rotating
+SEGMENT_SUFFIX = ".seg.gz"
+DROPPED_FILE = "dropped.jsonl"
+_LEN = struct.Struct("<I")
+
+class PayloadArchive:
+    """Append-only segment store for raw response payloads. `append` never blocks on disk."""
+    def __init__(self, root: str, segment_bytes: int = SEGMENT_BYTES, maxsize: int = 10000):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self.records = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._open = {}  # (interval, symbol) -> [GzipFile, raw bytes written]
+        self._dropped = {}  # (interval, symbol) -> [(from, to)] not yet recorded on disk
+        self._seq = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="payload-archive", daemon=True)
+                self._thread.start()
+
+    def append(self, symbol: str, interval: str, start_ms: int, end_ms: int, payload: bytes,
+               symbol_id: Optional[int] = None, digits: Optional[int] = None):
+        """Queues one response. Dropped (and counted) if the writer falls behind."""
+        if self._thread is None:
+            self.start()
+        meta = {"symbol": symbol, "symbol_id": symbol_id, "interval": interval, "from": start_ms, "to": end_ms,
+                "fetched": int(time.time() * 1000), "digits": digits}
+        try:
+            self._queue.put_nowait((meta, payload))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self._dropped.setdefault((interval, symbol), []).append((start_ms, end_ms))
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Payload archive queue full: {self.dropped} responses dropped so far "
+                               f"(latest {symbol} {start_ms}..{end_ms})")
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write(*item)
+            except Exception as e:
+                logger.error(f"Payload archive write failed: {e}")
+            if self._dropped:
+                self._record_dropped()
+        self._record_dropped()
+        self._close_segments()
+
+    def _record_dropped(self):
+        with self._lock:
+            dropped, self._dropped = self._dropped, {}
+        for key, ranges in dropped.items():
+            directory = os.path.join(self.root, *key)
+            try:
+                os.makedirs(directory, exist_ok=True)
+                with open(os.path.join(directory, DROPPED_FILE), "a") as f:
+                    f.writelines(json.dumps({"from": lo, "to": hi}) + "\n" for lo, hi in ranges)
+            except OSError as e:
+                logger.error(f"Cannot record {len(ranges)} dropped responses of {key[1]}: {e}")
+
+    def _write(self, meta: dict, payload: bytes):
+        key = (meta["interval"], meta["symbol"])
+        segment = self._open.get(key)
+        if segment is None or segment[1] >= self.segment_bytes:
+            if segment is not None:
+                segment[0].close()
+            directory = os.path.join(self.root, *key)
+            os.makedirs(directory, exist_ok=True)
+            self._seq += 1
+            name = f"{int(time.time() * 1000):013d}-{os.getpid()}-{self._seq:06d}{SEGMENT_SUFFIX}"
+            segment = self._open[key] = [gzip.open(os.path.join(directory, name), "wb"), 0]
+        encoded = json.dumps(meta, separators=(",", ":")).encode()
+        f = segment[0]
+        f.write(_LEN.pack(len(encoded)) + encoded + _LEN.pack(len(payload)))
+        f.write(payload)
+        segment[1] += len(encoded) + len(payload) + 2 * _LEN.size
+        self.records += 1
+
+    def _close_segments(self):
+        for f, _ in self._open.values():
+            f.close()
+        self._open.clear()
+
+    def close(self):
+        """Writes out everything queued and closes the open segments."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+        if self.dropped:
+            logger.warning(f"Payload archive closed with {self.dropped} responses dropped (see {DROPPED_FILE}).")
+
+    # Reading
+
+    def symbols(self, interval: str = "m1") -> list:
+        directory = os.path.join(self.root, interval)
+        return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+    def segments(self, symbol: str, interval: str = "m1") -> list:
+        directory = os.path.join(self.root, interval, symbol)
+        if not os.path.isdir(directory):
+            return []
+        # Names start with the creation time, so this is (roughly) fetch order
+        return [os.path.join(directory, n) for n in sorted(os.listdir(directory)) if n.endswith(SEGMENT_SUFFIX)]
+
+    def dropped_ranges(self, symbol: str, interval: str = "m1") -> list:
+        """[(from, to) ms] of the responses that were fetched but never archived."""
+        path = os.path.join(self.root, interval, symbol, DROPPED_FILE)
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return [(r["from"], r["to"]) for r in map(json.loads, filter(str.strip, f))]
+
+    def read(self, symbol: str, interval: str = "m1") -> Iterator[tuple]:
+        """(meta, payload) for every archived response of a symbol, oldest segment first."""
+        for path in self.segments(symbol, interval):
+            yield from read_segment(path)
+
+def read_segment(path: str) -> Iterator[tuple]:
+    """(meta, payload) records of one segment; a truncated tail (crash mid-write) ends it."""
+    try:
+        with gzip.open(path, "rb") as f:
+            data = f.read()
+    except (OSError, EOFError) as e:
+        # Recover the complete prefix of a segment whose gzip trailer never got written
+        logger.warning(f"Segment {path} is truncated ({e}); reading what is complete.")
+        data = _read_partial(path)
+    view, pos = memoryview(data), 0
+    while pos + _LEN.size <= len(data):
+        (meta_len,) = _LEN.unpack_from(data, pos)
+        payload_at = pos + _LEN.size + meta_len
+        if payload_at + _LEN.size > len(data):
+            break
+        (payload_len,) = _LEN.unpack_from(data, payload_at)
+        end = payload_at + _LEN.size + payload_len
+        if end > len(data):
+            break
+        meta = json.loads(bytes(view[pos + _LEN.size:payload_at]))
+        yield meta, bytes(view[payload_at + _LEN.size:end])
+        pos = end
+
+def _read_partial(path: str) -> bytes:
+    with open(path, "rb") as f:
+        raw = f.read()
+    out, pos = [], 0
+    while pos < len(raw):
+        inflater = zlib.decompressobj(wbits=31)  # One gzip member at a time
+        try:
+            out.append(inflater.decompress(raw[pos:]))
+        except zlib.error:
+            break
+        if not inflater.eof:
+            break
+        pos = len(raw) - len(inflater.unused_data)
+    return b"".join(out)
+
+def replay_trendbars(archive: PayloadArchive, symbol: str, interval: str = "m1",
+                     decoder: Optional[Callable] = None, digits: Optional[int] = None) -> pd.DataFrame:
+    """
+    Re-decodes every archived trendbar response of `symbol` into one frame,
+    sorted and deduplicated (later fetches win). `decoder(res, meta)` defaults
+    to decode_trendbars with the digits recorded at fetch time (or `digits`),
+    which are also returned in `df.attrs["digits"]`.
+    """
+    from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOAGetTrendbarsRes
+    from src.data.ingest.ctrader import decode_trendbars
+
+    if decoder is None:
+        decoder = lambda res, meta: decode_trendbars(res.trendbar, digits=digits if digits is not None else meta.get("digits"))
+    frames, recorded = [], None
+    for meta, payload in archive.read(symbol, interval):
+        res = ProtoOAGetTrendbarsRes()
+        res.ParseFromString(payload)
+        df = decoder(res, meta)
+        if df is not None and not df.empty:
+            frames.append(df)
+        recorded = meta.get("digits", recorded)
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames)
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    df.attrs["digits"] = digits if digits is not None else recorded
+    return df
+
+_archive = None
+_archive_lock = threading.Lock()
+
+def get_payload_archive() -> Optional[PayloadArchive]:
+    """Process-wide archive at CTRADER_PAYLOAD_ARCHIVE (None when unset: archiving is off)."""
+    global _archive
+    root = os.getenv("CTRADER_PAYLOAD_ARCHIVE")
+    if not root:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = PayloadArchive(root, int(float(os.getenv("CTRADER_ARCHIVE_SEGMENT_MB", 64)) * 2**20))
+            atexit.register(_archive.close)
+            logger.info(f"Archiving raw trendbar payloads under {root}")
+        return _archive
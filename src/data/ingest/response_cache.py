@@ -0,0 +1,338 @@
+"""
+On-disk cache for remote data source responses (FRED, Yahoo, exchange snapshots).
+
+Responses are stored as zstd-compressed Parquet files named by the hash of
+their content, so identical responses share one file. A JSON index maps each
+request key (source, symbol, parameters) to the segments fetched for it: the
+half-open time range each one covers, when it was fetched and when it was last
+used. A ranged read serves what the valid segments cover and fetches only the
+uncovered sub-ranges, then merges the pieces back into contiguous segments. A
+sub-range that legitimately has no rows (weekends, holidays, the tail after
+the last observation) is recorded as an empty segment with a shorter
+negative-cache TTL; one whose fetch raised or returned None (failed) is not
+recorded, so it is fetched again next time.
+
+Segments expire after their source's TTL. When the cache outgrows `max_bytes`
+the least recently used segments are evicted. The index is rewritten
+atomically, so several processes can share a cache directory; a concurrent
+writer can at worst lose an entry, and the orphaned file is swept on the next
+eviction.
+"""
+import os
+import io
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Callable, Optional
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 (Parquet engine)
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = os.path.join(".cache", "responses")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_TTLS = {            # Seconds a response stays valid, per source
+    "fred": 24 * 3600,      # Daily/monthly series, occasional revisions
+    "yahoo": 6 * 3600,
+    "binance": 60,          # Latest-bars snapshots
+}
+DEFAULT_TTL = 3600
+DEFAULT_NEGATIVE_TTL = 3600 # Seconds an empty sub-range stays covered (capped by the source TTL)
+INDEX_FILE = "index.json"
+
+def _stamp(ts) -> int:
+    return int(pd.Timestamp(ts).value)
+
+def _contiguous(spans: list) -> list:
+    """Merges (start, end, fetched) spans into contiguous runs, keeping the oldest fetch time."""
+    runs = []
+    for lo, hi, fetched in sorted(spans):
+        if runs and lo <= runs[-1][1]:
+            runs[-1] = (runs[-1][0], max(runs[-1][1], hi), min(runs[-1][2], fetched))
+        else:
+            runs.append((lo, hi, fetched))
+    return runs
+
+class ResponseCache:
+    """Content-addressed, size-bounded response cache. Thread-safe within a process."""
+    def __init__(self, root: str = DEFAULT_DIR, max_bytes: int = DEFAULT_MAX_BYTES, ttls: Optional[dict] = None,
+                 negative_ttl: float = DEFAULT_NEGATIVE_TTL):
+        if pyarrow is None:
+            raise ImportError("pyarrow is required for the response cache")
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._index = {}
+        self._mtime = None
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        """Cache configured by RESPONSE_CACHE_*; None if disabled or pyarrow is missing."""
+        if os.getenv("RESPONSE_CACHE", "1").lower() in ("0", "false", "no"):
+            return None
+        if pyarrow is None:
+            logger.warning("pyarrow not installed; response cache disabled.")
+            return None
+        ttls = {source: float(os.getenv(f"RESPONSE_CACHE_TTL_{source.upper()}", ttl))
+                for source, ttl in DEFAULT_TTLS.items()}
+        return cls(os.getenv("RESPONSE_CACHE_DIR", DEFAULT_DIR),
+                   int(float(os.getenv("RESPONSE_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 2**20)) * 2**20), ttls,
+                   float(os.getenv("RESPONSE_CACHE_NEGATIVE_TTL", DEFAULT_NEGATIVE_TTL)))
+
+    @staticmethod
+    def key(source: str, symbol: str, **params) -> str:
+        parts = [source, symbol] + [f"{k}={params[k]}" for k in sorted(params)]
+        return "|".join(parts)
+
+    # Ranged reads
+
+    def get_range(self, source: str, symbol: str, start, end, fetch: Callable, **params) -> pd.DataFrame:
+        """
+        Rows of [start, end) for a time-indexed source. `fetch(start, end)` is
+        called once per uncovered sub-range and must return a time-indexed frame
+        (empty if the sub-range has no rows), or None if the fetch failed. If a
+        fetch raises, the other sub-ranges are still cached and the first error
+        is re-raised.
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        if start >= end:
+            return pd.DataFrame()
+        key = self.key(source, symbol, **params)
+        ttl = self.ttls.get(source, DEFAULT_TTL)
+        lo, hi = _stamp(start), _stamp(end)
+
+        with self._lock:
+            self._load()
+            segments = self._valid_segments(key, ttl)
+            used, frames = [], []
+            for seg in segments:
+                if seg["start"] < hi and seg["end"] > lo:
+                    df = self._read(seg)
+                    if df is not None:  # An unreadable file is treated as a gap
+                        used.append(seg)
+                        frames.append(df)
+        gaps = self._gaps(lo, hi, used)
+        if not gaps:
+            self.hits += 1
+        else:
+            self.misses += 1
+            logger.info(f"Cache miss for {key}: fetching {len(gaps)} of its sub-ranges")
+
+        fetched, failed, error = [], 0, None
+        for gap_lo, gap_hi in gaps:
+            try:
+                df = fetch(pd.Timestamp(gap_lo, tz=start.tz), pd.Timestamp(gap_hi, tz=start.tz))
+            except Exception as e:
+                df, error = None, error or e
+            if df is None:
+                failed += 1
+                continue
+            fetched.append((gap_lo, gap_hi, df))
+
+        pieces = [f for f in frames + [df for _, _, df in fetched] if not f.empty]
+        merged = pd.concat(pieces) if len(pieces) > 1 else (pieces[0] if pieces else pd.DataFrame())
+        if len(pieces) > 1:
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+
+        if failed:
+            logger.warning(f"{failed} sub-ranges of {key} failed to fetch; not caching them as covered")
+        if fetched:
+            # The used segments plus the fetched gaps, stored as one segment per contiguous
+            # run; empty ranges are kept apart so they expire after the negative TTL
+            now = time.time()
+            spans = [(seg["start"], seg["end"], seg["fetched"]) for seg in used if not seg.get("empty")] + \
+                    [(gap_lo, gap_hi, now) for gap_lo, gap_hi, df in fetched if not df.empty]
+            empty_spans = [(seg["start"], seg["end"], seg["fetched"]) for seg in used if seg.get("empty")] + \
+                          [(gap_lo, gap_hi, now) for gap_lo, gap_hi, df in fetched if df.empty]
+            stamps = merged.index.asi8 if not merged.empty else None
+            runs = []
+            for run_lo, run_hi, run_fetched in _contiguous(spans):
+                rows = merged if stamps is None else merged[(stamps >= run_lo) & (stamps < run_hi)]
+                runs.append(({"start": run_lo, "end": run_hi, "fetched": run_fetched}, rows))
+            for run_lo, run_hi, run_fetched in _contiguous(empty_spans):
+                runs.append(({"start": run_lo, "end": run_hi, "fetched": run_fetched, "empty": True}, pd.DataFrame()))
+            with self._lock:
+                self._load()
+                self._replace(key, used, runs)
+                self._evict()
+        else:
+            with self._lock:
+                for seg in used:
+                    seg["used"] = time.time()
+                self._save()
+        if error is not None:
+            raise error
+        if merged.empty:
+            return merged
+        return merged[(merged.index >= start) & (merged.index < end)]
+
+    # Whole responses
+
+    def get(self, source: str, symbol: str, fetch: Callable, **params) -> pd.DataFrame:
+        """Cached response of a request without a range (e.g. the latest N bars)."""
+        key = self.key(source, symbol, **params)
+        with self._lock:
+            self._load()
+            segments = self._valid_segments(key, self.ttls.get(source, DEFAULT_TTL))
+            df = self._read(segments[0]) if segments else None
+            if df is not None:
+                self.hits += 1
+                segments[0]["used"] = time.time()
+                self._save()
+                return df
+        self.misses += 1
+        df = fetch()
+        if df is not None and not df.empty:
+            with self._lock:
+                self._load()
+                self._replace(key, self._index.get(key, []), [({"start": 0, "end": 0, "fetched": time.time()}, df)])
+                self._evict()
+        return df
+
+    # Index and files
+
+    def _valid_segments(self, key: str, ttl: float) -> list:
+        now = time.time()
+        segments = self._index.get(key, [])
+        negative_ttl = min(ttl, self.negative_ttl)
+        expired = [seg for seg in segments if now - seg["fetched"] > (negative_ttl if seg.get("empty") else ttl)]
+        if expired:
+            self._index[key] = [seg for seg in segments if seg not in expired]
+            if not self._index[key]:
+                del self._index[key]
+            self._save()
+            self._unlink_unreferenced(seg["file"] for seg in expired)
+        return list(self._index.get(key, []))
+
+    @staticmethod
+    def _gaps(lo: int, hi: int, segments: list) -> list:
+        gaps, cursor = [], lo
+        for seg in sorted(segments, key=lambda s: s["start"]):
+            if seg["start"] > cursor:
+                gaps.append((cursor, min(seg["start"], hi)))
+            cursor = max(cursor, seg["end"])
+            if cursor >= hi:
+                break
+        if cursor < hi:
+            gaps.append((cursor, hi))
+        return gaps
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _read(self, seg: dict) -> Optional[pd.DataFrame]:
+        try:
+            return pd.read_parquet(self._path(seg["file"]))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable cache file {seg['file']}: {e}")
+            return None
+
+    def _write(self, df: pd.DataFrame) -> tuple:
+        buf = io.BytesIO()
+        df.to_parquet(buf, compression="zstd")
+        data = buf.getvalue()
+        name = hashlib.sha256(data).hexdigest()[:32] + ".parquet"
+        path = self._path(name)
+        if not os.path.exists(path):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return name, len(data)
+
+    def _replace(self, key: str, old: list, new: list):
+        """Swaps the `old` segments of a key for `new` [(segment, frame)] ones."""
+        for seg, df in new:
+            seg["file"], seg["size"] = self._write(df)
+            seg["used"] = time.time()
+        old_files = [s["file"] for s in old]
+        # Matched by range as well: empty segments of one key all share the same file
+        old_ids = {(s["start"], s["end"], s["file"]) for s in old}
+        kept = [s for s in self._index.get(key, []) if (s["start"], s["end"], s["file"]) not in old_ids]
+        segments = kept + [seg for seg, _ in new]
+        if segments:
+            self._index[key] = segments
+        else:
+            self._index.pop(key, None)
+        self._save()
+        self._unlink_unreferenced(old_files)
+
+    def _referenced(self) -> set:
+        return {seg["file"] for segments in self._index.values() for seg in segments}
+
+    def _unlink_unreferenced(self, files):
+        referenced = self._referenced()
+        for name in set(files) - referenced:
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+
+    def size(self) -> int:
+        with self._lock:
+            self._load()
+            return sum(seg["size"] for seg in {s["file"]: s for v in self._index.values() for s in v}.values())
+
+    def _evict(self):
+        """Drops least recently used segments until the cache fits, then sweeps orphaned files."""
+        by_file = {}
+        for key, segments in self._index.items():
+            for seg in segments:
+                by_file.setdefault(seg["file"], [seg["size"], 0.0, []])
+                entry = by_file[seg["file"]]
+                entry[1] = max(entry[1], seg["used"])
+                entry[2].append(key)
+        total = sum(size for size, _, _ in by_file.values())
+        if total > self.max_bytes:
+            for name, (size, _, keys) in sorted(by_file.items(), key=lambda item: item[1][1]):
+                if total <= self.max_bytes:
+                    break
+                for key in keys:
+                    self._index[key] = [s for s in self._index[key] if s["file"] != name]
+                    if not self._index[key]:
+                        del self._index[key]
+                total -= size
+                logger.info(f"Evicted cache file {name} ({size} bytes)")
+            self._save()
+        referenced = self._referenced()
+        for name in os.listdir(self.root):
+            if name.endswith(".parquet") and name not in referenced:
+                try:
+                    os.remove(self._path(name))
+                except FileNotFoundError:
+                    pass
+
+    def _load(self):
+        path = self._path(INDEX_FILE)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(path) as f:
+                self._index = json.load(f)
+            self._mtime = mtime
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cache index unreadable ({e}); starting empty.")
+            self._index = {}
+
+    def _save(self):
+        path = self._path(INDEX_FILE)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, path)
+        self._mtime = os.stat(path).st_mtime_ns
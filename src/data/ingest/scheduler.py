@@ -0,0 +1,359 @@
+"""
+Parallel trendbar backfill scheduler.
+
+Runs (symbol, window) work items over a bounded worker pool that shares one
+token-bucket limiter, so many windows are in flight while the cTrader
+historical-data quota is respected. Window sizes adapt per symbol to the
+number of bars that actually come back.
+"""
+import heapq
+import logging
+import itertools
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Optional
+from concurrent.futures import TimeoutError as FutureTimeout
+import pandas as pd
+from twisted.internet import defer, error as twisted_error
+
+from src.utils.rate_limit import TokenBucket
+from src.data.ingest.ctrader import TRENDBAR_CAP, CTraderAPIError, trendbar_period
+
+logger = logging.getLogger(__name__)
+
+# cTrader Open API quotas: 50 req/s per connection, of which historical data
+# requests (trendbars, tick data) are limited to 5 req/s.
+HISTORICAL_REQS_PER_SEC = 5
+DEFAULT_WORKERS = 8
+MAX_RETRIES = 3
+RETRY_BACKOFF = 1.0  # Seconds, doubled per attempt
+REPORT_EVERY = 30.0  # Seconds between progress reports
+POLL_INTERVAL = 0.5  # Longest a worker waits on the queue before rechecking stop and delayed items
+
+# Failures worth retrying: timeouts, dropped connections and throttling. Anything
+# else (bad symbol, invalid request, auth) fails the window straight away.
+TRANSIENT_ERRORS = (TimeoutError, FutureTimeout, ConnectionError, defer.TimeoutError,
+                    twisted_error.ConnectError, twisted_error.ConnectionClosed)
+TRANSIENT_API_ERRORS = {"REQUEST_FREQUENCY_EXCEEDED", "TIMEOUT_ERROR", "CANT_ROUTE_REQUEST", "CH_SERVER_NOT_REACHABLE"}
+
+TARGET_FILL = 0.8    # Aim each window at this fraction of TRENDBAR_CAP
+DENSITY_ALPHA = 0.5  # EMA weight of the latest window when updating density
+MIN_DENSITY = 0.01   # Floor so empty windows (weekends) do not explode the span
+WINDOW_DEPTH = 2     # Windows of one symbol allowed in flight at once
+
+def is_transient(exc: Exception) -> bool:
+    """True if a failed request may succeed when retried."""
+    if isinstance(exc, CTraderAPIError):
+        return exc.error_code in TRANSIENT_API_ERRORS
+    return isinstance(exc, TRANSIENT_ERRORS)
+
+@dataclass(order=True)
+class WorkItem:
+    """One trendbar window. Lower priority values run first."""
+    priority: int
+    seq: int
+    symbol: str = field(compare=False)
+    start: datetime = field(compare=False)
+    end: datetime = field(compare=False)
+    interval: str = field(default='m1', compare=False)
+    planner: Optional["WindowPlanner"] = field(default=None, compare=False, repr=False)
+    attempt: int = field(default=0, compare=False)
+    not_before: float = field(default=0.0, compare=False)
+    frontier: Optional[datetime] = field(default=None, compare=False)
+
+@dataclass
+class SchedulerStats:
+    """Progress and throughput counters for one scheduler run."""
+    total: int = 0
+    done: int = 0
+    failed: int = 0
+    retries: int = 0
+    truncated: int = 0
+    requests: int = 0
+    bars: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return max(time.monotonic() - self.started_at, 1e-9)
+
+    @property
+    def bars_per_sec(self) -> float:
+        return self.bars / self.elapsed
+
+    @property
+    def requests_per_sec(self) -> float:
+        return self.requests / self.elapsed
+
+    def summary(self) -> str:
+        return (f"{self.done + self.failed}/{self.total} windows ({self.failed} failed, {self.retries} retries, "
+                f"{self.truncated} split), {self.bars} bars, {self.bars_per_sec:.0f} bars/s, "
+                f"{self.requests_per_sec:.2f} req/s")
+
+class WindowPlanner:
+    """
+    Cuts [start, end) of one symbol into request windows on demand.
+
+    The span of the next window is target_bars / density bar-lengths, where
+    density is an EMA of (bars returned / bar slots in the window). Sparse
+    instruments and weekends therefore grow the window up to the per-period
+    request limit, dense ones shrink it. A response that reaches TRENDBAR_CAP
+    may be truncated, so the part of its window not covered by the returned
+    bars is queued again.
+    """
+    def __init__(self, symbol: str, start: datetime, end: datetime, interval: str = 'm1',
+                 priority: int = 0, cap: int = TRENDBAR_CAP, depth: int = WINDOW_DEPTH):
+        _, self.bar, self.max_span = trendbar_period(interval)
+        self.symbol = symbol
+        self.priority = priority
+        self.start = start
+        self.end = end
+        self.interval = interval
+        self.cap = cap
+        self.depth = depth
+        self.target_bars = max(1, int(cap * TARGET_FILL))
+        self.density = 1.0 # Assume dense until bars say otherwise
+        self.cursor = start
+        self.issued = 0
+        self.in_flight = []  # Starts of windows handed out but not yet observed
+
+    @property
+    def exhausted(self) -> bool:
+        """True once every part of [start, end) has been handed out."""
+        return self.cursor >= self.end
+
+    @property
+    def outstanding(self) -> int:
+        return len(self.in_flight)
+
+    @property
+    def frontier(self) -> datetime:
+        """Everything before this instant has been fetched; it only moves forward."""
+        return min(self.in_flight + [self.cursor])
+
+    def abort(self):
+        """Stops handing out new windows (in-flight ones still complete)."""
+        self.cursor = max(self.cursor, self.end)
+
+    def next_window(self) -> Optional[tuple]:
+        """Returns the next (start, end) to request, or None if exhausted or at depth."""
+        if self.exhausted or self.outstanding >= self.depth:
+            return None
+        # Whole bars only, so window edges stay on bar boundaries
+        bars = min(int(self.target_bars / self.density), int(self.max_span / self.bar))
+        span = self.bar * max(bars, 1)
+        window = (self.cursor, min(self.cursor + span, self.end))
+        self.cursor = window[1]
+        self.issued += 1
+        self.in_flight.append(window[0])
+        return window
+
+    def observe(self, start: datetime, end: datetime, df: Optional[pd.DataFrame]) -> list:
+        """
+        Updates density from a finished window. Returns extra (start, end) windows
+        that must be fetched because the response hit the bar cap.
+        """
+        self.in_flight.remove(start)
+        if df is None:
+            return []
+
+        slots = max((end - start) / self.bar, 1.0)
+        sample = max(len(df) / slots, MIN_DENSITY)
+        self.density = DENSITY_ALPHA * sample + (1 - DENSITY_ALPHA) * self.density
+
+        if len(df) < self.cap:
+            return []
+
+        # Possibly truncated: refetch whatever the returned bars do not cover
+        first, last = df.index.min().to_pydatetime(), df.index.max().to_pydatetime()
+        remainders = []
+        if first - start >= self.bar:
+            remainders.append((start, first))
+        if end - (last + self.bar) >= self.bar:
+            remainders.append((last + self.bar, end))
+        # The capped sample understates density; make sure the next window shrinks
+        self.density = max(self.density, len(df) / slots * 2)
+        self.issued += len(remainders)
+        self.in_flight.extend(s for s, _ in remainders)
+        return remainders
+
+class BackfillScheduler:
+    """
+    Bounded worker pool over trendbar windows with priority ordering,
+    a shared token-bucket limiter and retry with exponential backoff for
+    transient failures. Items waiting out a backoff sit on a timer heap, not
+    in a worker, so retries never hold a worker slot.
+
+    `client` needs `submit_history(symbol, start, end, interval) -> Future[DataFrame]`
+    (CTraderClient or CTraderSessionPool). The default limiter allows the
+    historical quota once per connection the client spreads requests over. Results are delivered to `on_result(item, df)` from worker
+    threads; `df` is None when a window failed after all retries. By the time
+    `on_result` runs, `item.planner` already accounts for any follow-up windows
+    and `item.frontier` holds the planner frontier as of that delivery.
+    """
+    def __init__(self, client, limiter: Optional[TokenBucket] = None, workers: int = DEFAULT_WORKERS,
+                 max_retries: int = MAX_RETRIES, backoff: float = RETRY_BACKOFF,
+                 request_timeout: float = 30.0, report_every: float = REPORT_EVERY):
+        self.client = client
+        connections = getattr(client, "history_sessions", 1)
+        self.limiter = limiter or TokenBucket(HISTORICAL_REQS_PER_SEC * connections)
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.request_timeout = request_timeout
+        self.report_every = report_every
+        self.stats = SchedulerStats()
+        self._queue = queue.PriorityQueue()
+        self._delayed = []  # Heap of (not_before, seq, item) waiting out a retry backoff
+        self._seq = itertools.count()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._stop = threading.Event()
+
+    def add_range(self, symbol: str, start: datetime, end: datetime, priority: int = 0,
+                  interval: str = 'm1', depth: int = WINDOW_DEPTH) -> WindowPlanner:
+        """Queues [start, end) of one symbol as adaptively sized windows. Returns its planner."""
+        planner = WindowPlanner(symbol, start, end, interval, priority=priority, depth=depth)
+        with self._lock:
+            items = self._plan(planner)
+        for item in items:
+            self._queue.put(item)
+        return planner
+
+    def cancel(self, planner: WindowPlanner):
+        """Stops planning further windows for `planner`; in-flight ones still complete."""
+        with self._lock:
+            planner.abort()
+
+    def _plan(self, planner: WindowPlanner, extra: list = ()) -> list:
+        """
+        Builds work items for follow-up and next windows. Caller holds the lock.
+        Follow-ups are planned before the finished item is released, so a planner
+        always has work pending until it is exhausted.
+        """
+        windows = list(extra)
+        while True:
+            window = planner.next_window()
+            if window is None:
+                break
+            windows.append(window)
+        items = [WorkItem(planner.priority, next(self._seq), planner.symbol, s, e, planner.interval, planner)
+                 for s, e in windows]
+        self._pending += len(items)
+        self.stats.total += len(items)
+        return items
+
+    def run(self, on_result: Callable[[WorkItem, Optional[pd.DataFrame]], None]) -> SchedulerStats:
+        """Processes every queued item and blocks until all are done or failed."""
+        self.stats.started_at = time.monotonic()
+        self._stop.clear()
+        threads = [threading.Thread(target=self._worker, args=(on_result,), daemon=True)
+                   for _ in range(self.workers)]
+        for t in threads:
+            t.start()
+
+        with self._idle:
+            while self._pending:
+                self._idle.wait(timeout=self.report_every)
+                if self._pending:
+                    logger.info(f"Backfill progress: {self.stats.summary()}")
+
+        self._stop.set()
+        for t in threads:
+            t.join()
+        logger.info(f"Backfill scheduler finished: {self.stats.summary()}")
+        return self.stats
+
+    def fetch_range(self, symbol: str, start: datetime, end: datetime, interval: str = 'm1',
+                    depth: int = DEFAULT_WORKERS) -> pd.DataFrame:
+        """Fetches [start, end) for one symbol in parallel windows and returns one sorted frame."""
+        frames = []
+        lock = threading.Lock()
+
+        def collect(item, df):
+            if df is not None and not df.empty:
+                with lock:
+                    frames.append(df)
+
+        self.add_range(symbol, start, end, interval=interval, depth=depth)
+        self.run(collect)
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames)
+        return df[~df.index.duplicated(keep='first')].sort_index()
+
+    def _worker(self, on_result: Callable):
+        while not self._stop.is_set():
+            try:
+                item = self._queue.get(timeout=self._release_delayed())
+            except queue.Empty:
+                continue
+
+            self.limiter.acquire()
+            try:
+                with self._lock:
+                    self.stats.requests += 1
+                future = self.client.submit_history(item.symbol, item.start, item.end, item.interval)
+                df = future.result(timeout=self.request_timeout)
+            except Exception as e:
+                if not is_transient(e):
+                    logger.error(f"{item.symbol} window {item.start} failed: {e}")
+                    self._deliver(on_result, item, None)
+                    continue
+                if item.attempt < self.max_retries:
+                    item.attempt += 1
+                    wait = self.backoff * (2 ** (item.attempt - 1))
+                    item.not_before = time.monotonic() + wait
+                    logger.warning(f"{item.symbol} window {item.start} failed ({e}); retry {item.attempt}/{self.max_retries} in {wait:.1f}s")
+                    with self._lock:
+                        self.stats.retries += 1
+                        heapq.heappush(self._delayed, (item.not_before, item.seq, item))
+                    continue
+                logger.error(f"{item.symbol} window {item.start} failed after {item.attempt} retries: {e}")
+                self._deliver(on_result, item, None)
+                continue
+
+            self._deliver(on_result, item, df)
+
+    def _release_delayed(self) -> float:
+        """Moves retries whose backoff has elapsed back onto the queue. Returns how long to wait for work."""
+        ready = []
+        with self._lock:
+            now = time.monotonic()
+            while self._delayed and self._delayed[0][0] <= now:
+                ready.append(heapq.heappop(self._delayed)[2])
+            wait = min(POLL_INTERVAL, self._delayed[0][0] - now) if self._delayed else POLL_INTERVAL
+        for item in ready:
+            self._queue.put(item)
+        return max(wait, 0.01)
+
+    def _deliver(self, on_result: Callable, item: WorkItem, df: Optional[pd.DataFrame]):
+        planner = item.planner
+        with self._lock:
+            extra = planner.observe(item.start, item.end, df)
+            if extra:
+                self.stats.truncated += 1
+                logger.info(f"{item.symbol} window {item.start} hit the {planner.cap}-bar cap; refetching {len(extra)} remainder(s)")
+            followups = self._plan(planner, extra)
+            item.frontier = planner.frontier
+        for followup in followups:
+            self._queue.put(followup)
+
+        try:
+            on_result(item, df)
+        except Exception as e:
+            logger.error(f"Result handler failed for {item.symbol} window {item.start}: {e}")
+
+        with self._idle:
+            if df is None:
+                self.stats.failed += 1
+            else:
+                self.stats.done += 1
+                self.stats.bars += len(df)
+            self._pending -= 1
+            if not self._pending:
+                self._idle.notify_all()
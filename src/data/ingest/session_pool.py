@@ -0,0 +1,164 @@
+"""
+Pool of authenticated CTrader sessions.
+
+Every CTraderClient shares the one Twisted reactor, but each owns a TCP
+connection that costs a TLS handshake plus application and account auth.
+The pool keeps `size` sessions warm, probes them periodically and
+re-authenticates any that drop, so callers never pay the connect cost and
+heavy backfills can spread over several sockets (each has its own send
+throttle and historical quota).
+"""
+import os
+import logging
+import threading
+from concurrent.futures import Future, wait
+from datetime import datetime
+from typing import Optional
+
+from src.data.ingest.ctrader import CTraderClient, REQUEST_TIMEOUT
+from src.data.ingest.symbol_catalog import SymbolCatalog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 2
+HEALTH_INTERVAL = 30.0  # Seconds between liveness probes
+CONNECT_TIMEOUT = 10.0
+
+HISTORY = "history"
+SPOT = "spot"
+
+class CTraderSessionPool:
+    """
+    N CTraderClient sessions sharing one symbol catalog.
+
+    The first `spot_sessions` sessions are reserved for live spot subscriptions
+    and the rest serve history; by default every session serves both. History
+    requests go to the healthy session with the fewest requests in flight, so
+    the pool can stand in for a CTraderClient wherever `submit_history` is used
+    (e.g. BackfillScheduler).
+    """
+    def __init__(self, client_id, client_secret, access_token, account_id, size: int = DEFAULT_POOL_SIZE,
+                 spot_sessions: int = 0, health_interval: float = HEALTH_INTERVAL,
+                 catalog: Optional[SymbolCatalog] = None):
+        if size < 1:
+            raise ValueError("Session pool size must be at least 1")
+        self.catalog = catalog or SymbolCatalog()
+        if catalog is None:
+            self.catalog.load()
+        self.sessions = [CTraderClient(client_id, client_secret, access_token, account_id, catalog=self.catalog)
+                         for _ in range(size)]
+        self.spot_sessions = min(spot_sessions, size - 1) # Always leave one for history
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self._turn = 0
+        self._stop = threading.Event()
+        self._health_thread = None
+
+    @property
+    def size(self) -> int:
+        return len(self.sessions)
+
+    @property
+    def history_sessions(self) -> int:
+        """Connections serving history; each carries its own historical request quota."""
+        return len(self._pool(HISTORY))
+
+    def start(self, timeout: float = CONNECT_TIMEOUT):
+        """Connects all sessions in parallel and starts health checks. Raises if none came up."""
+        futures = [session.connect_async() for session in self.sessions]
+        wait(futures, timeout=timeout)
+        healthy = sum(1 for f in futures if f.done() and f.exception() is None)
+        logger.info(f"CTrader session pool: {healthy}/{self.size} sessions authenticated")
+        if not healthy:
+            raise ConnectionError("No CTrader session could be established")
+
+        if self.health_interval and self._health_thread is None:
+            self._health_thread = threading.Thread(target=self._health_loop, daemon=True)
+            self._health_thread.start()
+
+    def close(self):
+        self._stop.set()
+        for session in self.sessions:
+            session.disconnect()
+
+    def _pool(self, kind: str) -> list:
+        if not self.spot_sessions:
+            return self.sessions
+        return self.sessions[:self.spot_sessions] if kind == SPOT else self.sessions[self.spot_sessions:]
+
+    def session(self, kind: str = HISTORY) -> CTraderClient:
+        """
+        Hands out a session for `kind` ('history' or 'spot'). History picks the
+        least loaded healthy session, spot rotates; ties rotate as well.
+        Unhealthy sessions are only returned if nothing else is up.
+        """
+        pool = self._pool(kind)
+        healthy = [s for s in pool if s.is_connected] or pool
+        with self._lock:
+            turn = self._turn % len(healthy)
+            self._turn += 1
+        rotated = healthy[turn:] + healthy[:turn]
+        if kind == SPOT:
+            return rotated[0]
+        return min(rotated, key=lambda s: s.in_flight)
+
+    def submit_history(self, symbol: str, start: datetime, end: datetime, interval='m1') -> Future:
+        """CTraderClient.submit_history on the least loaded history session."""
+        return self.session(HISTORY).submit_history(symbol, start, end, interval)
+
+    def fetch_history(self, symbol: str, start: datetime, end: datetime, interval='m1'):
+        return self.session(HISTORY).fetch_history(symbol, start, end, interval)
+
+    def symbol_digits(self, symbol: str):
+        return self.session(HISTORY).symbol_digits(symbol)
+
+    def fetch_all_symbols(self, refresh: bool = False) -> list:
+        return self.session(HISTORY).fetch_all_symbols(refresh=refresh)
+
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+
+    def check_health(self):
+        """
+        Probes every session. Dropped sessions are reconnected (and re-authed), as
+        are sessions whose account the server deauthorized (account disconnect or
+        token invalidated events); sessions that do not answer a ping are torn
+        down and redialled next round.
+        """
+        probes = {}
+        for session in self.sessions:
+            if session.is_connected:
+                probes[session] = session.ping()
+            else:
+                logger.warning("CTrader session down; reconnecting.")
+                session.connect_async()
+
+        wait(list(probes.values()), timeout=REQUEST_TIMEOUT)
+        for session, probe in probes.items():
+            if not probe.done() or probe.exception() is not None:
+                logger.warning("CTrader session failed its health check; dropping it.")
+                session.disconnect()
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+def get_session_pool() -> CTraderSessionPool:
+    """
+    Returns the process-wide pool, creating and starting it on first use.
+    Credentials come from the environment; CTRADER_POOL_SIZE sets the size.
+    """
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            pool = CTraderSessionPool(
+                os.getenv("CTRADER_APP_CLIENT_ID") or os.getenv("CTRADER_CLIENT_ID"),
+                os.getenv("CTRADER_APP_CLIENT_SECRET") or os.getenv("CTRADER_CLIENT_SECRET"),
+                os.getenv("CTRADER_ACCESS_TOKEN"),
+                os.getenv("CTRADER_ACCOUNT_ID"),
+                size=int(os.getenv("CTRADER_POOL_SIZE", DEFAULT_POOL_SIZE)),
+            )
+            pool.start()
+            _shared_pool = pool
+        return _shared_pool
@@ -0,0 +1,256 @@
+"""
+Sharded live ingestion.
+
+A coordinator process splits the symbol universe across N worker processes
+with a consistent-hash ring, so adding or removing a shard only moves that
+shard's share of symbols. Each worker is a full CTraderConnector (own cTrader
+session, Redis writer and bar aggregator) that reads its symbol list from the
+assignment hash and heartbeats under its own key.
+
+The coordinator watches worker processes and their heartbeats. An orphaned
+shard (process gone, or no heartbeat after the startup grace) is taken off
+the ring, its symbols move to the surviving shards, and the worker is
+restarted; once it heartbeats again it rejoins and gets its symbols back.
+During a handover a symbol may be subscribed on two shards (or neither) for
+up to one heartbeat interval.
+"""
+import os
+import json
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SERVICE_KEY = "service:ingestor"
+ASSIGNMENT_KEY = f"{SERVICE_KEY}:assignment"  # Hash: shard -> JSON list of symbols
+SHARDS_KEY = f"{SERVICE_KEY}:shards"          # Hash: shard -> JSON status, written by the coordinator
+VNODES = 128                  # Ring points per shard
+CHECK_INTERVAL = 5.0          # Seconds between coordinator health checks
+STARTUP_GRACE = 90.0          # Seconds a (re)started worker gets before its first heartbeat is due
+MAX_RESTART_BACKOFF = 300.0
+
+def shard_key(shard: str) -> str:
+    """Redis key prefix for one shard's heartbeat, stats and latency keys."""
+    return f"{SERVICE_KEY}:shard:{shard}"
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+class HashRing:
+    """Consistent-hash ring with `vnodes` points per node."""
+    def __init__(self, nodes=(), vnodes: int = VNODES):
+        self.vnodes = vnodes
+        self.nodes = set()
+        self._points = []
+        self._owners = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        self.nodes.add(node)
+        self._rebuild()
+
+    def remove(self, node: str):
+        self.nodes.discard(node)
+        self._rebuild()
+
+    def _rebuild(self):
+        ring = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(self.vnodes))
+        self._points = [point for point, _ in ring]
+        self._owners = [node for _, node in ring]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        i = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[i]
+
+    def assign(self, keys: list) -> dict:
+        """{node: [keys]} for every node on the ring (nodes without keys get [])."""
+        out = {node: [] for node in self.nodes}
+        for key in keys:
+            node = self.owner(key)
+            if node is not None:
+                out[node].append(key)
+        return out
+
+def resolve_universe(spec: str) -> list:
+    """
+    Symbols to ingest: "majors", "all" (every symbol in the cTrader catalog,
+    seeded from ctrader_symbols_dump.json) or a comma-separated list.
+    """
+    spec = (spec or "majors").strip()
+    if spec.lower() == "majors":
+        from .live_forex import MAJORS
+        return list(MAJORS)
+    if spec.lower() == "all":
+        from .symbol_catalog import SymbolCatalog
+        catalog = SymbolCatalog()
+        catalog.load()
+        return sorted(catalog.ids_by_name)
+    return [s.strip() for s in spec.split(",") if s.strip()]
+
+def run_shard(shard: str, redis_host: str, redis_port: int):
+    """Worker process entry point."""
+    logging.basicConfig(level=logging.INFO, format=f'[shard {shard}] %(levelname)s %(name)s: %(message)s')
+    import asyncio
+    from dotenv import load_dotenv
+    load_dotenv()
+    from .live_forex import CTraderConnector
+
+    connector = CTraderConnector(os.getenv("CTRADER_CLIENT_ID"), os.getenv("CTRADER_CLIENT_SECRET"),
+                                 redis_host=redis_host, redis_port=redis_port, shard=shard)
+    try:
+        asyncio.run(connector.start_ingestion())
+    finally:
+        connector.stop()
+
+class ShardCoordinator:
+    """
+    Spawns one worker process per shard, publishes the symbol assignment and
+    reassigns orphaned shards. Requires Redis (assignment and heartbeats live there).
+    """
+    def __init__(self, symbols: list, shards: int, redis_client, redis_host: str = "localhost",
+                 redis_port: int = 6379, check_interval: float = CHECK_INTERVAL,
+                 startup_grace: float = STARTUP_GRACE):
+        self.symbols = list(symbols)
+        self.shard_ids = [str(i) for i in range(shards)]
+        self._redis = redis_client
+        self.redis_host = redis_host
+        self.redis_port = redis_port
+        self.check_interval = check_interval
+        self.startup_grace = startup_grace
+        self.ring = HashRing(self.shard_ids)
+        self._ctx = multiprocessing.get_context("spawn") # The twisted reactor does not survive fork
+        self._procs = {}
+        self._started = {}   # shard -> monotonic start time
+        self._restarts = {}  # shard -> consecutive restarts (drives the backoff)
+
+    def assignment(self) -> dict:
+        return self.ring.assign(self.symbols)
+
+    def publish(self):
+        assignment = self.assignment()
+        pipe = self._redis.pipeline()
+        pipe.delete(ASSIGNMENT_KEY)
+        if assignment:
+            pipe.hset(ASSIGNMENT_KEY, mapping={shard: json.dumps(syms) for shard, syms in assignment.items()})
+        pipe.execute()
+        logger.info("Assignment: " + ", ".join(f"shard {s}={len(v)}" for s, v in sorted(assignment.items())))
+
+    def spawn(self, shard: str):
+        # A heartbeat left by the previous worker must not vouch for the new one
+        self._redis.delete(f"{shard_key(shard)}:heartbeat")
+        proc = self._ctx.Process(target=run_shard, args=(shard, self.redis_host, self.redis_port),
+                                 name=f"ingestor-shard-{shard}", daemon=True)
+        proc.start()
+        self._procs[shard] = proc
+        self._started[shard] = time.monotonic()
+        logger.info(f"Started shard {shard} (pid {proc.pid})")
+
+    def _terminate(self, shard: str):
+        proc = self._procs.get(shard)
+        if proc is not None and proc.is_alive():
+            proc.terminate()
+            proc.join(5)
+            if proc.is_alive():
+                proc.kill()
+                proc.join(5)
+
+    def check(self) -> bool:
+        """One health pass. Returns True if the assignment changed."""
+        now = time.monotonic()
+        changed = False
+        for shard in self.shard_ids:
+            proc = self._procs.get(shard)
+            alive = proc is not None and proc.is_alive()
+            healthy = alive and bool(self._redis.exists(f"{shard_key(shard)}:heartbeat"))
+            if healthy:
+                if shard not in self.ring.nodes:
+                    logger.info(f"Shard {shard} is healthy again; rejoining the ring.")
+                    self.ring.add(shard)
+                    changed = True
+                self._restarts[shard] = 0
+                continue
+            if alive and now - self._started.get(shard, 0) < self.startup_grace:
+                continue # Still connecting
+
+            if shard in self.ring.nodes:
+                logger.warning(f"Shard {shard} is orphaned ({'stalled' if alive else 'exited'}); "
+                               f"reassigning its symbols.")
+                self.ring.remove(shard)
+                changed = True
+            backoff = min(self.check_interval * 2 ** self._restarts.get(shard, 0), MAX_RESTART_BACKOFF)
+            if now - self._started.get(shard, 0) >= backoff:
+                self._terminate(shard)
+                self._restarts[shard] = self._restarts.get(shard, 0) + 1
+                self.spawn(shard)
+        if changed:
+            self.publish()
+        return changed
+
+    def _report(self):
+        assignment = self.assignment()
+        status = {}
+        for shard in self.shard_ids:
+            proc = self._procs.get(shard)
+            status[shard] = json.dumps({
+                "pid": proc.pid if proc else None,
+                "alive": bool(proc and proc.is_alive()),
+                "active": shard in self.ring.nodes,
+                "symbols": len(assignment.get(shard, [])),
+                "restarts": self._restarts.get(shard, 0),
+            })
+        pipe = self._redis.pipeline()
+        pipe.hset(SHARDS_KEY, mapping=status)
+        # Keeps the single-process heartbeat key meaningful for the dashboard
+        pipe.set(f"{SERVICE_KEY}:heartbeat", datetime.now(timezone.utc).isoformat(), ex=30)
+        pipe.execute()
+
+    def run(self, stop: Optional[threading.Event] = None):
+        stop = stop or threading.Event()
+        self.publish()
+        for shard in self.shard_ids:
+            self.spawn(shard)
+        try:
+            while not stop.wait(self.check_interval):
+                try:
+                    self.check()
+                    self._report()
+                except Exception as e:
+                    logger.error(f"Shard check failed: {e}")
+        finally:
+            self.stop()
+
+    def stop(self):
+        for shard in list(self._procs):
+            self._terminate(shard)
+        self._procs.clear()
+
+def main():
+    from src.data.store import get_redis
+    redis_host = os.getenv("REDIS_HOST", "localhost")
+    redis_port = int(os.getenv("REDIS_PORT", 6379))
+    client = get_redis(redis_host, redis_port)
+    client.ping()
+
+    symbols = resolve_universe(os.getenv("INGEST_SYMBOLS", "majors"))
+    shards = int(os.getenv("INGEST_SHARDS", 1))
+    logger.info(f"Sharding {len(symbols)} symbols across {shards} worker processes.")
+    coordinator = ShardCoordinator(symbols, shards, client, redis_host=redis_host, redis_port=redis_port)
+    try:
+        coordinator.run()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from dotenv import load_dotenv
+    load_dotenv()
+    main()
@@ -0,0 +1,151 @@
+"""
+Persistent CTrader symbol catalog.
+
+Keeps name->id, id->name and per-symbol details (digits, pipPosition) on disk so a
+new CTraderClient can resolve symbols without a ProtoOASymbolsListReq round trip.
+The client refreshes the catalog in the background once it is authenticated.
+"""
+import os
+import json
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION = 1
+CATALOG_MAX_AGE = 24 * 3600  # Seconds before a background refresh is due
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CATALOG_PATH = os.path.join(_BASE_DIR, "ctrader_symbol_catalog.json")
+# Legacy flat dump ([{'id', 'name'}]) produced by scripts/dump_ctrader_symbols.py
+LEGACY_DUMP_PATH = os.path.join(os.path.dirname(os.path.dirname(_BASE_DIR)), "ctrader_symbols_dump.json")
+
+# ArcticDB symbol -> CTrader symbol, where the broker uses a different name.
+# UDXUSD seems missing on Demo, so it is left unmapped to skip/fail.
+SYMBOL_MAP = {
+    "WTIUSD": "XTIUSD",
+    "BCOUSD": "XBRUSD",
+    "ETXEUR": "STOXX50",
+    "UKXGBP": "UK100",
+    "NSXUSD": "USTEC",
+    "JPXJPY": "JP225",
+}
+
+class SymbolCatalog:
+    """
+    Versioned on-disk symbol catalog.
+
+    Lookups read immutable dicts that are swapped wholesale on update, so the
+    reactor thread can refresh while other threads resolve symbols.
+    """
+    def __init__(self, path: Optional[str] = None, seed_path: Optional[str] = LEGACY_DUMP_PATH):
+        self.path = path or os.getenv("CTRADER_SYMBOL_CATALOG", DEFAULT_CATALOG_PATH)
+        self.seed_path = seed_path
+        self.aliases = dict(SYMBOL_MAP)
+        self.updated_at = 0.0
+        self._ids_by_name = {}
+        self._names_by_id = {}
+        self._details = {}
+        self._save_lock = threading.Lock()
+
+    @property
+    def ids_by_name(self) -> dict:
+        return self._ids_by_name
+
+    @property
+    def names_by_id(self) -> dict:
+        return self._names_by_id
+
+    def __len__(self) -> int:
+        return len(self._ids_by_name)
+
+    def load(self) -> bool:
+        """Loads the catalog file, falling back to the legacy dump. Returns True if anything was loaded."""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                if data.get("version") != CATALOG_VERSION:
+                    logger.warning(f"Symbol catalog {self.path} has version {data.get('version')}, expected {CATALOG_VERSION}. Ignoring.")
+                else:
+                    self.aliases.update(data.get("aliases", {}))
+                    self._set_symbols(data.get("symbols", []))
+                    self.updated_at = float(data.get("updated_at", 0.0))
+                    logger.info(f"Loaded {len(self)} symbols from catalog {self.path}")
+                    return True
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to load symbol catalog {self.path}: {e}")
+
+        if self.seed_path and os.path.exists(self.seed_path):
+            try:
+                with open(self.seed_path, "r") as f:
+                    self._set_symbols(json.load(f))
+                # updated_at stays 0 so the seed is refreshed as soon as we are online
+                logger.info(f"Seeded {len(self)} symbols from {self.seed_path}")
+                return True
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to load symbol seed {self.seed_path}: {e}")
+        return False
+
+    def save(self):
+        """Writes the catalog atomically (tmp file + rename)."""
+        data = {
+            "version": CATALOG_VERSION,
+            "updated_at": self.updated_at,
+            "aliases": self.aliases,
+            "symbols": self.symbols(),
+        }
+        tmp_path = f"{self.path}.tmp"
+        with self._save_lock:
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.error(f"Failed to save symbol catalog {self.path}: {e}")
+
+    def update(self, symbols: list):
+        """
+        Replaces the symbol list with a fresh one from the API ([{'id', 'name', ...}]).
+        Known details (digits, pipPosition) are carried over for unchanged ids.
+        """
+        merged = []
+        for sym in symbols:
+            entry = dict(self._details.get(sym["id"], {}))
+            entry.update(sym)
+            merged.append(entry)
+        self._set_symbols(merged)
+        self.updated_at = time.time()
+
+    def update_details(self, symbol_id: int, **details):
+        """Merges per-symbol details (e.g. digits, pipPosition) into the catalog."""
+        entry = dict(self._details.get(symbol_id, {"id": symbol_id, "name": self._names_by_id.get(symbol_id)}))
+        entry.update(details)
+        new_details = dict(self._details)
+        new_details[symbol_id] = entry
+        self._details = new_details
+
+    def is_stale(self, max_age: float = CATALOG_MAX_AGE) -> bool:
+        return not self._ids_by_name or (time.time() - self.updated_at) > max_age
+
+    def resolve(self, symbol: str) -> Optional[int]:
+        """Maps an ArcticDB symbol (applying aliases) to its CTrader symbol id."""
+        return self._ids_by_name.get(self.aliases.get(symbol, symbol))
+
+    def name(self, symbol_id: int) -> str:
+        return self._names_by_id.get(symbol_id, str(symbol_id))
+
+    def details(self, symbol_id: int) -> dict:
+        return self._details.get(symbol_id, {})
+
+    def symbols(self) -> list:
+        """Returns [{'id', 'name', ...}] sorted by name."""
+        return sorted(self._details.values(), key=lambda s: s["name"] or "")
+
+    def _set_symbols(self, symbols: list):
+        details = {s["id"]: dict(s) for s in symbols}
+        self._details = details
+        self._ids_by_name = {s["name"]: s["id"] for s in symbols}
+        self._names_by_id = {s["id"]: s["name"] for s in symbols}
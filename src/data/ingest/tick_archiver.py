@@ -0,0 +1,250 @@
+"""
+Tick archiver: Redis `tick:*` streams -> ArcticDB `forex_ticks`.
+
+Reads every tick stream through a consumer group, appends the ticks in
+batches per symbol, acknowledges them and only then trims the stream with an
+approximate MINID. Redis keeps a short live window while the full tick history
+becomes queryable with ArcticDB date ranges.
+
+The last archived stream id is stored in the symbol metadata, so entries that
+are redelivered after a crash between append and XACK are skipped rather than
+appended twice. For that check to be safe a stream is read strictly in order:
+while it has unacknowledged entries (a failed append, or pending entries from
+a previous run) no new entries are read from it.
+"""
+import os
+import socket
+import logging
+import threading
+import time
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+from src.data.store import StorageEngine, get_redis, get_storage
+from src.utils.tick_codec import (
+    decode_entry, symbol_from_key, COMPACT_FIELD, COMPACT_VERSION, NO_PRICE, TICK_SCALE
+)
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_LIBRARY = "forex_ticks"
+ARCHIVER_GROUP = "archiver"
+DEFAULT_BATCH = 5000         # Entries read per stream per poll
+BLOCK_MS = 1000
+RETENTION_SECONDS = 3600     # Archived ticks kept in Redis for live readers
+DISCOVER_EVERY = 60.0        # Seconds between scans for new tick streams
+
+_COMPACT_KEY = COMPACT_FIELD.encode()
+# numpy view of tick_codec.TICK_STRUCT ("<Bqqqq", packed)
+_COMPACT_DTYPE = np.dtype([('version', 'u1'), ('bid', '<i8'), ('ask', '<i8'),
+                           ('exchange_ms', '<i8'), ('receive_us', '<i8')])
+
+def parse_stream_id(entry_id) -> tuple:
+    if isinstance(entry_id, bytes):
+        entry_id = entry_id.decode()
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+def _price(ticks: np.ndarray) -> np.ndarray:
+    return np.where(ticks == NO_PRICE, np.nan, ticks / TICK_SCALE)
+
+def ticks_frame(entries: list) -> pd.DataFrame:
+    """
+    Builds a tick frame (index: receive timestamp; bid, ask, exchange_ms) from
+    raw stream entries [(id, fields)]. exchange_ms is the server timestamp in
+    ms since epoch (0 if unknown). All-compact batches are decoded in bulk with
+    one np.frombuffer over the concatenated records.
+    """
+    if all(_COMPACT_KEY in fields for _, fields in entries):
+        rec = np.frombuffer(b"".join(fields[_COMPACT_KEY] for _, fields in entries), dtype=_COMPACT_DTYPE)
+        if (rec['version'] != COMPACT_VERSION).any():
+            raise ValueError("Unsupported compact tick version")
+        bid, ask = _price(rec['bid']), _price(rec['ask'])
+        index = pd.to_datetime(rec['receive_us'], unit='us', utc=True)
+        exchange = rec['exchange_ms'].copy()
+    else:
+        ticks = [decode_entry(fields) for _, fields in entries]
+        bid = np.array([t["bid"] for t in ticks], dtype=np.float64)
+        ask = np.array([np.nan if t["ask"] is None else t["ask"] for t in ticks], dtype=np.float64)
+        index = pd.to_datetime([t["timestamp"] for t in ticks], utc=True)
+        exchange = np.array([int(t["exchange_ts"].timestamp() * 1000) if t["exchange_ts"] else 0 for t in ticks],
+                            dtype=np.int64)
+
+    df = pd.DataFrame({'bid': bid, 'ask': ask, 'exchange_ms': exchange}, index=index.rename('timestamp'))
+    return df.sort_index(kind='stable')
+
+class TickArchiver:
+    """
+    Consumer-group reader that archives tick streams into ArcticDB and trims them.
+
+    `redis_client` must be created with decode_responses=False (compact entries
+    are binary). The consumer name should be stable across restarts so that its
+    pending (delivered, unacknowledged) entries are picked up again.
+    """
+    def __init__(self, store: StorageEngine, redis_client, library: str = ARCHIVE_LIBRARY,
+                 group: str = ARCHIVER_GROUP, consumer: Optional[str] = None, batch_size: int = DEFAULT_BATCH,
+                 block_ms: int = BLOCK_MS, retention: float = RETENTION_SECONDS, key_pattern: str = "tick:*"):
+        self.store = store
+        self._redis = redis_client
+        self.library = library
+        self.group = group
+        self.consumer = consumer or socket.gethostname()
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.retention = retention
+        self.key_pattern = key_pattern
+        self._keys = set()
+        self._last_ids = {}  # stream key -> last archived id (ms, seq)
+        self._last_discover = 0.0
+        self._undrained = set()  # Streams whose pending entries must be archived before new ones
+        self._retry_pending = False
+
+        self.archived = 0
+        self.skipped = 0
+        self.failures = 0
+
+    def discover(self) -> set:
+        """Finds tick streams and makes sure the consumer group exists on each."""
+        for key in self._redis.scan_iter(match=self.key_pattern, _type="STREAM"):
+            key = key.decode() if isinstance(key, bytes) else key
+            if key in self._keys:
+                continue
+            try:
+                self._redis.xgroup_create(key, self.group, id="0", mkstream=True)
+                logger.info(f"Created consumer group {self.group} on {key}")
+            except Exception as e:
+                if "BUSYGROUP" not in str(e):
+                    logger.error(f"Cannot create consumer group on {key}: {e}")
+                    continue
+            self._keys.add(key)
+            self._undrained.add(key)  # An existing group may still hold pending entries
+        self._last_discover = time.monotonic()
+        return self._keys
+
+    def run(self, stop: Optional[threading.Event] = None):
+        """Archives until `stop` is set. Pending entries from a previous run go first."""
+        stop = stop or threading.Event()
+        self.discover()
+        while not stop.is_set():
+            if time.monotonic() - self._last_discover > DISCOVER_EVERY:
+                self.discover()
+            try:
+                if self._undrained:
+                    if self._retry_pending:
+                        stop.wait(1.0)
+                    self._drain_pending()
+                self.poll()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Archiver poll failed: {e}")
+                stop.wait(1.0)
+
+    def _drain_pending(self):
+        """Re-reads entries delivered to this consumer but never acknowledged."""
+        self._retry_pending = False
+        while self._undrained and not self._retry_pending:
+            self.poll(pending=True)
+
+    def poll(self, pending: bool = False) -> int:
+        """
+        Reads one batch per stream and archives it: this consumer's pending
+        entries of the undrained streams, or new entries of all other streams.
+        Returns the number of entries handled.
+        """
+        keys = set(self._undrained) if pending else self._keys - self._undrained
+        if not keys:
+            if not pending:
+                time.sleep(self.block_ms / 1000)
+            return 0
+        start_id = "0" if pending else ">"
+        response = self._redis.xreadgroup(self.group, self.consumer, {key: start_id for key in keys},
+                                          count=self.batch_size, block=None if pending else self.block_ms)
+        handled, read = 0, set()
+        for key, entries in response or []:
+            if entries:
+                key = key.decode() if isinstance(key, bytes) else key
+                read.add(key)
+                self._archive(key, entries)
+                handled += len(entries)
+        if pending:
+            # Streams without pending entries are in order again
+            self._undrained -= keys - read
+        return handled
+
+    def _last_id(self, key: str, symbol: str) -> tuple:
+        if key not in self._last_ids:
+            metadata = self.store.read_metadata(self.library, symbol) if self._has_library() else None
+            last = (metadata or {}).get("last_stream_id")
+            self._last_ids[key] = parse_stream_id(last) if last else (0, 0)
+        return self._last_ids[key]
+
+    def _has_library(self) -> bool:
+        try:
+            self.store.get_library(self.library)
+            return True
+        except ValueError:
+            return False
+
+    def _archive(self, key: str, entries: list):
+        symbol = symbol_from_key(key)
+        ids = [entry_id for entry_id, _ in entries]
+        last = self._last_id(key, symbol)
+        fresh = [(entry_id, fields) for entry_id, fields in entries
+                 if fields and parse_stream_id(entry_id) > last]
+        self.skipped += len(entries) - len(fresh)
+
+        if fresh:
+            newest = fresh[-1][0]
+            newest = newest.decode() if isinstance(newest, bytes) else newest
+            try:
+                df = ticks_frame(fresh)
+                self.store.write_frame(self.library, symbol, df, mode="append",
+                                       metadata={"last_stream_id": newest})
+            except Exception as e:
+                # Not acknowledged: the entries stay pending, and the stream is not read
+                # past them until they are archived (or _last_ids would skip them)
+                self.failures += 1
+                self._undrained.add(key)
+                self._retry_pending = True
+                logger.error(f"Failed to archive {len(fresh)} ticks of {symbol}: {e}")
+                return
+            self._last_ids[key] = parse_stream_id(newest)
+            self.archived += len(fresh)
+
+        self._redis.xack(key, self.group, *ids)
+        self._trim(key)
+
+    def _trim(self, key: str):
+        """
+        Drops entries that are archived, older than the retention window and
+        not pending for any consumer of the group.
+        """
+        archived = self._last_ids.get(key, (0, 0))
+        if not archived[0]:
+            return
+        bound = min(archived, (int((time.time() - self.retention) * 1000), 0))
+        try:
+            summary = self._redis.xpending(key, self.group)
+            if summary and summary.get("pending"):
+                bound = min(bound, parse_stream_id(summary["min"]))
+            self._redis.xtrim(key, minid=f"{bound[0]}-{bound[1]}", approximate=True)
+        except Exception as e:
+            logger.error(f"Failed to trim {key}: {e}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    store = get_storage()
+    client = get_redis(decode_responses=False)
+    archiver = TickArchiver(
+        store, client,
+        consumer=os.getenv("ARCHIVER_CONSUMER"),
+        retention=float(os.getenv("TICK_RETENTION_SECONDS", RETENTION_SECONDS)),
+    )
+    try:
+        archiver.run()
+    except KeyboardInterrupt:
+        logger.info(f"Archiver stopped: {archiver.archived} ticks archived.")
@@ -0,0 +1,197 @@
+"""
+Batched Redis writer for live ticks.
+
+Sits between the CTrader spot callback (reactor thread) and Redis: the
+callback only appends to a bounded in-memory queue, a dedicated writer thread
+drains it and ships ticks with pipelined XADDs. A slow Redis therefore fills
+the queue instead of stalling protobuf processing; what happens when the queue
+is full is an explicit policy.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from src.utils.tick_codec import encode_entry
+
+logger = logging.getLogger(__name__)
+
+BLOCK = "block"              # Producer waits for space (lossless, may stall the reactor)
+DROP_OLDEST = "drop_oldest"  # Oldest queued tick is discarded
+COALESCE = "coalesce"        # Only the latest tick per symbol is kept until the writer catches up
+POLICIES = (BLOCK, DROP_OLDEST, COALESCE)
+
+DEFAULT_QUEUE_SIZE = 100000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 0.05  # Seconds; upper bound on how long a tick waits in the queue
+ERROR_BACKOFF = 1.0
+
+class RedisTickWriter:
+    """
+    Bounded tick queue plus a writer thread that flushes it to Redis streams.
+
+    `put` is called from a single producer (the reactor thread) and never
+    touches Redis. The queue is a deque, whose append/popleft are atomic, so
+    the hot path takes no lock. The writer flushes when `batch_size` ticks are
+    queued or `flush_interval` has passed, one pipeline per batch. With
+    `compact`, entries use the binary schema from src.utils.tick_codec.
+    `maxlen` (approximate) caps each stream as a safety net for when the tick
+    archiver is not running; normally the archiver trims after archiving.
+    With a `latency` recorder, the time from receive (the tick's `ts`) to the
+    acknowledged pipeline is recorded per tick as the "redis" stage.
+    """
+    def __init__(self, redis_client, policy: str = DROP_OLDEST, maxsize: int = DEFAULT_QUEUE_SIZE,
+                 batch_size: int = DEFAULT_BATCH_SIZE, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 key_prefix: str = "tick:", compact: bool = False, maxlen: Optional[int] = None,
+                 latency=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy} (expected one of {POLICIES})")
+        self._redis = redis_client
+        self.policy = policy
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.key_prefix = key_prefix
+        self.compact = compact
+        self.maxlen = maxlen or None
+        self.latency = latency
+
+        self._queue = deque()
+        # COALESCE overflow: symbol -> latest tick, written after the queue drains
+        self._overflow = {}
+        self._overflow_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._space = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.write_errors = 0
+        self.batches = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue) + len(self._overflow)
+
+    def stats(self) -> dict:
+        return {
+            "policy": self.policy,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "write_errors": self.write_errors,
+            "batches": self.batches,
+        }
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="redis-tick-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Flushes what is queued and stops the writer."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def put(self, symbol: str, bid: float, ask: Optional[float], ts: datetime,
+            exchange_ts_ms: Optional[int] = None):
+        """Queues one tick; applies the backpressure policy when the queue is full."""
+        tick = (symbol, bid, ask, ts, exchange_ts_ms)
+        self.enqueued += 1
+        queue = self._queue
+
+        if self.policy == COALESCE and (self._overflow or len(queue) >= self.maxsize):
+            # Once overflowing, every tick goes to the overflow map until the writer
+            # takes it, so per-symbol order is preserved
+            with self._overflow_lock:
+                if symbol in self._overflow:
+                    self.coalesced += 1
+                self._overflow[symbol] = tick
+            self._wake.set()
+            return
+
+        if len(queue) >= self.maxsize:
+            if self.policy == DROP_OLDEST:
+                try:
+                    queue.popleft()
+                    self.dropped += 1
+                except IndexError:
+                    pass # Writer drained it meanwhile
+            elif self.policy == BLOCK:
+                while len(queue) >= self.maxsize and not self._stop.is_set():
+                    self._space.clear()
+                    self._wake.set()
+                    self._space.wait(self.flush_interval)
+
+        queue.append(tick)
+        depth = len(queue)
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if depth >= self.batch_size:
+            self._wake.set()
+
+    def put_many(self, ticks: list):
+        """Queues [(symbol, bid, ask, ts, exchange_ts_ms), ...] (the batched spot callback shape)."""
+        for tick in ticks:
+            self.put(*tick)
+
+    def _take_batch(self) -> list:
+        batch = []
+        queue = self._queue
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(queue.popleft())
+            except IndexError:
+                break
+        if not batch and self._overflow:
+            with self._overflow_lock:
+                overflow, self._overflow = self._overflow, {}
+            batch = list(overflow.values())
+        if batch:
+            self._space.set()
+        return batch
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                self._write(batch)
+            if self._stop.is_set() and not self.depth:
+                return
+
+    def _write(self, batch: list):
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for symbol, bid, ask, ts, exchange_ts in batch:
+                pipe.xadd(f"{self.key_prefix}{symbol}",
+                          encode_entry(symbol, bid, ask, ts, exchange_ts, compact=self.compact),
+                          maxlen=self.maxlen, approximate=True)
+            pipe.execute()
+            self.written += len(batch)
+            self.batches += 1
+            if self.latency is not None:
+                acked = time.time()
+                for symbol, _, _, ts, _ in batch:
+                    self.latency.record(symbol, "redis", acked - ts.timestamp())
+        except Exception as e:
+            self.write_errors += len(batch)
+            logger.error(f"Redis tick batch of {len(batch)} failed: {e}")
+            if not self._stop.is_set():
+                time.sleep(ERROR_BACKOFF)
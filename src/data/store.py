@@ -1,9 +1,16 @@
 """
 Storage interface module handling ArcticDB and Redis connections.
+
+Connections are process-wide: every StorageEngine on the same ArcticDB URI
+shares one Arctic instance and its cached library handles, and every Redis
+client for the same server draws from one ConnectionPool. `get_storage()`
+returns the shared, connected engine; `get_redis()` a pooled Redis client.
 """
 import os
 import logging
+import threading
 from typing import Optional, Any
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 
@@ -23,29 +30,186 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+INT32_MAX = np.iinfo(np.int32).max
+
+def encode_price_ticks(df: pd.DataFrame, digits: int) -> tuple:
+    """
+    Converts float price columns to integer ticks of 10**-digits.
+    Uses int32 when every column fits, int64 otherwise.
+    Returns (encoded_frame, metadata) where metadata carries the scale.
+    """
+    scale = 10 ** digits
+    ticks = {}
+    for col in PRICE_COLUMNS:
+        if col in df.columns:
+            ticks[col] = np.rint(df[col].to_numpy(dtype=np.float64) * scale).astype(np.int64)
+    fits_int32 = all(len(v) == 0 or np.abs(v).max() <= INT32_MAX for v in ticks.values())
+    out = df.copy(deep=False)
+    for col, values in ticks.items():
+        out[col] = values.astype(np.int32) if fits_int32 else values
+    metadata = {"price_encoding": "ticks", "digits": digits, "scale": scale}
+    return out, metadata
+
+def decode_price_ticks(df: pd.DataFrame, metadata: Optional[dict]) -> pd.DataFrame:
+    """Restores float prices from a frame written by `encode_price_ticks`; no-op for float frames."""
+    if not metadata or metadata.get("price_encoding") != "ticks":
+        return df
+    scale = float(metadata["scale"])
+    digits = int(metadata["digits"])
+    out = df.copy(deep=False)
+    for col in PRICE_COLUMNS:
+        if col in out.columns:
+            out[col] = (out[col].to_numpy(dtype=np.float64) / scale).round(digits)
+    return out
+
+STATS_LIBRARY = "symbol_stats"  # Side library: one stats record per data symbol
+NS_PER_DAY = 86_400_000_000_000
+
+def stats_key(library_name: str, symbol: str) -> str:
+    """Symbol of a data symbol's record in the stats library."""
+    return f"{library_name}:{symbol}"
+
+def day_counts(index: pd.DatetimeIndex) -> pd.Series:
+    """Rows per UTC day of a DatetimeIndex, as an int64 Series indexed by day."""
+    if len(index) == 0:
+        return pd.Series([], index=pd.DatetimeIndex([], tz="UTC"), dtype=np.int64, name="rows")
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    days, counts = np.unique(index.asi8 // NS_PER_DAY, return_counts=True)
+    return pd.Series(counts.astype(np.int64), index=pd.to_datetime(days * NS_PER_DAY, utc=True), name="rows")
+
+def _utc(ts) -> Optional[pd.Timestamp]:
+    if ts is None or pd.isna(ts):
+        return None
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+# Process-wide connection registry; rebuilt in a forked child (sockets and LMDB
+# environments must not be shared across fork)
+_registry_lock = threading.Lock()
+_registry_pid = os.getpid()
+_arctics = {}      # uri -> ArcticLibraries
+_redis_pools = {}  # (host, port, db, decode_responses) -> ConnectionPool
+_engines = {}      # (uri, redis host, redis port) -> connected StorageEngine
+
+def _registry() -> threading.Lock:
+    global _registry_pid
+    if os.getpid() != _registry_pid:
+        _arctics.clear()
+        _redis_pools.clear()
+        _engines.clear()
+        _registry_pid = os.getpid()
+    return _registry_lock
+
+def default_arctic_uri() -> str:
+    """ARCTIC_URI, or the local LMDB store in src/data/arctic_data."""
+    uri = os.getenv("ARCTIC_URI")
+    if uri:
+        return uri
+    return f"lmdb://{os.path.join(os.path.dirname(os.path.abspath(__file__)), 'arctic_data')}"
+
+class ArcticLibraries:
+    """
+    One Arctic instance with its library list and handles cached. The list is
+    refreshed on create/delete and once on a miss (another process may have
+    created the library since).
+    """
+    def __init__(self, arctic):
+        self.arctic = arctic
+        self._lock = threading.RLock()
+        self._names = None
+        self._handles = {}
+
+    def names(self) -> set:
+        with self._lock:
+            if self._names is None:
+                self._names = set(self.arctic.list_libraries())
+            return self._names
+
+    def invalidate(self):
+        with self._lock:
+            self._names = None
+            self._handles.clear()
+
+    def get(self, name: str, create_if_missing: bool = False):
+        lib = self._handles.get(name)
+        if lib is not None:
+            return lib
+        with self._lock:
+            if name not in self.names():
+                self._names = None # Stale list: check once more before creating or failing
+                if name not in self.names():
+                    if not create_if_missing:
+                        raise ValueError(f"Library {name} does not exist")
+                    self.arctic.create_library(name)
+                    self._names = None
+                    logger.info(f"Created ArcticDB library: {name}")
+            lib = self._handles.get(name)
+            if lib is None:
+                lib = self._handles[name] = self.arctic[name]
+            return lib
+
+    def delete(self, name: str):
+        with self._lock:
+            self.arctic.delete_library(name)
+            self.invalidate()
+            logger.info(f"Deleted ArcticDB library: {name}")
+
+def get_arctic(uri: str) -> ArcticLibraries:
+    """The shared Arctic instance (and library cache) for a URI."""
+    with _registry():
+        libs = _arctics.get(uri)
+        if libs is None:
+            libs = _arctics[uri] = ArcticLibraries(arcticdb.Arctic(uri))
+        return libs
+
+def get_redis(host: str = None, port: int = None, decode_responses: bool = True, db: int = 0):
+    """A Redis client on the process-wide pool for host:port (REDIS_HOST/REDIS_PORT by default)."""
+    host = host or os.getenv("REDIS_HOST", "localhost")
+    port = int(port or os.getenv("REDIS_PORT", 6379))
+    key = (host, port, db, decode_responses)
+    with _registry():
+        pool = _redis_pools.get(key)
+        if pool is None:
+            pool = _redis_pools[key] = redis.ConnectionPool(host=host, port=port, db=db,
+                                                            decode_responses=decode_responses)
+    return redis.Redis(connection_pool=pool)
+
+def get_storage(arctic_uri: str = None, redis_host: str = None, redis_port: int = None) -> "StorageEngine":
+    """The process-wide connected StorageEngine (created on first use)."""
+    arctic_uri = arctic_uri or default_arctic_uri()
+    redis_host = redis_host or os.getenv("REDIS_HOST", "localhost")
+    redis_port = int(redis_port or os.getenv("REDIS_PORT", 6379))
+    key = (arctic_uri, redis_host, redis_port)
+    with _registry():
+        engine = _engines.get(key)
+    if engine is not None:
+        return engine
+    engine = StorageEngine(arctic_uri, redis_host, redis_port)
+    engine.connect()
+    with _registry():
+        return _engines.setdefault(key, engine)
+
 class StorageEngine:
     """
     Manages connections to ArcticDB (Historical) and Redis (Live).
     """
     def __init__(self, arctic_uri: str = None, redis_host: str = "localhost", redis_port: int = 6379):
-        if arctic_uri is None:
-            # Default to src/data/arctic_data relative to this file
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            data_dir = os.path.join(base_dir, "arctic_data")
-            self.arctic_uri = f"lmdb://{data_dir}"
-        else:
-            self.arctic_uri = arctic_uri
-            
+        # Default to ARCTIC_URI, else src/data/arctic_data relative to this file
+        self.arctic_uri = arctic_uri or default_arctic_uri()
         self.redis_host = redis_host
         self.redis_port = redis_port
         self._arctic: Optional[Any] = None
+        self._libraries: Optional[ArcticLibraries] = None
         self._redis: Optional[Any] = None
 
     def connect(self):
-        """Initializes database connections."""
+        """Attaches to the shared ArcticDB instance and Redis pool (created on first use)."""
         if arcticdb:
             try:
-                self._arctic = arcticdb.Arctic(self.arctic_uri)
+                self._libraries = get_arctic(self.arctic_uri)
+                self._arctic = self._libraries.arctic
                 logger.info(f"Connected to ArcticDB at {self.arctic_uri}")
             except Exception as e:
                 logger.error(f"Failed to connect to ArcticDB: {e}")
@@ -54,7 +218,7 @@ class StorageEngine:
 
         if redis:
             try:
-                self._redis = redis.Redis(host=self.redis_host, port=self.redis_port, decode_responses=True)
+                self._redis = get_redis(self.redis_host, self.redis_port)
                 self._redis.ping()
                 logger.info(f"Connected to Redis at {self.redis_host}:{self.redis_port}")
             except Exception as e:
@@ -63,19 +227,291 @@ class StorageEngine:
         else:
             logger.warning("Redis library not found.")
 
+    @property
+    def redis(self):
+        """The pooled Redis client (None if Redis is unavailable)."""
+        return self._redis
+
     def get_library(self, library_name: str, create_if_missing: bool = False):
-        """Target for ArcticDB library retrieval."""
-        if not self._arctic:
+        """Target for ArcticDB library retrieval. Handles are cached process-wide."""
+        if not self._libraries:
+            raise ConnectionError("ArcticDB not connected")
+        return self._libraries.get(library_name, create_if_missing)
+
+    def list_libraries(self) -> list:
+        if not self._libraries:
+            raise ConnectionError("ArcticDB not connected")
+        return sorted(self._libraries.names())
+
+    def delete_library(self, library_name: str):
+        if not self._libraries:
             raise ConnectionError("ArcticDB not connected")
-        
-        if library_name not in self._arctic.list_libraries():
-            if create_if_missing:
-                self._arctic.create_library(library_name)
-                logger.info(f"Created ArcticDB library: {library_name}")
+        self._libraries.delete(library_name)
+        if STATS_LIBRARY in self._libraries.names():
+            stats_lib = self.get_library(STATS_LIBRARY)
+            prefix = stats_key(library_name, "")
+            stale = [key for key in stats_lib.list_symbols() if key.startswith(prefix)]
+            if stale:
+                stats_lib.delete_batch(stale)
+
+    def write_frame(self, library_name: str, symbol: str, df: pd.DataFrame, digits: Optional[int] = None,
+                    mode: str = "write", metadata: Optional[dict] = None):
+        """
+        Writes OHLCV data. With `digits` set, prices are stored compactly as integer
+        ticks and the scale is kept in the symbol metadata.
+        mode: 'write' (new version), 'append' or 'update'.
+        `metadata` is stored with the new version (merged with the tick encoding).
+        """
+        lib = self.get_library(library_name, create_if_missing=True)
+        extra, metadata = metadata, None
+        if digits is None and mode != "write" and lib.has_symbol(symbol):
+            # Appends/updates keep the encoding of the existing symbol
+            existing = lib.read_metadata(symbol).metadata
+            if existing and existing.get("price_encoding") == "ticks":
+                digits = int(existing["digits"])
+        if digits is not None:
+            df, metadata = encode_price_ticks(df, digits)
+        if extra:
+            metadata = {**(metadata or {}), **extra}
+        if mode == "write":
+            result = lib.write(symbol, df, metadata=metadata)
+        elif mode == "append":
+            result = lib.append(symbol, df, metadata=metadata)
+        elif mode == "update":
+            result = lib.update(symbol, df, metadata=metadata)
+        else:
+            raise ValueError(f"Unknown write mode: {mode}")
+        self._record_stats(library_name, {symbol: df}, mode, {symbol: getattr(result, "version", None)})
+        return result
+
+    def stage_frame(self, library_name: str, symbol: str, df: pd.DataFrame, digits: Optional[int] = None):
+        """
+        Stages a chunk of a rewrite of `symbol`: stored, but invisible to readers
+        until `finalize_staged`. Chunks must be sorted and must not overlap.
+        """
+        lib = self.get_library(library_name, create_if_missing=True)
+        if digits is not None:
+            df, _ = encode_price_ticks(df, digits)
+        if hasattr(lib, "stage"):
+            lib.stage(symbol, df)
+        else:
+            lib.write(symbol, df, staged=True)
+
+    def finalize_staged(self, library_name: str, symbol: str, digits: Optional[int] = None,
+                        metadata: Optional[dict] = None):
+        """Publishes the staged chunks of `symbol` as one new version that replaces its data."""
+        lib = self.get_library(library_name)
+        if digits is not None:
+            metadata = {"price_encoding": "ticks", "digits": digits, "scale": 10 ** digits, **(metadata or {})}
+        result = lib.finalize_staged_data(symbol, mode=arcticdb.StagedDataFinalizeMethod.WRITE, metadata=metadata)
+        try:
+            self.rebuild_stats(library_name, [symbol])
+        except Exception as e:
+            logger.warning(f"Stats index update for {library_name}/{symbol} failed: {e}")
+        return result
+
+    def delete_staged(self, library_name: str, symbol: str):
+        """Discards staged chunks of `symbol` (an abandoned rewrite); the stored data is untouched."""
+        try:
+            lib = self.get_library(library_name)
+        except ValueError:
+            return
+        lib.delete_staged_data(symbol)
+
+    def last_timestamp(self, library_name: str, symbol: str) -> Optional[pd.Timestamp]:
+        """Returns the last stored index value of a symbol (None if missing or empty)."""
+        lib = self.get_library(library_name)
+        if not lib.has_symbol(symbol):
+            return None
+        tail = lib.tail(symbol, 1).data
+        if tail.empty:
+            return None
+        ts = tail.index[-1]
+        return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+    def last_timestamps(self, library_name: str, symbols: list) -> dict:
+        """
+        Last stored index value of many symbols from one batched description read
+        ({symbol: Timestamp or None}; None if missing, empty or unreadable).
+        """
+        out = dict.fromkeys(symbols)
+        try:
+            lib = self.get_library(library_name)
+        except ValueError:
+            return out
+        stored = set(lib.list_symbols())
+        present = [s for s in symbols if s in stored]
+        for symbol, desc in zip(present, lib.get_description_batch(present) if present else []):
+            end = desc.date_range[1] if hasattr(desc, "date_range") else None
+            if end is not None and not pd.isna(end):
+                ts = pd.Timestamp(end)
+                out[symbol] = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+        return out
+
+    def write_frames(self, library_name: str, frames: dict, mode: str = "write") -> dict:
+        """
+        Batch write ('write') or append ('append') of {symbol: DataFrame} in one
+        ArcticDB call. Failures do not raise; returns {symbol: error} for them.
+        """
+        if not frames:
+            return {}
+        lib = self.get_library(library_name, create_if_missing=True)
+        payloads = [arcticdb.WritePayload(symbol, df) for symbol, df in frames.items()]
+        if mode == "write":
+            results = lib.write_batch(payloads)
+        elif mode == "append":
+            results = lib.append_batch(payloads)
+        else:
+            raise ValueError(f"Unknown batch write mode: {mode}")
+        errors = {payload.symbol: str(getattr(result, "exception_string", result))
+                  for payload, result in zip(payloads, results) if isinstance(result, arcticdb.DataError)}
+        self._record_stats(library_name, {s: df for s, df in frames.items() if s not in errors}, mode,
+                           {p.symbol: getattr(r, "version", None) for p, r in zip(payloads, results)})
+        return errors
+
+    # Stats index: rows, start, end, rows per day and last write time per symbol,
+    # kept in STATS_LIBRARY and folded forward from every frame written above, so
+    # inventories read one small record per symbol instead of the data. Each
+    # record carries the data version it describes: a write is only folded into
+    # the record of the version before it, anything else is recounted, and a
+    # record behind the symbol's latest version (lost to a concurrent writer in
+    # another process) is reported as stale.
+
+    def symbol_stats(self, library_name: str, symbols: Optional[list] = None, reindex_stale: bool = False) -> dict:
+        """
+        {symbol: {"rows", "start", "end", "last_write", "version", "stale"}} from
+        the stats index, one batched metadata read of each library. Symbols
+        without a record are left out (see `rebuild_stats`); with
+        `reindex_stale`, stale records are rebuilt before they are returned.
+        """
+        try:
+            stats_lib = self.get_library(STATS_LIBRARY)
+        except ValueError:
+            return {}
+        prefix = stats_key(library_name, "")
+        if symbols is None:
+            keys = sorted(key for key in stats_lib.list_symbols() if key.startswith(prefix))
+        else:
+            keys = [stats_key(library_name, symbol) for symbol in symbols]
+        out = {}
+        for key, item in zip(keys, stats_lib.read_metadata_batch(keys) if keys else []):
+            meta = getattr(item, "metadata", None)
+            if isinstance(item, arcticdb.DataError) or not meta:
+                continue
+            out[key[len(prefix):]] = {**meta, "start": _utc(meta.get("start")), "end": _utc(meta.get("end")),
+                                      "last_write": _utc(meta.get("last_write"))}
+        self._flag_stale(library_name, out)
+        stale = [symbol for symbol, record in out.items() if record["stale"]]
+        if reindex_stale and stale:
+            logger.info(f"Re-indexing {len(stale)} stale stats records of {library_name}")
+            self.rebuild_stats(library_name, stale)
+            out.update(self.symbol_stats(library_name, stale))
+        return out
+
+    def _flag_stale(self, library_name: str, records: dict):
+        """Marks records whose version is not the symbol's latest version."""
+        symbols = list(records)
+        try:
+            items = self.get_library(library_name).read_metadata_batch(symbols) if symbols else []
+        except ValueError:
+            items = [None] * len(symbols)
+        for symbol, item in zip(symbols, items):
+            latest = None if item is None or isinstance(item, arcticdb.DataError) else getattr(item, "version", None)
+            records[symbol]["stale"] = latest is None or records[symbol].get("version") != latest
+
+    def daily_counts(self, library_name: str, symbol: str) -> pd.Series:
+        """Rows per UTC day of a symbol from the stats index (empty if it has no record)."""
+        try:
+            return self.get_library(STATS_LIBRARY).read(stats_key(library_name, symbol)).data["rows"]
+        except Exception:
+            return day_counts(pd.DatetimeIndex([]))
+
+    def rebuild_stats(self, library_name: str, symbols: Optional[list] = None) -> int:
+        """
+        Recomputes stats records from the stored indexes (index-only reads), for
+        data written before the index existed or outside StorageEngine. Returns
+        the number of symbols indexed.
+        """
+        lib = self.get_library(library_name)
+        symbols = lib.list_symbols() if symbols is None else symbols
+        for symbol in symbols:
+            self._update_stats(library_name, {symbol: None}, "rebuild", {symbol: None})
+        return len(symbols)
+
+    def _stored_index(self, library_name: str, symbol: str, start=None, end=None) -> pd.DatetimeIndex:
+        date_range = (start, end) if start is not None else None
+        return self.get_library(library_name).read(symbol, date_range=date_range, columns=[]).data.index
+
+    def _record_stats(self, library_name: str, frames: dict, mode: str, versions: dict):
+        """Folds freshly written frames into the stats index; a failure here never fails the write."""
+        frames = {s: df for s, df in frames.items() if isinstance(df.index, pd.DatetimeIndex)}
+        if not frames or library_name == STATS_LIBRARY:
+            return
+        try:
+            self._update_stats(library_name, frames, mode, versions)
+        except Exception as e:
+            logger.warning(f"Stats index update for {library_name} failed: {e}")
+
+    def _update_stats(self, library_name: str, frames: dict, mode: str, versions: dict):
+        stats_lib = self.get_library(STATS_LIBRARY, create_if_missing=True)
+        keys = {symbol: stats_key(library_name, symbol) for symbol in frames}
+        previous = {}
+        if mode in ("append", "update"):
+            for symbol, item in zip(frames, stats_lib.read_batch([keys[s] for s in frames])):
+                if not isinstance(item, arcticdb.DataError):
+                    previous[symbol] = item
+
+        payloads = []
+        for symbol, df in frames.items():
+            prev = previous.get(symbol)
+            version = versions.get(symbol)
+            if prev is not None and not len(df):
+                continue
+            if prev is not None and version is not None and prev.metadata.get("version") != version - 1:
+                # Another writer got in between: the record cannot be folded forward
+                prev = None
+            if mode == "write":
+                counts, start, end = day_counts(df.index), df.index.min(), df.index.max()
+            elif prev is None:
+                # Not indexed yet, out of step, or an explicit rebuild: one index-only read of the stored data
+                item = self.get_library(library_name).read(symbol, columns=[])
+                stored, version = item.data.index, getattr(item, "version", version)
+                counts, start, end = day_counts(stored), stored.min(), stored.max()
+            elif mode == "append":
+                counts = prev.data["rows"].add(day_counts(df.index), fill_value=0).astype(np.int64)
+                start = prev.metadata.get("start") or df.index.min()
+                end = df.index.max() if len(df) else prev.metadata.get("end")
             else:
-                raise ValueError(f"Library {library_name} does not exist")
-        
-        return self._arctic[library_name]
+                # An update replaces a range: recount the days it touched from the stored data
+                touched = day_counts(df.index)
+                first, last = touched.index[0], touched.index[-1] + pd.Timedelta(days=1) - pd.Timedelta(1)
+                old = prev.data["rows"]
+                counts = pd.concat([old[(old.index < first) | (old.index > last)],
+                                    day_counts(self._stored_index(library_name, symbol, first, last))]).sort_index()
+                start = min(_utc(prev.metadata.get("start")) or first, _utc(df.index.min()))
+                end = max(_utc(prev.metadata.get("end")) or last, _utc(df.index.max()))
+            counts = counts[counts > 0]
+            meta = {
+                "rows": int(counts.sum()),
+                "start": _utc(start).isoformat() if len(counts) else None,
+                "end": _utc(end).isoformat() if len(counts) else None,
+                "last_write": pd.Timestamp.now(tz="UTC").isoformat(),
+                "version": version,
+            }
+            payloads.append(arcticdb.WritePayload(keys[symbol], counts.rename("rows").to_frame(), metadata=meta))
+        stats_lib.write_batch(payloads, prune_previous_versions=True)
+
+    def read_metadata(self, library_name: str, symbol: str) -> Optional[dict]:
+        """Returns the metadata of the latest version of a symbol (None if missing)."""
+        lib = self.get_library(library_name)
+        if not lib.has_symbol(symbol):
+            return None
+        return lib.read_metadata(symbol).metadata
+
+    def read_frame(self, library_name: str, symbol: str, **kwargs) -> pd.DataFrame:
+        """Reads a symbol, converting integer-tick prices back to floats when needed."""
+        item = self.get_library(library_name).read(symbol, **kwargs)
+        return decode_price_ticks(item.data, item.metadata)
 
     def set_live_value(self, key: str, value: str):
         """Sets a value in Redis."""
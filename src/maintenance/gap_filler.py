@@ -15,19 +15,28 @@ class GapFiller:
     def check_for_gaps(self, library: str, symbol: str, expected_freq: str = '1T') -> pd.DatetimeIndex:
         """
         Identifies missing timestamps in the data.
+        With a stats record, only days whose row count falls short of the
+        expected bars are read (index only); complete and empty days are not.
         """
         try:
             lib = self.storage.get_library(library)
-            if symbol not in lib.list_symbols():
+            if not lib.has_symbol(symbol):
                 logger.warning(f"Symbol {symbol} not found in {library}")
                 return pd.DatetimeIndex([])
 
-            df = lib.read(symbol).data
-            if df.empty:
+            stats = self.storage.symbol_stats(library, [symbol], reindex_stale=True).get(symbol)
+            if stats is None:
+                df = lib.read(symbol).data
+                if df.empty:
+                    return pd.DatetimeIndex([])
+                full_idx = pd.date_range(start=df.index.min(), end=df.index.max(), freq=expected_freq, tz='UTC')
+                missing_dates = full_idx.difference(df.index)
+            elif not stats["rows"]:
                 return pd.DatetimeIndex([])
-
-            full_idx = pd.date_range(start=df.index.min(), end=df.index.max(), freq=expected_freq, tz='UTC')
-            missing_dates = full_idx.difference(df.index)
+            else:
+                full_idx = pd.date_range(start=stats["start"], end=stats["end"], freq=expected_freq, tz='UTC')
+                missing_dates = self._missing_from_counts(lib, symbol, full_idx,
+                                                          self.storage.daily_counts(library, symbol))
             
             if not missing_dates.empty:
                 logger.info(f"Found {len(missing_dates)} missing bars for {symbol}")
@@ -38,6 +47,23 @@ class GapFiller:
             logger.error(f"Error checking gaps for {symbol}: {e}")
             return pd.DatetimeIndex([])
 
+    @staticmethod
+    def _missing_from_counts(lib, symbol: str, full_idx: pd.DatetimeIndex, counts: pd.Series) -> pd.DatetimeIndex:
+        expected = pd.Series(1, index=full_idx).groupby(full_idx.floor('D')).size()
+        stored = counts.reindex(expected.index, fill_value=0)
+        partial = expected.index[(stored > 0) & (stored < expected)]
+        # Days without a single bar are missing whole; complete days need no read
+        missing = full_idx[~full_idx.floor('D').isin(expected.index[stored >= expected])]
+        if len(partial):
+            # Contiguous partial days are read as one range
+            runs = (pd.Series(partial).diff() != pd.Timedelta(days=1)).cumsum()
+            present = []
+            for _, run in pd.Series(partial).groupby(runs.to_numpy()):
+                end = run.iloc[-1] + pd.Timedelta(days=1) - pd.Timedelta(1)
+                present.append(lib.read(symbol, date_range=(run.iloc[0], end), columns=[]).data.index)
+            missing = missing.difference(present[0].append(present[1:]) if len(present) > 1 else present[0])
+        return missing
+
     def fill_gaps(self, library: str, symbol: str, method: str = 'ffill'):
         """
         Fills gaps using interpolation or forward fill.
@@ -0,0 +1,139 @@
+"""
+Latency histograms for the live tick pipeline.
+
+LatencyHistogram is an HDR-style log-linear histogram over integer microseconds:
+exact below 64us, then 32 sub-buckets per power of two (about 3% relative
+error), so recording is a few integer operations and percentiles are a walk
+over under a thousand counters. LatencyRecorder keeps one histogram per
+(symbol, stage) and turns them into interval snapshots for the dashboard.
+Stdlib only, so the dashboard can import it without the ingest dependencies.
+"""
+import threading
+import time
+
+SUB_BITS = 6
+SUB_COUNT = 1 << SUB_BITS   # Exact values below this
+HALF_COUNT = SUB_COUNT // 2 # Sub-buckets per power of two above it
+MAX_LATENCY_US = 60_000_000 # Larger samples are clamped into the last bucket
+
+PERCENTILES = (("p50", 50.0), ("p99", 99.0), ("p999", 99.9))
+
+def bucket_index(value_us: int) -> int:
+    if value_us < SUB_COUNT:
+        return value_us if value_us > 0 else 0
+    shift = value_us.bit_length() - SUB_BITS
+    return SUB_COUNT + (shift - 1) * HALF_COUNT + (value_us >> shift) - HALF_COUNT
+
+def bucket_value(index: int) -> int:
+    """Midpoint of a bucket, in microseconds."""
+    if index < SUB_COUNT:
+        return index
+    shift = (index - SUB_COUNT) // HALF_COUNT + 1
+    mantissa = (index - SUB_COUNT) % HALF_COUNT + HALF_COUNT
+    return (mantissa << shift) + (1 << (shift - 1))
+
+_BUCKETS = bucket_index(MAX_LATENCY_US) + 1
+
+class LatencyHistogram:
+    """
+    Fixed-size log-linear histogram. `record` is not locked: each histogram is
+    meant to be written by a single thread (one pipeline stage); concurrent
+    readers see approximate counts.
+    """
+    __slots__ = ("counts", "count", "total_us", "max_us")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(self, seconds: float):
+        value = int(seconds * 1_000_000)
+        if value > MAX_LATENCY_US:
+            value = MAX_LATENCY_US
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total_us += value
+        if value > self.max_us:
+            self.max_us = value
+
+    def merge(self, other: "LatencyHistogram"):
+        counts = self.counts
+        for i, n in enumerate(other.counts):
+            if n:
+                counts[i] += n
+        self.count += other.count
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, q: float) -> int:
+        """Value (us) at or below which `q` percent of the samples fall."""
+        if not self.count:
+            return 0
+        rank = max(1, int(round(q / 100.0 * self.count)))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bucket_value(i), self.max_us)
+        return self.max_us
+
+    def summary(self) -> dict:
+        out = {"count": self.count, "mean": self.total_us // self.count if self.count else 0, "max": self.max_us}
+        for name, q in PERCENTILES:
+            out[name] = self.percentile(q)
+        return out
+
+class LatencyRecorder:
+    """
+    Per-symbol, per-stage latency histograms plus throughput.
+
+    Stages are named by the caller (the ingestor uses network, parse, callback
+    and redis, each measured from the receive time). `snapshot` returns the
+    figures for the interval since the previous snapshot and starts a new one;
+    histograms are swapped rather than cleared, so a sample racing the swap
+    lands in the old interval instead of corrupting the new one.
+    """
+    def __init__(self):
+        self._hists = {}
+        self._lock = threading.Lock()  # Only guards histogram creation and swaps
+        self._since = time.monotonic()
+
+    def histogram(self, symbol: str, stage: str) -> LatencyHistogram:
+        key = (symbol, stage)
+        hist = self._hists.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self._hists.setdefault(key, LatencyHistogram())
+        return hist
+
+    def record(self, symbol: str, stage: str, seconds: float):
+        self.histogram(symbol, stage).record(seconds)
+
+    def snapshot(self, reset: bool = True) -> dict:
+        """
+        {"interval": s, "stages": {stage: summary}, "symbols": {symbol: {"tps": rate,
+        "stages": {stage: summary}}}}; latencies in microseconds. A symbol's tps is
+        the sample rate of its busiest stage.
+        """
+        now = time.monotonic()
+        with self._lock:
+            hists = self._hists
+            since = self._since
+            if reset:
+                self._hists = {}
+                self._since = now
+        interval = max(now - since, 1e-9)
+
+        symbols, totals = {}, {}
+        for (symbol, stage), hist in sorted(hists.items()):
+            entry = symbols.setdefault(symbol, {"tps": 0.0, "stages": {}})
+            entry["stages"][stage] = hist.summary()
+            entry["tps"] = max(entry["tps"], round(hist.count / interval, 2))
+            totals.setdefault(stage, LatencyHistogram()).merge(hist)
+        return {
+            "interval": round(interval, 3),
+            "stages": {stage: hist.summary() for stage, hist in totals.items()},
+            "symbols": symbols,
+        }
@@ -0,0 +1,106 @@
+"""
+Codec for live ticks in the `tick:{symbol}` Redis streams.
+
+Two entry schemas exist:
+  - legacy: string fields {symbol, price, timestamp[, ask]}
+  - compact: one binary field `t` holding a fixed-width little-endian record
+    (version, bid, ask, exchange ts, receive ts). Prices are integer ticks in
+    cTrader's native 1/100000 unit; the symbol is implied by the stream key.
+
+Compact entries are binary, so read them with a Redis client created with
+decode_responses=False. `decode_entry` accepts either schema (bytes or str
+keys), so readers work during a migration. Stdlib only, so the dashboard can
+import it without the ingest dependencies.
+"""
+import struct
+from datetime import datetime, timezone
+from typing import Optional
+
+TICK_SCALE = 100000  # Price ticks per unit (cTrader sends every price in 1/100000)
+NO_PRICE = 0         # Encoded when a side is unknown (prices are always positive)
+COMPACT_VERSION = 1
+COMPACT_FIELD = "t"
+
+# version, bid ticks, ask ticks, exchange ts (ms since epoch, 0 = unknown), receive ts (us since epoch)
+TICK_STRUCT = struct.Struct("<Bqqqq")
+
+def stream_key(symbol: str, prefix: str = "tick:") -> str:
+    return f"{prefix}{symbol}"
+
+def symbol_from_key(key) -> str:
+    if isinstance(key, bytes):
+        key = key.decode()
+    return key.split(":", 1)[-1]
+
+def _to_ticks(price: Optional[float]) -> int:
+    return NO_PRICE if price is None else int(round(price * TICK_SCALE))
+
+def _from_ticks(ticks: int) -> Optional[float]:
+    return None if ticks == NO_PRICE else ticks / TICK_SCALE
+
+def _epoch_us(ts: datetime) -> int:
+    return int(round(ts.timestamp() * 1_000_000))
+
+def encode_compact(bid: Optional[float], ask: Optional[float], receive_ts: datetime,
+                   exchange_ts_ms: Optional[int] = None) -> bytes:
+    """Packs one tick into a TICK_STRUCT.size-byte record."""
+    return TICK_STRUCT.pack(COMPACT_VERSION, _to_ticks(bid), _to_ticks(ask),
+                            exchange_ts_ms or 0, _epoch_us(receive_ts))
+
+def encode_entry(symbol: str, bid: Optional[float], ask: Optional[float], receive_ts: datetime,
+                 exchange_ts_ms: Optional[int] = None, compact: bool = False) -> dict:
+    """Builds the XADD field dict for one tick in either schema."""
+    if compact:
+        return {COMPACT_FIELD: encode_compact(bid, ask, receive_ts, exchange_ts_ms)}
+    entry = {"symbol": symbol, "price": str(bid), "timestamp": receive_ts.isoformat()}
+    if ask is not None:
+        entry["ask"] = str(ask)
+    if exchange_ts_ms:
+        entry["exchange_ts"] = str(exchange_ts_ms)
+    return entry
+
+def decode_compact(data: bytes) -> dict:
+    version, bid, ask, exchange_ms, receive_us = TICK_STRUCT.unpack(data)
+    if version != COMPACT_VERSION:
+        raise ValueError(f"Unsupported compact tick version {version}")
+    return {
+        "bid": _from_ticks(bid),
+        "ask": _from_ticks(ask),
+        "exchange_ts": datetime.fromtimestamp(exchange_ms / 1000, timezone.utc) if exchange_ms else None,
+        "timestamp": datetime.fromtimestamp(receive_us / 1_000_000, timezone.utc),
+    }
+
+def decode_entry(fields: dict) -> dict:
+    """
+    Decodes one stream entry of either schema into
+    {'bid', 'ask', 'exchange_ts', 'timestamp'} (plus 'symbol' for legacy entries).
+    """
+    compact = fields.get(COMPACT_FIELD.encode(), fields.get(COMPACT_FIELD))
+    if compact is not None:
+        return decode_compact(compact)
+
+    def get(name):
+        value = fields.get(name.encode(), fields.get(name))
+        return value.decode() if isinstance(value, bytes) else value
+
+    ask, exchange = get("ask"), get("exchange_ts")
+    return {
+        "symbol": get("symbol"),
+        "bid": float(get("price")),
+        "ask": float(ask) if ask is not None else None,
+        "exchange_ts": datetime.fromtimestamp(int(exchange) / 1000, timezone.utc) if exchange else None,
+        "timestamp": datetime.fromisoformat(get("timestamp")),
+    }
+
+def decode_compact_batch(records: list) -> list:
+    """
+    Bulk-decodes compact records into (bid, ask, exchange_ms, receive_us) tuples
+    with prices as floats. Raw epoch integers are kept, so large reads never
+    build per-tick datetime objects.
+    """
+    out = []
+    for version, bid, ask, exchange_ms, receive_us in TICK_STRUCT.iter_unpack(b"".join(records)):
+        if version != COMPACT_VERSION:
+            raise ValueError(f"Unsupported compact tick version {version}")
+        out.append((_from_ticks(bid), _from_ticks(ask), exchange_ms, receive_us))
+    return out
@@ -0,0 +1,46 @@
+"""
+Verification script for the tick latency histograms.
+Checks bucket precision and percentiles against exact values.
+"""
+import os
+import sys
+import random
+import logging
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.latency import LatencyHistogram, LatencyRecorder, bucket_index, bucket_value, MAX_LATENCY_US
+
+logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+def test_bucket_precision():
+    for value in [0, 1, 63, 64, 65, 127, 128, 1000, 123456, MAX_LATENCY_US]:
+        assert abs(bucket_value(bucket_index(value)) - value) <= max(1, value * 0.035), value
+    assert all(bucket_index(v) <= bucket_index(v + 1) for v in range(100000))
+
+def test_percentiles():
+    rng = random.Random(7)
+    samples = sorted(rng.expovariate(1 / 500e-6) for _ in range(20000))
+    hist = LatencyHistogram()
+    for s in samples:
+        hist.record(s)
+    for q in (50.0, 99.0, 99.9):
+        exact = samples[int(q / 100 * len(samples)) - 1] * 1_000_000
+        assert abs(hist.percentile(q) - exact) <= exact * 0.05, (q, hist.percentile(q), exact)
+
+def test_snapshot_resets():
+    rec = LatencyRecorder()
+    for _ in range(10):
+        rec.record("EURUSD", "parse", 20e-6)
+        rec.record("USDJPY", "redis", 2e-3)
+    snap = rec.snapshot()
+    assert snap["symbols"]["EURUSD"]["stages"]["parse"]["p50"] == 20
+    assert snap["stages"]["redis"]["count"] == 10
+    assert rec.snapshot()["symbols"] == {}
+
+if __name__ == "__main__":
+    test_bucket_precision()
+    test_percentiles()
+    test_snapshot_resets()
+    logger.info("Latency histogram verification passed.")
@@ -0,0 +1,75 @@
+"""
+Verification script for the in-memory L2 order book.
+Replays random deltas and ccxt-style full books against a dict reference.
+"""
+import os
+import sys
+import random
+import logging
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.data.ingest.order_book import OrderBook
+
+logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+def _top(levels: dict, n: int, bids: bool) -> list:
+    return [list(x) for x in sorted(levels.items(), reverse=bids)[:n]]
+
+def test_deltas_match_reference():
+    rng = random.Random(1)
+    book = OrderBook("TEST", max_levels=1000)
+    bids, asks = {100.0 - i: 1.0 for i in range(20)}, {101.0 + i: 1.0 for i in range(20)}
+    book.apply_snapshot([[p, s] for p, s in bids.items()], [[p, s] for p, s in asks.items()], nonce=1)
+    for nonce in range(2, 5000):
+        is_bid = rng.random() < 0.5
+        price = float(100 - rng.randint(0, 60)) if is_bid else float(101 + rng.randint(0, 60))
+        size = 0 if rng.random() < 0.3 else float(rng.randint(1, 9))
+        book.apply_update([[price, size]] if is_bid else [], [] if is_bid else [[price, size]], nonce, nonce)
+        ref = bids if is_bid else asks
+        if size:
+            ref[price] = size
+        else:
+            ref.pop(price, None)
+    assert book.bids.top(25) == _top(bids, 25, True)
+    assert book.asks.top(25) == _top(asks, 25, False)
+
+def test_gap_buffers_until_snapshot():
+    book = OrderBook("TEST")
+    book.apply_snapshot([[100.0, 1.0]], [[101.0, 1.0]], nonce=10)
+    assert not book.apply_update([[99.0, 2.0]], [], 15, 15)
+    assert not book.synced and book.resyncs == 1
+    book.apply_snapshot([[100.0, 1.0]], [[101.0, 1.0]], nonce=14)
+    assert book.synced and book.bids.top(2) == [[100.0, 1.0], [99.0, 2.0]]
+
+def test_reconcile_with_level_cap():
+    rng = random.Random(2)
+    book = OrderBook("TEST", max_levels=30)
+    for _ in range(500):
+        bids = {float(100 - rng.randint(0, 60)): rng.randint(1, 9) for _ in range(40)}
+        asks = {float(101 + rng.randint(0, 60)): rng.randint(1, 9) for _ in range(40)}
+        top_bids, top_asks = _top(bids, 20, True), _top(asks, 20, False)
+        book.reconcile(top_bids, top_asks)
+        assert book.bids.top(20) == top_bids and book.asks.top(20) == top_asks
+        assert len(book.bids) <= 30 and len(book.asks) <= 30
+    # Only the levels that differ are applied
+    assert book.reconcile(top_bids, top_asks) == 0
+    top_bids[3] = [top_bids[3][0], top_bids[3][1] + 1]
+    assert book.reconcile(top_bids, top_asks[1:]) == 2
+    assert book.bids.top(20) == top_bids and book.asks.top(19) == top_asks[1:]
+
+def test_metrics():
+    book = OrderBook("TEST")
+    book.apply_snapshot([[100.0, 3.0]], [[102.0, 1.0]])
+    m = book.metrics()
+    assert m["spread"] == 2.0 and m["mid"] == 101.0
+    assert m["microprice"] == (100.0 * 1.0 + 102.0 * 3.0) / 4.0
+    assert m["imbalance"] == 0.5
+
+if __name__ == "__main__":
+    test_deltas_match_reference()
+    test_gap_buffers_until_snapshot()
+    test_reconcile_with_level_cap()
+    test_metrics()
+    logger.info("Order book verification passed.")
@@ -0,0 +1,80 @@
+"""
+Verification script for the raw trendbar payload archive and its replay.
+Writes synthetic ProtoOAGetTrendbarsRes payloads to a temporary archive and decodes them back.
+"""
+import os
+import sys
+import gzip
+import logging
+import tempfile
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOAGetTrendbarsRes
+from src.data.ingest.ctrader import decode_trendbars
+from src.data.ingest.payload_archive import PayloadArchive, replay_trendbars, read_segment
+
+logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+BASE = int(datetime(2025, 1, 2, tzinfo=timezone.utc).timestamp() // 60)
+
+def _payload(first: int, n: int, low: int = 108000) -> bytes:
+    res = ProtoOAGetTrendbarsRes(ctidTraderAccountId=1, period=1, timestamp=0, symbolId=1)
+    for i in range(first, first + n):
+        bar = res.trendbar.add()
+        bar.low, bar.deltaOpen, bar.deltaClose, bar.deltaHigh = low + i % 50, 3, 5, 9
+        bar.volume, bar.utcTimestampInMinutes = 100 + i, BASE + i
+    return res.SerializeToString()
+
+def test_archive_and_replay():
+    with tempfile.TemporaryDirectory() as root:
+        archive = PayloadArchive(root, segment_bytes=20000)
+        windows = [(0, 1000), (1000, 1000), (1500, 1000)]  # The last window overlaps the second
+        for first, n in windows:
+            archive.append("EURUSD", "m1", (BASE + first) * 60000, (BASE + first + n) * 60000, _payload(first, n),
+                           symbol_id=1, digits=5)
+        archive.append("GBPUSD", "m1", BASE * 60000, (BASE + 10) * 60000, _payload(0, 10), symbol_id=2, digits=5)
+        archive.close()
+        assert archive.records == 4 and archive.symbols() == ["EURUSD", "GBPUSD"]
+        assert len(archive.segments("EURUSD")) > 1, "segments rotate"
+
+        metas = [meta for meta, _ in archive.read("EURUSD")]
+        assert [m["from"] for m in metas] == [(BASE + f) * 60000 for f, _ in windows] and metas[0]["digits"] == 5
+
+        df = replay_trendbars(archive, "EURUSD")
+        assert len(df) == 2500 and df.index.is_unique and df.index.is_monotonic_increasing
+        reference = decode_trendbars(ProtoOAGetTrendbarsRes.FromString(_payload(0, 2500)).trendbar, digits=5)
+        assert df.equals(reference)
+
+        # A changed parser is applied on replay
+        rescaled = replay_trendbars(archive, "EURUSD", decoder=lambda res, meta: decode_trendbars(res.trendbar, divider=10.0))
+        assert abs(rescaled["low"].iloc[0] - 10800.0) < 1e-9
+
+def test_truncated_segment():
+    with tempfile.TemporaryDirectory() as root:
+        archive = PayloadArchive(root)
+        for i in range(5):
+            archive.append("EURUSD", "m1", 0, 0, _payload(i * 100, 100))
+        archive.close()
+        path = archive.segments("EURUSD")[0]
+        raw = gzip.decompress(open(path, "rb").read())
+        with gzip.open(path, "wb") as f:
+            f.write(raw[:-10]) # Last record cut short
+        assert len(list(read_segment(path))) == 4
+
+def test_dropped_ranges():
+    with tempfile.TemporaryDirectory() as root:
+        archive = PayloadArchive(root, maxsize=1)
+        archive._thread = object()  # No writer: the second append overflows the queue
+        archive.append("EURUSD", "m1", 0, 60000, _payload(0, 1))
+        archive.append("EURUSD", "m1", 60000, 120000, _payload(1, 1))
+        assert archive.dropped == 1
+        archive._record_dropped()
+        assert archive.dropped_ranges("EURUSD") == [(60000, 120000)] and archive.dropped_ranges("GBPUSD") == []
+
+if __name__ == "__main__":
+    for test in (test_archive_and_replay, test_truncated_segment, test_dropped_ranges):
+        test()
+    logger.info("Payload archive verification passed.")
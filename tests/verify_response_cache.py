@@ -0,0 +1,132 @@
+"""
+Verification script for the on-disk response cache behind HistoricalIngestor.
+Uses stub fetchers and a temporary directory (no network). Needs pyarrow.
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.data.ingest import response_cache
+from src.data.ingest.response_cache import ResponseCache
+
+logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+def _daily(start, end):
+    days = pd.date_range(start, end, freq="D", inclusive="left", tz="UTC")
+    return pd.DataFrame({"value": [float(d.day) for d in days]}, index=pd.DatetimeIndex(days, name="timestamp"))
+
+class StubSource:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, start, end):
+        self.calls.append((start, end))
+        return _daily(start, end)
+
+def _cache(root, **kwargs):
+    return ResponseCache(root, **kwargs)
+
+def test_partial_ranges():
+    with tempfile.TemporaryDirectory() as root:
+        cache, source = _cache(root), StubSource()
+        day = pd.Timestamp("2024-01-01", tz="UTC")
+        df = cache.get_range("fred", "DGS10", day, day + pd.Timedelta(days=30), source)
+        assert len(df) == 30 and len(source.calls) == 1
+
+        # Fully covered: no fetch
+        df = cache.get_range("fred", "DGS10", day + pd.Timedelta(days=5), day + pd.Timedelta(days=10), source)
+        assert len(df) == 5 and len(source.calls) == 1 and cache.hits == 1
+
+        # Overlapping on both sides: only the two uncovered sub-ranges are fetched
+        df = cache.get_range("fred", "DGS10", day - pd.Timedelta(days=10), day + pd.Timedelta(days=40), source)
+        assert len(df) == 50 and df.index.is_unique and df.index.is_monotonic_increasing
+        assert source.calls[1:] == [(day - pd.Timedelta(days=10), day), (day + pd.Timedelta(days=30), day + pd.Timedelta(days=40))]
+        assert len(cache._index[cache.key("fred", "DGS10")]) == 1, "pieces are merged into one segment"
+
+        # A second cache instance (another process) reads the same index
+        other = _cache(root)
+        df = other.get_range("fred", "DGS10", day, day + pd.Timedelta(days=20), source)
+        assert len(df) == 20 and len(source.calls) == 3
+
+def test_empty_and_failed_fetches():
+    with tempfile.TemporaryDirectory() as root:
+        cache = _cache(root, negative_ttl=0.2)
+        day = pd.Timestamp("2024-01-01", tz="UTC")
+        last = day + pd.Timedelta(days=10)  # Last observation of the series
+        source = StubSource()
+        sparse = lambda start, end: source(start, min(end, last)) if start < last else source(start, end).iloc[:0]
+        assert len(cache.get_range("yahoo", "AAPL", day, last, sparse)) == 10
+
+        # The tail after the last observation is empty: covered, but only for the negative TTL
+        assert len(cache.get_range("yahoo", "AAPL", day, day + pd.Timedelta(days=20), sparse)) == 10
+        assert len(cache.get_range("yahoo", "AAPL", day, day + pd.Timedelta(days=20), sparse)) == 10
+        assert len(source.calls) == 2
+        time.sleep(0.3)
+        assert len(cache.get_range("yahoo", "AAPL", day, day + pd.Timedelta(days=20), sparse)) == 10
+        assert source.calls[-1] == (last, day + pd.Timedelta(days=20)) and len(source.calls) == 3
+
+        # Failed fetches (None or an exception) are not covered; the other sub-ranges still are
+        failed = lambda start, end: None
+        assert len(cache.get_range("yahoo", "AAPL", day, day + pd.Timedelta(days=30), failed)) == 10
+        def raising(start, end):
+            if start >= day:
+                raise ConnectionError("rate limited")
+            return source(start, end)
+        try:
+            cache.get_range("yahoo", "AAPL", day - pd.Timedelta(days=5), day + pd.Timedelta(days=30), raising)
+            raise AssertionError("the fetch error is re-raised")
+        except ConnectionError:
+            pass
+        df = cache.get_range("yahoo", "AAPL", day - pd.Timedelta(days=5), day + pd.Timedelta(days=30), sparse)
+        assert len(df) == 15 and source.calls[-1] == (day + pd.Timedelta(days=20), day + pd.Timedelta(days=30))
+
+def test_ttl_and_snapshots():
+    with tempfile.TemporaryDirectory() as root:
+        cache, source = _cache(root, ttls={"binance": 0.2}), StubSource()
+        fetch = lambda: source(pd.Timestamp("2024-01-01", tz="UTC"), pd.Timestamp("2024-01-03", tz="UTC"))
+        assert len(cache.get("binance", "BTC/USDT", fetch, timeframe="1d", limit=2)) == 2
+        cache.get("binance", "BTC/USDT", fetch, timeframe="1d", limit=2)
+        assert len(source.calls) == 1
+        cache.get("binance", "BTC/USDT", fetch, timeframe="1h", limit=2)
+        assert len(source.calls) == 2, "parameters are part of the key"
+        time.sleep(0.3)
+        cache.get("binance", "BTC/USDT", fetch, timeframe="1d", limit=2)
+        assert len(source.calls) == 3, "expired entries are refetched"
+
+def test_lru_eviction():
+    with tempfile.TemporaryDirectory() as root:
+        cache, source = _cache(root), StubSource()
+        day = pd.Timestamp("2020-01-01", tz="UTC")
+        for i, symbol in enumerate(["A", "B", "C"]):
+            cache.get_range("yahoo", symbol, day, day + pd.Timedelta(days=300 + i), source)
+        cache.get_range("yahoo", "A", day, day + pd.Timedelta(days=10), source)  # A is now the most recent
+        cache.max_bytes = cache.size() - 1
+        cache.get_range("yahoo", "D", day, day + pd.Timedelta(days=5), source)
+        keys = set(cache._index)
+        assert cache.key("yahoo", "B") not in keys and cache.key("yahoo", "A") in keys, keys
+        parquet = {n for n in os.listdir(root) if n.endswith(".parquet")}
+        assert parquet == cache._referenced(), "evicted files are removed"
+
+def test_ingestor_cache():
+    with tempfile.TemporaryDirectory() as root:
+        from src.data.ingest.historical import HistoricalIngestor
+        ingestor = HistoricalIngestor(cache=_cache(root))
+        source = StubSource()
+        ingestor._download_yahoo = lambda symbol, start, end: source(pd.Timestamp(start, tz="UTC"), pd.Timestamp(end, tz="UTC"))
+        assert len(ingestor.fetch_yahoo("AAPL", "2024-01-01", "2024-02-01")) == 31
+        assert len(ingestor.fetch_yahoo("AAPL", "2024-01-10", "2024-01-20")) == 10
+        assert len(source.calls) == 1
+
+if __name__ == "__main__":
+    if response_cache.pyarrow is None:
+        logger.warning("pyarrow not installed; skipping response cache verification.")
+        sys.exit(0)
+    for test in (test_partial_ranges, test_empty_and_failed_fetches, test_ttl_and_snapshots, test_lru_eviction, test_ingestor_cache):
+        test()
+    logger.info("Response cache verification passed.")
@@ -0,0 +1,73 @@
+"""
+Verification script for the process-wide storage manager (library handle cache, Redis pool).
+Uses a counting stand-in for arcticdb.Arctic; no ArcticDB or Redis server needed.
+"""
+import os
+import sys
+import logging
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.data.store import ArcticLibraries, get_redis, redis
+
+logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+class CountingArctic:
+    def __init__(self, libraries=()):
+        self.libraries = set(libraries)
+        self.list_calls = 0
+        self.opened = 0
+
+    def list_libraries(self):
+        self.list_calls += 1
+        return sorted(self.libraries)
+
+    def create_library(self, name):
+        self.libraries.add(name)
+
+    def delete_library(self, name):
+        self.libraries.discard(name)
+
+    def __getitem__(self, name):
+        self.opened += 1
+        return ("library", name)
+
+def test_library_cache():
+    arctic = CountingArctic(["forex_1m"])
+    libs = ArcticLibraries(arctic)
+    threads = [threading.Thread(target=lambda: [libs.get("forex_1m") for _ in range(1000)]) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert arctic.list_calls == 1 and arctic.opened == 1
+
+    # A library created by another process is found after one refresh
+    arctic.libraries.add("stocks_1d")
+    assert libs.get("stocks_1d") == ("library", "stocks_1d") and arctic.list_calls == 2
+    try:
+        libs.get("missing")
+        raise AssertionError("missing library must raise")
+    except ValueError:
+        pass
+
+    libs.get("crypto_1m", create_if_missing=True)
+    assert "crypto_1m" in libs.names()
+    libs.delete("crypto_1m")
+    assert "crypto_1m" not in libs.names() and "crypto_1m" not in arctic.libraries
+
+def test_redis_pool():
+    if redis is None:
+        logger.warning("redis not installed; skipping pool check.")
+        return
+    a, b = get_redis("localhost", 6379), get_redis("localhost", 6379)
+    raw = get_redis("localhost", 6379, decode_responses=False)
+    assert a.connection_pool is b.connection_pool
+    assert raw.connection_pool is not a.connection_pool
+
+if __name__ == "__main__":
+    test_library_cache()
+    test_redis_pool()
+    logger.info("Storage manager verification passed.")
@@ -0,0 +1,71 @@
+"""
+Verification script for the per-symbol stats index kept by StorageEngine.
+Writes to a temporary LMDB store and checks the records against the data.
+"""
+import os
+import sys
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.data import store as store_module
+from src.data.store import StorageEngine, day_counts
+from src.maintenance.gap_filler import GapFiller
+
+logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+def _bars(start: str, periods: int) -> pd.DataFrame:
+    idx = pd.date_range(start, periods=periods, freq="min", tz="UTC", name="timestamp")
+    return pd.DataFrame({"close": np.arange(periods, dtype=np.float64)}, index=idx)
+
+def test_day_counts():
+    counts = day_counts(_bars("2024-01-01 23:00", 120).index)
+    assert counts.to_dict() == {pd.Timestamp("2024-01-01", tz="UTC"): 60, pd.Timestamp("2024-01-02", tz="UTC"): 60}
+    assert day_counts(pd.DatetimeIndex([])).empty
+
+def test_stats_on_write():
+    with tempfile.TemporaryDirectory() as root:
+        store = StorageEngine(f"lmdb://{root}")
+        store.connect()
+        df = _bars("2024-01-01 22:00", 3000)
+        store.write_frame("forex_1m", "EURUSD", df.iloc[:1000], digits=5)
+        store.write_frame("forex_1m", "EURUSD", df.iloc[1000:2500], mode="append")
+        store.write_frame("forex_1m", "EURUSD", df.iloc[1200:1400:2], mode="update")
+        stored = store.read_frame("forex_1m", "EURUSD")
+        record = store.symbol_stats("forex_1m")["EURUSD"]
+        assert record["rows"] == len(stored) and record["end"] == stored.index[-1] and record["start"] == stored.index[0]
+        assert store.daily_counts("forex_1m", "EURUSD").equals(day_counts(stored.index))
+
+        # Data written behind StorageEngine's back is picked up by a rebuild
+        store.get_library("forex_1m").write("GBPUSD", df)
+        assert "GBPUSD" not in store.symbol_stats("forex_1m")
+        store.rebuild_stats("forex_1m", ["GBPUSD"])
+        assert store.symbol_stats("forex_1m", ["GBPUSD"])["GBPUSD"]["rows"] == len(df)
+
+        # A write the record missed (another process) shows as stale; the next write recounts
+        more = _bars("2024-01-04 00:00", 200)
+        store.get_library("forex_1m").append("GBPUSD", more.iloc[:100])
+        assert store.symbol_stats("forex_1m", ["GBPUSD"])["GBPUSD"]["stale"]
+        store.write_frame("forex_1m", "GBPUSD", more.iloc[100:], mode="append")
+        record = store.symbol_stats("forex_1m", ["GBPUSD"])["GBPUSD"]
+        assert record["rows"] == len(df) + len(more) and not record["stale"]
+
+        store.write_frames("stocks_1d", {"AAA": df.iloc[:10], "BBB": df.iloc[:20]})
+        store.write_frames("stocks_1d", {"AAA": df.iloc[10:15]}, mode="append")
+        assert {s: r["rows"] for s, r in store.symbol_stats("stocks_1d").items()} == {"AAA": 15, "BBB": 20}
+
+        gaps = GapFiller(store).check_for_gaps("forex_1m", "EURUSD", expected_freq="1min")
+        full = pd.date_range(stored.index[0], stored.index[-1], freq="1min")
+        assert gaps.equals(full.difference(stored.index))
+
+if __name__ == "__main__":
+    test_day_counts()
+    if store_module.arcticdb is None:
+        logger.warning("arcticdb not installed; skipping stats index checks against a real store.")
+    else:
+        test_stats_on_write()
+    logger.info("Symbol stats verification passed.")
@@ -0,0 +1,59 @@
+"""
+Verification script for the Redis tick stream codec.
+Round-trips both entry schemas, as written by the ingestor and read back raw.
+"""
+import os
+import sys
+import logging
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.tick_codec import (
+    encode_entry, decode_entry, decode_compact_batch, TICK_STRUCT, COMPACT_FIELD
+)
+
+logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+TS = datetime(2025, 3, 4, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+def _as_redis(entry: dict) -> dict:
+    """What a decode_responses=False client returns for an XADD'ed dict."""
+    return {k.encode(): v if isinstance(v, bytes) else v.encode() for k, v in entry.items()}
+
+def test_compact_round_trip():
+    entry = encode_entry("USDJPY", 150.123, 150.131, TS, 1741091415120, compact=True)
+    assert list(entry) == [COMPACT_FIELD]
+    assert len(entry[COMPACT_FIELD]) == TICK_STRUCT.size
+
+    tick = decode_entry(_as_redis(entry))
+    assert tick["bid"] == 150.123
+    assert tick["ask"] == 150.131
+    assert tick["timestamp"] == TS
+    assert tick["exchange_ts"] == datetime(2025, 3, 4, 12, 30, 15, 120000, tzinfo=timezone.utc)
+
+def test_compact_missing_side():
+    entry = encode_entry("EURUSD", 1.08123, None, TS, compact=True)
+    tick = decode_entry(_as_redis(entry))
+    assert tick["ask"] is None and tick["exchange_ts"] is None
+
+def test_legacy_round_trip():
+    entry = encode_entry("EURUSD", 1.08123, 1.0813, TS)
+    for fields in (entry, _as_redis(entry)):
+        tick = decode_entry(fields)
+        assert tick["symbol"] == "EURUSD"
+        assert (tick["bid"], tick["ask"], tick["timestamp"]) == (1.08123, 1.0813, TS)
+
+def test_batch_decode():
+    records = [encode_entry("EURUSD", 1.0 + i / 100000, None, TS, compact=True)[COMPACT_FIELD]
+               for i in range(100)]
+    decoded = decode_compact_batch(records)
+    assert [bid for bid, _, _, _ in decoded] == [1.0 + i / 100000 for i in range(100)]
+
+if __name__ == "__main__":
+    test_compact_round_trip()
+    test_compact_missing_side()
+    test_legacy_round_trip()
+    test_batch_decode()
+    logger.info("Tick codec verification passed.")
@@ -0,0 +1,56 @@
+"""
+Verification script for the vectorized CTrader trendbar decoder.
+Checks the array decoder against the per-bar reference formula.
+"""
+import os
+import sys
+import logging
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOAGetTrendbarsRes
+from src.data.ingest.ctrader import decode_trendbars
+
+logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+def _make_response(n: int = 500) -> ProtoOAGetTrendbarsRes:
+    res = ProtoOAGetTrendbarsRes(ctidTraderAccountId=1, period=1, timestamp=0, symbolId=1)
+    base_minutes = int(datetime(2025, 1, 2, tzinfo=timezone.utc).timestamp() // 60)
+    for i in range(n):
+        bar = res.trendbar.add()
+        bar.low = 108000 + (i * 7) % 300
+        bar.deltaOpen = i % 11
+        bar.deltaClose = (i * 3) % 13
+        bar.deltaHigh = 15 + i % 5
+        bar.volume = 100 + i
+        bar.utcTimestampInMinutes = base_minutes + i
+    return res
+
+def test_decode_matches_reference():
+    res = _make_response()
+    df = decode_trendbars(res.trendbar)
+
+    assert len(df) == len(res.trendbar)
+    assert list(df.columns) == ['open', 'high', 'low', 'close', 'volume']
+    assert str(df.index.tz) == 'UTC'
+    assert df.index.name == 'timestamp'
+
+    for i, bar in enumerate(res.trendbar):
+        row = df.iloc[i]
+        assert df.index[i] == datetime.fromtimestamp(bar.utcTimestampInMinutes * 60, timezone.utc)
+        assert row['low'] == bar.low / 100000.0
+        assert row['open'] == (bar.low + bar.deltaOpen) / 100000.0
+        assert row['high'] == (bar.low + bar.deltaHigh) / 100000.0
+        assert row['close'] == (bar.low + bar.deltaClose) / 100000.0
+        assert row['volume'] == bar.volume
+
+def test_decode_empty():
+    res = ProtoOAGetTrendbarsRes(ctidTraderAccountId=1, period=1, timestamp=0, symbolId=1)
+    assert decode_trendbars(res.trendbar).empty
+
+if __name__ == "__main__":
+    test_decode_matches_reference()
+    test_decode_empty()
+    logger.info("Trendbar decoder verification passed.")